@@ -0,0 +1,201 @@
+from bisect import bisect_left, insort
+from collections import Counter
+from math import isnan
+
+from catalog_store import np
+
+AGGREGATE_NUMBERS = ['price', 'area']
+AGGREGATE_TEXTS = ['type', 'size']
+
+
+class Summary:
+    # one group of cards: how many, each number's values kept sorted
+    # (min / max / median without a pass) with their sum, and how often
+    # each text code occurs; NaN (missing) numbers are left out
+    __slots__ = ('count', 'values', 'sums', 'breakdown')
+
+    def __init__(self):
+        self.count = 0
+        self.values = {name: [] for name in AGGREGATE_NUMBERS}
+        self.sums = dict.fromkeys(AGGREGATE_NUMBERS, 0.0)
+        self.breakdown = {name: Counter() for name in AGGREGATE_TEXTS}
+
+    @classmethod
+    def ofRows(cls, store, rows):
+        # batch build over store rows (a list, or a numpy index array)
+        s = cls()
+        s.count = len(rows)
+        for name in AGGREGATE_NUMBERS:
+            col = store.numbers[name]
+            if np is not None:
+                v = np.frombuffer(col, dtype=np.float64)[rows]
+                v = np.sort(v[~np.isnan(v)])
+                s.values[name] = v.tolist()
+                s.sums[name] = float(v.sum())
+            else:
+                v = sorted(x for x in (col[r] for r in rows) if not isnan(x))
+                s.values[name] = v
+                s.sums[name] = sum(v)
+        for name in AGGREGATE_TEXTS:
+            codes = store.texts[name].codes
+            if np is not None:
+                found, counts = np.unique(np.frombuffer(codes, dtype=np.int32)[rows],
+                                          return_counts=True)
+                s.breakdown[name] = Counter(dict(zip(found.tolist(), counts.tolist())))
+            else:
+                s.breakdown[name] = Counter(codes[r] for r in rows)
+        return s
+
+    def add(self, numbers, codes):
+        self.count += 1
+        for name, x in zip(AGGREGATE_NUMBERS, numbers):
+            if not isnan(x):
+                insort(self.values[name], x)
+                self.sums[name] += x
+        for name, c in zip(AGGREGATE_TEXTS, codes):
+            self.breakdown[name][c] += 1
+
+    def remove(self, numbers, codes):
+        self.count -= 1
+        for name, x in zip(AGGREGATE_NUMBERS, numbers):
+            if not isnan(x):
+                values = self.values[name]
+                del values[bisect_left(values, x)]
+                self.sums[name] -= x
+        for name, c in zip(AGGREGATE_TEXTS, codes):
+            counter = self.breakdown[name]
+            counter[c] -= 1
+            if counter[c] <= 0:
+                del counter[c]
+
+    def minimum(self, name):
+        v = self.values[name]
+        return v[0] if v else None
+
+    def maximum(self, name):
+        v = self.values[name]
+        return v[-1] if v else None
+
+    def mean(self, name):
+        v = self.values[name]
+        return self.sums[name] / len(v) if v else None
+
+    def median(self, name):
+        v = self.values[name]
+        if not v:
+            return None
+        mid = len(v) // 2
+        return v[mid] if len(v) % 2 else (v[mid - 1] + v[mid]) / 2
+
+
+class SectionAggregates:
+    # a Summary per section (keyed by the section's search-index id) and
+    # one for the whole catalog, built once in batch and then kept up to
+    # date row by row from the store's watcher calls
+    def __init__(self, store):
+        self.store = store
+        self.sections = {}
+        self.total = Summary()
+        self.version = 0
+        self._alive = bytearray()
+        self._addRows(0)
+        store.watchers.append(self.onStoreChanged)
+
+    def detach(self):
+        if self.onStoreChanged in self.store.watchers:
+            self.store.watchers.remove(self.onStoreChanged)
+
+    def _row(self, r):
+        store = self.store
+        return ([store.numbers[name][r] for name in AGGREGATE_NUMBERS],
+                [store.texts[name].codes[r] for name in AGGREGATE_TEXTS])
+
+    def _addRows(self, first):
+        store = self.store
+        alive = store.alive()
+        if np is not None:
+            alive = alive[first:]
+            rows = np.nonzero(alive)[0] + first
+            self._alive.extend(alive.astype(np.uint8).tobytes())
+            sections = np.frombuffer(store.sectionNids, dtype=np.int32)[rows]
+            order = np.argsort(sections, kind='stable')
+            rows, sections = rows[order], sections[order]
+            starts = np.nonzero(np.diff(sections))[0] + 1
+            groups = zip(sections[np.r_[0, starts]].tolist() if len(rows) else [],
+                         np.split(rows, starts) if len(rows) else [])
+        else:
+            alive = alive[first:]
+            self._alive.extend(bytes(alive))
+            byNid = {}
+            for r, ok in enumerate(alive, first):
+                if ok:
+                    byNid.setdefault(store.sectionNids[r], []).append(r)
+            rows = [r for group in byNid.values() for r in group]
+            groups = byNid.items()
+        if first == 0:
+            # first build: whole groups at once, sorted in one go
+            self.sections = {nid: Summary.ofRows(store, group) for nid, group in groups}
+            self.total = Summary.ofRows(store, rows)
+        else:
+            for nid, group in groups:
+                summary = self.sections.get(nid)
+                if summary is None:
+                    summary = self.sections[nid] = Summary()
+                for r in (group.tolist() if np is not None else group):
+                    numbers, codes = self._row(r)
+                    summary.add(numbers, codes)
+                    self.total.add(numbers, codes)
+        self.version += 1
+
+    def _change(self, r, add):
+        numbers, codes = self._row(r)
+        summary = self.sections.setdefault(self.store.sectionNids[r], Summary())
+        if add:
+            summary.add(numbers, codes)
+            self.total.add(numbers, codes)
+        else:
+            summary.remove(numbers, codes)
+            self.total.remove(numbers, codes)
+
+    def onStoreChanged(self, kind, row):
+        if kind == 'appended':
+            self._addRows(row)
+            return
+        if kind in ('updating', 'updated'):
+            # out with the old values, in with the new
+            if self._alive[row]:
+                self._change(row, kind == 'updated')
+        elif kind == 'invalidated':
+            # rows that just died are taken out, rows brought back by an
+            # undo are put back in
+            alive = self.store.alive()
+            if np is not None:
+                was = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+                died = np.nonzero(was & ~alive)[0].tolist()
+                revived = np.nonzero(~was & alive)[0].tolist()
+            else:
+                died = [r for r, ok in enumerate(alive) if self._alive[r] and not ok]
+                revived = [r for r, ok in enumerate(alive) if not self._alive[r] and ok]
+            for r in died:
+                self._change(r, False)
+                self._alive[r] = 0
+            for r in revived:
+                self._change(r, True)
+                self._alive[r] = 1
+        self.version += 1
+
+    def section(self, nid):
+        return self.sections.get(nid)
+
+
+def filterRows(store, result):
+    # store rows of the live cards a search result shows: the card itself
+    # or something inside it matched
+    alive = store.alive()
+    if np is not None:
+        ids = np.frombuffer(store.nids, dtype=np.int32)
+        hit = np.frombuffer(result.hit, dtype=np.uint8)[ids]
+        desc = np.frombuffer(result.desc, dtype=np.uint8)[ids]
+        return np.nonzero(alive & ((hit | desc) != 0))[0]
+    return [r for r, (n, ok) in enumerate(zip(store.nids, alive))
+            if ok and (result.hit[n] or result.desc[n])]
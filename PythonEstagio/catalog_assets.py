@@ -0,0 +1,274 @@
+import os
+import sys
+import json
+import hashlib
+import threading
+from collections import namedtuple, Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog_core import iterCards, saveJsonAtomic
+
+# CATALOG_ASSETS=<Unity project>/Assets[:<other project>/Assets…], when
+# not picked in the editor
+ENV_ASSETS = 'CATALOG_ASSETS'
+
+# what Unity's Resources.Load is given for each card field
+# (CatalogLoader.cs: "Images/Houses/" + imageName); names carry no extension
+RESOURCE_PATHS = {
+    'imageName': 'Images/Houses',
+    'mapImageName': 'Images/Maps',
+}
+ASSET_FOLDERS = {field: os.path.join('Resources', *path.split('/'))
+                 for field, path in RESOURCE_PATHS.items()}
+# texture formats Unity imports, in the order a name is looked up
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tga', '.psd', '.bmp', '.gif',
+                    '.tif', '.tiff', '.exr', '.hdr')
+_EXT_RANK = {ext: i for i, ext in enumerate(IMAGE_EXTENSIONS)}
+ASSET_INDEX_VERSION = 1
+
+Asset = namedtuple('Asset', 'path mtime size')
+
+
+def assetRootsFromEnvironment(environ=os.environ):
+    return [p for p in environ.get(ENV_ASSETS, '').split(os.pathsep) if p.strip()]
+
+
+class AssetResolver:
+    # card field values → files under one or more Unity Assets folders
+    # (first one that has it wins). Each field's folder is listed once, on
+    # first use, from any thread; refresh() forgets the listings after
+    # files changed on disk.
+    def __init__(self, roots):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def folders(self, field):
+        return [os.path.join(root, ASSET_FOLDERS[field]) for root in self.roots]
+
+    def refresh(self):
+        with self._lock:
+            self._listings.clear()
+
+    def _listing(self, field):
+        listing = self._listings.get(field)
+        if listing is None:
+            with self._lock:
+                listing = self._listings.get(field)
+                if listing is None:
+                    listing = {}
+                    for folder in reversed(self.folders(field)):
+                        listing.update(self._scan(folder))
+                    self._listings[field] = listing
+        return listing
+
+    @staticmethod
+    def _scan(folder):
+        # "sub/Name" → Asset, the first extension in IMAGE_EXTENSIONS wins
+        found = {}
+        for dirpath, _, files in os.walk(folder):
+            rel = os.path.relpath(dirpath, folder)
+            for f in files:
+                stem, ext = os.path.splitext(f)
+                ext = ext.lower()
+                if ext not in _EXT_RANK:
+                    continue
+                name = stem if rel == '.' else f"{rel.replace(os.sep, '/')}/{stem}"
+                if name in found and _EXT_RANK[os.path.splitext(found[name][0])[1].lower()] <= _EXT_RANK[ext]:
+                    continue
+                path = os.path.join(dirpath, f)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found[name] = Asset(path, st.st_mtime_ns, st.st_size)
+        return found
+
+    def resolve(self, field, name):
+        # the Asset for `name`, None if Unity wouldn't find it either
+        if field not in ASSET_FOLDERS or not isinstance(name, str) or not name.strip():
+            return None
+        return self._listing(field).get(name.strip())
+
+
+def _unityIgnores(name):
+    # Unity doesn't import hidden folders or ones ending in '~'
+    return name.startswith('.') or name.endswith('~')
+
+
+class AssetIndex:
+    # Every image under the Resources folders of some Unity Assets folders,
+    # by the name Resources.Load takes ("Images/Houses/House1"). Directory
+    # listings are kept with their mtimes (and persisted to `path`), so an
+    # update only re-lists directories whose mtime changed; directories are
+    # stat'ed and listed on a thread pool, one tree level at a time.
+    def __init__(self, roots, path=None, workers=None):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.path = path
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.dirs = {}      # folder → (mtime_ns, image files, subfolders)
+        self.names = {}     # resource name → [paths]
+        self.listed = 0     # folders re-listed by the last update
+
+    def load(self):
+        # listings from the last run; missing or stale files just mean a
+        # full scan
+        if not self.path:
+            return False
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if saved.get('version') != ASSET_INDEX_VERSION or saved.get('roots') != self.roots:
+            return False
+        self.dirs = {d: (e[0], e[1], e[2]) for d, e in saved.get('dirs', {}).items()}
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        saveJsonAtomic(self.path, {'version': ASSET_INDEX_VERSION, 'roots': self.roots,
+                                   'dirs': {d: list(e) for d, e in self.dirs.items()}})
+
+    def _list(self, folder):
+        # (folder, entry or None if it's gone, 1 if it had to be re-listed)
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            return folder, None, 0
+        cached = self.dirs.get(folder)
+        if cached is not None and cached[0] == mtime:
+            return folder, cached, 0
+        files, subdirs = [], []
+        try:
+            with os.scandir(folder) as it:
+                for e in it:
+                    if _unityIgnores(e.name):
+                        continue
+                    if e.is_dir(follow_symlinks=False):
+                        subdirs.append(e.name)
+                    elif os.path.splitext(e.name)[1].lower() in _EXT_RANK:
+                        files.append(e.name)
+        except OSError:
+            return folder, None, 0
+        return folder, (mtime, sorted(files), sorted(subdirs)), 1
+
+    def update(self):
+        dirs, listed = {}, 0
+        frontier = [r for r in self.roots if os.path.isdir(r)]
+        with ThreadPoolExecutor(self.workers) as pool:
+            while frontier:
+                level, frontier = frontier, []
+                for folder, entry, fresh in pool.map(self._list, level):
+                    if entry is None:
+                        continue
+                    dirs[folder] = entry
+                    listed += fresh
+                    frontier.extend(os.path.join(folder, s) for s in entry[2])
+        changed = listed or dirs.keys() != self.dirs.keys()
+        self.dirs, self.listed = dirs, listed
+        self._buildNames()
+        if self.path and changed:
+            self.save()
+        return self
+
+    def _buildNames(self):
+        names = {}
+        for root in self.roots:
+            for folder, (_, files, _) in self.dirs.items():
+                if folder != root and not folder.startswith(root + os.sep):
+                    continue
+                parts = os.path.relpath(folder, root).split(os.sep)
+                if 'Resources' not in parts:
+                    continue
+                # relative to the innermost Resources folder
+                at = len(parts) - 1 - parts[::-1].index('Resources')
+                prefix = '/'.join(parts[at + 1:])
+                for f in files:
+                    stem = os.path.splitext(f)[0]
+                    names.setdefault(f'{prefix}/{stem}' if prefix else stem, []).append(
+                        os.path.join(folder, f))
+        self.names = names
+
+    def rootOf(self, path):
+        for root in self.roots:
+            if path.startswith(root + os.sep):
+                return root
+        return None
+
+    def problem(self, field, name):
+        # None, ('missing', message) or ('duplicate', message): Unity picks
+        # one of several files with that name in the same project
+        path = RESOURCE_PATHS[field]
+        paths = self.names.get(f'{path}/{name.strip()}')
+        if not paths:
+            return 'missing', f'{name!r} not found in any Resources/{path}'
+        perRoot = Counter(self.rootOf(p) for p in paths)
+        if max(perRoot.values()) > 1:
+            same = [p for p in paths if perRoot[self.rootOf(p)] > 1]
+            return 'duplicate', f"{name!r} matches {len(same)} files: " + ', '.join(same)
+        return None
+
+
+def defaultIndexFile(roots):
+    # one persisted index per set of Assets folders
+    key = '\0'.join(os.path.abspath(r) for r in roots).encode('utf-8', 'surrogateescape')
+    return os.path.join(os.path.dirname(defaultCacheDir()),
+                        f'asset_index_{hashlib.sha1(key).hexdigest()[:16]}.json')
+
+
+def checkAssetRefs(data, index):
+    # asset references that Unity won't resolve (or resolves ambiguously),
+    # as "path: message" strings like validateCatalog's; each distinct
+    # name is looked up once
+    errors, seen = [], {}
+    for si, ci, _, card in iterCards(data):
+        for field in RESOURCE_PATHS:
+            name = card.get(field)
+            if not isinstance(name, str) or not name.strip():
+                continue
+            key = (field, name)
+            if key not in seen:
+                seen[key] = index.problem(field, name)
+            problem = seen[key]
+            if problem is not None:
+                errors.append(f"sections[{si}].cards[{ci}].{field}: {problem[1]}")
+    return errors
+
+
+def defaultCacheDir():
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'json_catalog_editor', 'thumbnails')
+
+
+def thumbnailFile(cacheDir, asset, size):
+    # on-disk cache entry of `asset` scaled to fit `size`; a new mtime or
+    # file size is a new entry
+    key = f'{asset.path}\0{asset.mtime}\0{asset.size}\0{size}'.encode('utf-8', 'surrogateescape')
+    return os.path.join(cacheDir, hashlib.sha1(key).hexdigest() + '.png')
+
+
+def storeAssetProblems(store, index):
+    # (row, field, kind, message) for the live cards of a CardStore whose
+    # asset references don't resolve cleanly; only the distinct names are
+    # looked up, rows are matched by their interned codes. numpy comes with
+    # the store (the editor); the batch CLI never gets here and doesn't load it
+    from catalog_store import np
+    alive = store.alive()
+    for field in RESOURCE_PATHS:
+        found = [index.problem(field, v) if v.strip() else None for v in store.textValues(field)]
+        bad = [c for c, p in enumerate(found) if p is not None]
+        if not bad:
+            continue
+        codes = store.codes(field)
+        if np is not None:
+            rows = np.nonzero(np.isin(codes, np.array(bad, dtype=np.int32)) & alive)[0].tolist()
+        else:
+            bad = set(bad)
+            rows = [r for r, c in enumerate(codes) if c in bad and alive[r]]
+        for r in rows:
+            kind, message = found[codes[r]]
+            yield r, field, kind, message
@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from catalog_core import loadJsonFile, saveJsonAtomic, normalizeCatalog, applyEdits
+from catalog_schema import validateCatalog
+from catalog_assets import AssetIndex, assetRootsFromEnvironment, checkAssetRefs, defaultIndexFile
+
+
+def parseAssignments(items):
+    # ["price=1000", "type=MORADIA"] → {"price": 1000, "type": "MORADIA"};
+    # values that aren't JSON are taken as plain strings
+    out = {}
+    for item in items or ():
+        key, sep, text = item.partition('=')
+        if not sep or not key:
+            raise argparse.ArgumentTypeError(f"expected FIELD=VALUE, got {item!r}")
+        try:
+            out[key] = json.loads(text)
+        except ValueError:
+            out[key] = text
+    return out
+
+
+def findCatalogs(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.endswith('.json'):
+                        yield os.path.join(folder, name)
+        else:
+            yield path
+
+
+def processFile(job):
+    # runs in a pool process; returns a plain dict so it pickles cheaply
+    path, command, options = job
+    start = time.perf_counter()
+    result = {'path': path, 'errors': [], 'changed': 0, 'failed': None}
+    try:
+        data = loadJsonFile(path)
+        if command == 'normalize':
+            result['changed'] = normalizeCatalog(data)
+        elif command == 'edit':
+            result['changed'] = applyEdits(data, options['set'], options['where'], options['section'])
+        result['errors'] = validateCatalog(data)
+        if options['assets'] is not None:
+            result['errors'] += checkAssetRefs(data, options['assets'])
+        if result['changed'] and not options['dry_run']:
+            saveJsonAtomic(path, data)
+    except (OSError, ValueError) as e:
+        result['failed'] = str(e)
+    result['ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def report(result, command, out):
+    if result['failed']:
+        status = 'FAILED'
+    elif result['errors']:
+        status = f"{len(result['errors'])} errors"
+    else:
+        status = 'ok'
+    if command != 'validate':
+        status += f", {result['changed']} changed"
+    out.write(f"{result['ms']:9.1f} ms  {status:<24} {result['path']}\n")
+    if result['failed']:
+        out.write(f"    {result['failed']}\n")
+    for error in result['errors']:
+        out.write(f"    {error}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m catalog_batch',
+        description='Validate, normalize or bulk-edit catalog JSON files in parallel.')
+    parser.add_argument('command', choices=('validate', 'normalize', 'edit'))
+    parser.add_argument('paths', nargs='+', help='catalog files or folders to search for *.json')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--set', action='append', metavar='FIELD=VALUE',
+                        help='edit: card field to set (repeatable)')
+    parser.add_argument('--where', action='append', metavar='FIELD=VALUE',
+                        help='edit: only cards whose field equals VALUE (repeatable)')
+    parser.add_argument('--section', help='edit: only cards in the section with this title')
+    parser.add_argument('-n', '--dry-run', action='store_true',
+                        help="report changes but don't write files")
+    parser.add_argument('--assets', action='append', metavar='DIR',
+                        help='Unity Assets folder to check imageName/mapImageName against '
+                             '(repeatable; default: $CATALOG_ASSETS)')
+    args = parser.parse_args(argv)
+    try:
+        options = {'set': parseAssignments(args.set), 'where': parseAssignments(args.where),
+                   'section': args.section, 'dry_run': args.dry_run}
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if args.command == 'edit' and not options['set']:
+        parser.error('edit needs at least one --set FIELD=VALUE')
+    roots = args.assets or assetRootsFromEnvironment()
+    options['assets'] = None
+    if roots:
+        # built (or brought up to date) once, here, and shipped to the workers
+        start = time.perf_counter()
+        index = AssetIndex(roots, defaultIndexFile(roots))
+        index.load()
+        index.update()
+        print(f"asset index: {len(index.names)} names in {len(index.dirs)} folders, "
+              f"{index.listed} re-listed, {(time.perf_counter() - start) * 1000:.1f} ms")
+        options['assets'] = index
+
+    jobs = [(path, args.command, options) for path in findCatalogs(args.paths)]
+    start = time.perf_counter()
+    if args.jobs <= 1 or len(jobs) <= 1:
+        results = map(processFile, jobs)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(min(args.jobs, len(jobs)))
+        results = pool.map(processFile, jobs, chunksize=max(1, len(jobs) // (args.jobs * 4)))
+    bad = 0
+    try:
+        for result in results:
+            report(result, args.command, sys.stdout)
+            bad += bool(result['failed'] or result['errors'])
+    finally:
+        if pool:
+            pool.shutdown()
+    elapsed = time.perf_counter() - start
+    print(f"{len(jobs)} files, {bad} with problems, {elapsed:.2f} s")
+    return 1 if bad else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,341 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5 import QtWidgets, QtCore
+
+from catalog_core import loadJsonFile, saveJsonAtomic, SearchIndex
+from catalog_generate import generateCatalog
+from catalog_json import BACKENDS, jsonBackend, setJsonBackend
+from json_editor import JsonEditor, JsonModel, TreeFilterProxyModel
+
+# larger catalogs (--cards 100000) take minutes per run
+DEFAULT_SIZES = [1000, 10000]
+FILTER_QUERIES = ['lisboa', 'casa 12', 'moradia', 'zzz-no-match']
+ADD_COUNT = 100
+# expandAll builds every row of the view; past this it takes minutes
+EXPAND_ALL_LIMIT = 20000
+
+
+class BenchEditor(JsonEditor):
+    # the editor as benchmarked: no modal box after a save (nobody is there
+    # to close it) and its edit journal in a folder of its own under the
+    # bench's, not next to the catalogs where the next editor would offer
+    # to restore it
+    def __init__(self, journalDir):
+        super().__init__()
+        self.journalDir = tempfile.mkdtemp(dir=journalDir)
+
+    def showSaved(self, path):
+        pass
+
+    def journalBase(self, path):
+        return os.path.join(self.journalDir, os.path.basename(path))
+
+
+class BenchContext:
+    # one generated catalog (file + parsed data) shared by the benchmarks
+    # of that size; each benchmark's setup builds its own model/editor
+    def __init__(self, app, path, cards, workdir):
+        self.app = app
+        self.path = path
+        self.cards = cards
+        self.workdir = workdir
+        self.journalDir = os.path.join(workdir, 'journals')
+        os.makedirs(self.journalDir, exist_ok=True)
+        self.data = loadJsonFile(path)
+        self.keep = None
+
+    def waitFor(self, editor):
+        # until the editor's worker threads have finished and been reaped;
+        # dropping an editor with a thread still running aborts the process
+        while editor._workers:
+            self.app.processEvents(QtCore.QEventLoop.WaitForMoreEvents)
+
+    def view(self):
+        model = JsonModel(self.data)
+        proxy = TreeFilterProxyModel()
+        proxy.setSourceModel(model)
+        tree = QtWidgets.QTreeView()
+        tree.setModel(proxy)
+        return tree, proxy, model
+
+    def editor(self, path=None):
+        # an editor that has opened a copy of the catalog the way a user
+        # would (load worker, swap-in, sections expanded)
+        editor = BenchEditor(self.journalDir)
+        if path is None:
+            path = os.path.join(self.workdir, f'edit_{self.cards}.json')
+            shutil.copyfile(self.path, path)
+        editor.loadJson(path)
+        self.waitFor(editor)
+        return editor
+
+    def save(self, editor):
+        editor.saveFile()
+        self.waitFor(editor)
+
+
+def cardsIndex(editor, section=0):
+    proxy = editor.proxy
+    sections = proxy.index(0, 0)
+    return proxy.index(1, 0, proxy.index(section, 0, sections))
+
+
+# Each benchmark's setup gets the context and returns the callable to time.
+
+def benchParse(ctx):
+    return lambda: loadJsonFile(ctx.path)
+
+
+def benchSearchIndex(ctx):
+    return lambda: SearchIndex(ctx.data)
+
+
+def benchLoadData(ctx):
+    model = JsonModel()
+    return lambda: model.loadData(ctx.data)
+
+
+def benchOpen(ctx):
+    editor = ctx.keep = BenchEditor(ctx.journalDir)
+
+    def run():
+        editor.loadJson(ctx.path)
+        ctx.waitFor(editor)
+    return run
+
+
+def benchExpandAll(ctx):
+    tree, proxy, model = ctx.view()
+    return tree.expandAll
+
+
+def benchFilter(query):
+    def setup(ctx):
+        tree, proxy, model = ctx.view()
+        tree.expandToDepth(1)
+        model.searchIndex()
+        ctx.keep = tree
+        return lambda: proxy.setFilterString(query)
+    return setup
+
+
+def benchAddCard(ctx):
+    editor = ctx.editor()
+    index = cardsIndex(editor)
+
+    def run():
+        for _ in range(ADD_COUNT):
+            editor.addCard(index)
+    ctx.keep = editor
+    return run
+
+
+def benchAddSection(ctx):
+    editor = ctx.editor()
+
+    def run():
+        for _ in range(10):
+            editor.addSection()
+    ctx.keep = editor
+    return run
+
+
+def benchToData(ctx):
+    editor = ctx.editor()
+    model = editor.proxy.sourceModel()
+    editor.addCard(cardsIndex(editor))
+    ctx.keep = editor
+    return model.toData
+
+
+def benchSave(ctx):
+    editor = ctx.editor()
+    ctx.keep = editor
+    return lambda: ctx.save(editor)
+
+
+def benchSaveAfterEdit(ctx):
+    # second save of a session: one field changed since the last one
+    editor = ctx.editor()
+    ctx.save(editor)
+    model = editor.proxy.sourceModel()
+    card = editor.proxy.mapToSource(cardsIndex(editor).child(0, 0))
+    model.fetchMore(card)
+    model.setData(model.index(0, 1, card), 'Bench edit')
+    ctx.keep = editor
+    return lambda: ctx.save(editor)
+
+
+# (name, setup, largest catalog it runs on unless --full)
+BENCHMARKS = [
+    ('parse', benchParse, None),
+    ('searchIndex', benchSearchIndex, None),
+    ('loadData', benchLoadData, None),
+    ('open', benchOpen, None),
+    ('expandAll', benchExpandAll, EXPAND_ALL_LIMIT),
+] + [(f'filter:{q}', benchFilter(q), None) for q in FILTER_QUERIES] + [
+    (f'addCard x{ADD_COUNT}', benchAddCard, None),
+    ('addSection x10', benchAddSection, None),
+    ('toData', benchToData, None),
+    ('saveFile', benchSave, None),
+    ('saveFile after edit', benchSaveAfterEdit, None),
+]
+
+
+def measure(ctx, setup, repeat, memory):
+    # timings without tracemalloc (it slows Python code several times),
+    # then one traced run for the Python-side peak
+    runs = []
+    for _ in range(repeat):
+        run = setup(ctx)
+        start = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - start)
+        ctx.keep = None
+    peak = None
+    if memory:
+        run = setup(ctx)
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1] / (1 << 20)
+        finally:
+            tracemalloc.stop()
+            ctx.keep = None
+    return {'best': min(runs), 'median': statistics.median(runs), 'runs': runs, 'peak_mb': peak}
+
+
+def selected(name, only, skip):
+    if only and not any(name.startswith(o) for o in only):
+        return False
+    return not any(name.startswith(s) for s in skip or ())
+
+
+def runSuite(sizes, repeat=3, memory=True, only=None, skip=None, catalogDir=None,
+             full=False, out=sys.stdout):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    workdir = tempfile.mkdtemp(prefix='catalog_bench_')
+    # the editor's settings (remembered expansion, asset folders…) go to a
+    # throwaway folder for the run, not the user's
+    settingsDir = os.path.join(workdir, 'settings')
+    for fmt in (QtCore.QSettings.NativeFormat, QtCore.QSettings.IniFormat):
+        QtCore.QSettings.setPath(fmt, QtCore.QSettings.UserScope, settingsDir)
+    results = []
+    try:
+        for cards in sizes:
+            path = os.path.join(catalogDir or workdir, f'catalog_{cards}.json')
+            if not os.path.exists(path):
+                saveJsonAtomic(path, generateCatalog(cards))
+            ctx = BenchContext(app, path, cards, workdir)
+            out.write(f"\n{cards} cards ({os.path.getsize(path) / (1 << 20):.1f} MB)\n")
+            for name, setup, limit in BENCHMARKS:
+                if not selected(name, only, skip) or (limit and cards > limit and not full):
+                    continue
+                entry = {'name': name, 'cards': cards}
+                entry.update(measure(ctx, setup, repeat, memory))
+                results.append(entry)
+                peak = f"{entry['peak_mb']:9.1f} MB" if entry['peak_mb'] is not None else ''
+                out.write(f"  {name:<24}{entry['best'] * 1000:10.1f} ms{peak}\n")
+                out.flush()
+    finally:
+        userSettings = QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.GenericConfigLocation)
+        for fmt in (QtCore.QSettings.NativeFormat, QtCore.QSettings.IniFormat):
+            QtCore.QSettings.setPath(fmt, QtCore.QSettings.UserScope, userSettings)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'meta': {
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'qt': QtCore.QT_VERSION_STR,
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'json': jsonBackend().name,
+        },
+        'results': results,
+    }
+
+
+def compareRuns(old, new, threshold=1.15, minDelta=0.005, out=sys.stdout):
+    # best-of times per (benchmark, size); a regression is slower than
+    # `threshold` times the baseline and by more than `minDelta` seconds
+    base = {(r['name'], r['cards']): r for r in old['results']}
+    regressions = 0
+    out.write(f"{'benchmark':<24}{'cards':>9}{'old ms':>11}{'new ms':>11}{'ratio':>8}\n")
+    for r in new['results']:
+        b = base.get((r['name'], r['cards']))
+        if b is None:
+            continue
+        ratio = r['best'] / b['best'] if b['best'] else float('inf')
+        flag = ''
+        if ratio > threshold and r['best'] - b['best'] > minDelta:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif ratio < 1 / threshold and b['best'] - r['best'] > minDelta:
+            flag = '  faster'
+        out.write(f"{r['name']:<24}{r['cards']:>9}{b['best'] * 1000:11.1f}{r['best'] * 1000:11.1f}"
+                  f"{ratio:8.2f}{flag}\n")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m catalog_bench',
+        description='Time the editor hot paths on synthetic catalogs.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help='run the suite')
+    run.add_argument('--cards', default=','.join(map(str, DEFAULT_SIZES)),
+                     help='comma separated catalog sizes (default: %(default)s)')
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--only', action='append', help='benchmark name prefix to run (repeatable)')
+    run.add_argument('--skip', action='append', help='benchmark name prefix to skip (repeatable)')
+    run.add_argument('--full', action='store_true',
+                     help=f'also run expandAll above {EXPAND_ALL_LIMIT} cards')
+    run.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    run.add_argument('--catalogs', help='folder to keep generated catalogs in between runs')
+    run.add_argument('-o', '--output', help='write results to this JSON file')
+    run.add_argument('--compare', help='baseline results JSON to compare against')
+    run.add_argument('--threshold', type=float, default=1.15)
+    run.add_argument('--json', choices=sorted(BACKENDS),
+                     help='JSON backend for load/save (default: fastest installed)')
+    cmp = sub.add_parser('compare', help='compare two result files')
+    cmp.add_argument('old')
+    cmp.add_argument('new')
+    cmp.add_argument('--threshold', type=float, default=1.15)
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.old, encoding='utf-8') as f:
+            old = json.load(f)
+        with open(args.new, encoding='utf-8') as f:
+            new = json.load(f)
+        return 1 if compareRuns(old, new, args.threshold) else 0
+
+    if args.json:
+        setJsonBackend(args.json)
+    sizes = [int(s) for s in args.cards.split(',') if s.strip()]
+    results = runSuite(sizes, args.repeat, not args.no_memory, args.only, args.skip,
+                       args.catalogs, args.full)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            old = json.load(f)
+        print()
+        return 1 if compareRuns(old, results, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
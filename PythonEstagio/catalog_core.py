@@ -0,0 +1,765 @@
+import os
+import re
+import json
+import math
+import shutil
+import tempfile
+from array import array
+
+from catalog_json import jsonBackend, mappedFile
+
+# === Custom labels ===
+detailsLeft = [
+    "Area Bruta Privativa:",
+    "Area Total do Lote:",
+    "Quartos:",
+    "Piso:",
+    "Elevador:",
+    "Carr. Carros Eletricos:"
+]
+detailsRight = [
+    "Area Bruta:",
+    "Area Util:",
+    "Ano de Construção:",
+    "Casas de Banho:",
+    "Estacionamento:",
+    "Eficiência Energética:"
+]
+# ========================
+
+
+def rowsFor(data):
+    # (key text, value, child container or None) per visible row,
+    # following the same layout the tree has always shown; scalar values
+    # keep their parsed JSON type
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key in ("detailsLeft", "detailsRight"):
+                vals = value.splitlines() if isinstance(value, str) else value
+                labels = detailsLeft if key == "detailsLeft" else detailsRight
+                for i, v in enumerate(vals):
+                    yield (labels[i] if i < len(labels) else f"[{i}]"), v, None
+                continue
+            if isinstance(value, (dict, list)):
+                yield str(key), '', value
+            else:
+                yield str(key), value, None
+    elif isinstance(data, list):
+        for i, item in enumerate(data):
+            if isinstance(item, (dict, list)):
+                yield f"[{i}]", '', item
+            else:
+                yield f"[{i}]", item, None
+
+
+def coerceValue(text, vtype):
+    # text typed by the user → value of the cell's JSON type; text that
+    # doesn't fit is kept as a string (the cell still remembers its type)
+    if vtype is str or not isinstance(text, str):
+        return text
+    t = text.strip()
+    try:
+        if vtype is bool:
+            if t.lower() in ('true', 'false'):
+                return t.lower() == 'true'
+        elif vtype is int:
+            return int(t)
+        elif vtype is float:
+            v = float(t)
+            if math.isfinite(v):
+                return v
+        elif vtype is type(None):
+            if t.lower() in ('none', 'null', ''):
+                return None
+    except ValueError:
+        pass
+    return text
+
+
+class JsonNode:
+    # one tree row; `source` is the parsed container behind it and
+    # `children` stays None until the branch is first expanded.
+    # `value` is the typed scalar, `vtype` the JSON type it was loaded as.
+    # `dirty` means something below was edited, so `source` is out of date
+    # until a save rebases it.
+    __slots__ = ('key', 'value', 'vtype', 'source', 'children', 'parent', 'row', 'nid', 'dirty')
+
+    def __init__(self, key, value='', source=None, parent=None, row=0):
+        self.key = key
+        self.value = value
+        self.vtype = type(value)
+        self.source = source
+        self.children = None
+        self.parent = parent
+        self.row = row
+        self.nid = None
+        self.dirty = False
+
+    @property
+    def text(self):
+        return str(self.value)
+
+    def isFetched(self):
+        return self.children is not None
+
+    def isContainer(self):
+        return self.source is not None
+
+    def hasRows(self):
+        if self.children is not None:
+            return bool(self.children)
+        if self.source is None:
+            return False
+        return next(rowsFor(self.source), None) is not None
+
+    def fetch(self):
+        if self.children is None:
+            self.children = [
+                JsonNode(k, v, src, self, r)
+                for r, (k, v, src) in enumerate(rowsFor(self.source))
+            ]
+        return self.children
+
+    def rows(self):
+        # (key, value, child) without forcing unexpanded branches into nodes
+        if self.children is not None:
+            return [(c.key, c.value, c) for c in self.children]
+        if self.source is None:
+            return []
+        return list(rowsFor(self.source))
+
+    def clone(self, parent=None, row=0):
+        # unexpanded branches keep sharing their (never mutated) source;
+        # row ids stay those of the original until the copy is indexed
+        c = JsonNode(self.key, self.value, self.source, parent, row)
+        c.vtype = self.vtype
+        c.dirty = self.dirty
+        c.nid = self.nid
+        if self.children is not None:
+            c.children = [ch.clone(c, i) for i, ch in enumerate(self.children)]
+        return c
+
+    def markDirty(self):
+        node = self
+        while node is not None and not node.dirty:
+            node.dirty = True
+            node = node.parent
+
+    def toData(self):
+        # untouched branches are returned as parsed, edited ones are
+        # rebuilt from their typed children
+        if self.source is None:
+            return self.value
+        if self.children is None or not self.dirty:
+            return self.source
+        if isinstance(self.source, list):
+            return [c.toData() for c in self.children]
+        return {k: v.toData() if isinstance(v, JsonNode) else v
+                for k, v in self.dictItems()}
+
+    def dictItems(self):
+        # (key, child node or plain value) of an expanded dict in output
+        # order, with the label rows folded back into the newline-joined
+        # detailsLeft/detailsRight strings CatalogLoader.cs reads
+        d, left, right = {}, {}, {}
+        for c in self.children:
+            if c.source is None and c.key in detailsLeft:
+                d.setdefault('detailsLeft', None)
+                left[c.key] = c.value
+            elif c.source is None and c.key in detailsRight:
+                d.setdefault('detailsRight', None)
+                right[c.key] = c.value
+            else:
+                d[c.key] = c
+        if left:
+            d['detailsLeft'] = '\n'.join(str(left[l]) for l in detailsLeft if l in left)
+        if right:
+            d['detailsRight'] = '\n'.join(str(right[r]) for r in detailsRight if r in right)
+        return d.items()
+
+
+class SearchIndex:
+    # Flat pre-order index of every row (expanded or not). Lowercased keys
+    # and values live in joined blobs so a query is a str.find pass, and
+    # parent/end links let one pass mark every ancestor of a match.
+    # Edits go to `overrides` (renumbered keys to `keyOverrides`), deletes
+    # to `dead`, clones become new segments.
+    SEP = '\x00'
+
+    def __init__(self, source, isCancelled=None):
+        self.parent = array('i')
+        self.end = array('i')
+        self.dead = bytearray()
+        self.overrides = {}
+        self.keyOverrides = {}
+        self.segments = []
+        self.version = 0
+        # results from before this version may lack revived rows
+        self.revivedAt = 0
+        self._append(-1, _childRows(source), isCancelled)
+
+    def __len__(self):
+        return len(self.parent)
+
+    def _append(self, parentId, rows, isCancelled=None):
+        parent, end = self.parent, self.end
+        first = len(parent)
+        keys, vals = [], []
+        stack = [(iter(rows), parentId)]
+        while stack:
+            it, pid = stack[-1]
+            row = next(it, None)
+            if row is None:
+                stack.pop()
+                if pid >= first:
+                    end[pid] = len(parent)
+                continue
+            k, v, child = row
+            nid = len(parent)
+            parent.append(pid)
+            end.append(nid + 1)
+            keys.append(k.lower())
+            vals.append(str(v).lower())
+            if isinstance(child, JsonNode):
+                child.nid = nid
+            if child is not None:
+                stack.append((iter(_childRows(child)), nid))
+            if isCancelled and not nid & 0xFFFF and isCancelled():
+                raise LoadCancelled()
+        self.dead.extend(bytes(len(parent) - first))
+        self.segments.append((first, _joinBlob(keys), _joinBlob(vals)))
+        self.version += 1
+
+    def assignChildren(self, node):
+        # a freshly fetched branch was indexed as one contiguous run
+        c = node.nid + 1 if node.nid is not None else 0
+        for child in node.children:
+            child.nid = c
+            c = self.end[c]
+
+    def appendSubtrees(self, parentNode, nodes):
+        # a batch of new children is one segment, however many there are
+        pid = parentNode.nid if parentNode.nid is not None else -1
+        self._append(pid, [(node.key, node.value, node) for node in nodes])
+
+    def setValue(self, node, value):
+        self.overrides[node.nid] = str(value).lower()
+        self.version += 1
+
+    def setKey(self, node, key):
+        self.keyOverrides[node.nid] = key.lower()
+        self.version += 1
+
+    def remove(self, node):
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if n.children is None:
+                self.dead[n.nid:self.end[n.nid]] = b'\x01' * (self.end[n.nid] - n.nid)
+            else:
+                self.dead[n.nid] = 1
+                stack.extend(n.children)
+        self.version += 1
+
+    def revive(self, node):
+        # undo of remove(): the rows come back as they were
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if n.children is None:
+                self.dead[n.nid:self.end[n.nid]] = bytes(self.end[n.nid] - n.nid)
+            else:
+                self.dead[n.nid] = 0
+                stack.extend(n.children)
+        self.version += 1
+        self.revivedAt = self.version
+
+    def query(self, text, column, previous=None, isCancelled=None):
+        # A query that contains the previous one can only match rows the
+        # previous one matched, so those are re-checked instead of rescanning;
+        # only segments appended since then (clones) get a full scan.
+        sep = self.SEP
+        text = text.replace(sep, '')
+        result = SearchResult(text, column, self.version, len(self.parent))
+        overrides = dict(self.overrides if column == 1 else self.keyOverrides)
+        if previous is not None and previous.column == column and previous.text in text \
+                and previous.version >= self.revivedAt:
+            self._refine(result, previous, overrides, isCancelled)
+        self._scan(result, overrides, isCancelled)
+        # edited cells are few, they are always checked directly
+        found = [e for e, t in overrides.items() if text in t and not self.dead[e]]
+        for _, ids, _ in result.runs:
+            found.extend(ids)
+        parent, hit, desc = self.parent, result.hit, result.desc
+        for e in found:
+            hit[e] = 1
+            p = parent[e]
+            while p >= 0 and not desc[p]:
+                desc[p] = 1
+                p = parent[p]
+        return result
+
+    def _scan(self, result, overrides, isCancelled):
+        text, column, sep, dead = result.text, result.column, self.SEP, self.dead
+        for seg in range(len(result.runs), len(self.segments)):
+            first, keyBlob, valBlob = self.segments[seg]
+            blob = keyBlob if column == 0 else valBlob
+            find, rfind, count = blob.find, blob.rfind, blob.count
+            ids, starts = array('i'), array('q')
+            # rows are counted by separators between matches, so mapping a
+            # match back to its row costs no more than the scan itself
+            e, scan = first, 0
+            pos = find(text)
+            while pos != -1:
+                skipped = count(sep, scan, pos)
+                if skipped:
+                    e += skipped
+                    scan = rfind(sep, scan, pos) + 1
+                if not dead[e] and e not in overrides:
+                    ids.append(e)
+                    starts.append(scan)
+                    if isCancelled and not len(ids) & 0xFFFF and isCancelled():
+                        raise SearchCancelled()
+                scan = find(sep, pos) + 1
+                e += 1
+                pos = find(text, scan)
+            result.runs.append((seg, ids, starts))
+
+    def _refine(self, result, previous, overrides, isCancelled):
+        text, sep, dead = result.text, self.SEP, self.dead
+        for seg, prevIds, prevStarts in previous.runs:
+            _, keyBlob, valBlob = self.segments[seg]
+            find = (keyBlob if result.column == 0 else valBlob).find
+            ids, starts = array('i'), array('q')
+            for i, (e, s) in enumerate(zip(prevIds, prevStarts)):
+                if dead[e] or e in overrides:
+                    continue
+                if find(text, s, find(sep, s)) != -1:
+                    ids.append(e)
+                    starts.append(s)
+                if isCancelled and not i & 0xFFFF and isCancelled():
+                    raise SearchCancelled()
+            result.runs.append((seg, ids, starts))
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+class SearchResult:
+    # hit/desc are per-row bitsets (row matches / a descendant matches);
+    # runs keep (segment, row ids, row start offsets) so the next, longer
+    # query can refine this one. `cards` marks a structured card query
+    # (catalog_query), whose hits are whole cards
+    __slots__ = ('text', 'column', 'version', 'hit', 'desc', 'runs', 'cards', 'storeVersion')
+
+    def __init__(self, text, column, version, size):
+        self.text = text
+        self.column = column
+        self.version = version
+        self.hit = bytearray(size)
+        self.desc = bytearray(size)
+        self.runs = []
+        self.cards = False
+        self.storeVersion = None
+
+
+def _childRows(item):
+    if isinstance(item, JsonNode):
+        return item.rows()
+    return rowsFor(item)
+
+
+def _joinBlob(texts):
+    sep = SearchIndex.SEP
+    return sep.join(t.replace(sep, '') for t in texts) + sep
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+_WS = re.compile(r'[ \t\n\r]*')
+READ_CHUNK = 1 << 20
+WRITE_CHUNK = 1 << 18
+FRONTIER_BATCH = 1024
+
+
+def parseJsonIncremental(text, onProgress=None, isCancelled=None, depth=4):
+    # containers down to `depth` (catalog → sections → section → cards) are
+    # walked here so progress/cancel can happen between their elements;
+    # anything deeper (a single card) goes through the C decoder in one go
+    decoder = json.JSONDecoder()
+    total = max(len(text), 1)
+
+    def skip(i):
+        return _WS.match(text, i).end()
+
+    def step(i):
+        if isCancelled and isCancelled():
+            raise LoadCancelled()
+        if onProgress:
+            onProgress(i, total)
+
+    def expect(i, chars, msg):
+        if text[i:i + 1] not in chars:
+            raise json.JSONDecodeError(msg, text, i)
+
+    def value(i, level):
+        i = skip(i)
+        ch = text[i:i + 1]
+        if level >= depth or ch not in ('{', '['):
+            return decoder.raw_decode(text, i)
+        close = '}' if ch == '{' else ']'
+        out = {} if ch == '{' else []
+        i = skip(i + 1)
+        if text[i:i + 1] == close:
+            return out, i + 1
+        while True:
+            if ch == '{':
+                expect(i, '"', 'Expecting property name enclosed in double quotes')
+                key, i = json.decoder.scanstring(text, i + 1)
+                i = skip(i)
+                expect(i, ':', "Expecting ':' delimiter")
+                out[key], i = value(i + 1, level + 1)
+            else:
+                item, i = value(i, level + 1)
+                out.append(item)
+            step(i)
+            i = skip(i)
+            expect(i, (',', close), "Expecting ',' delimiter")
+            if text[i] == close:
+                return out, i + 1
+            i = skip(i + 1)
+
+    result, end = value(0, 0)
+    end = skip(end)
+    if end != len(text):
+        raise json.JSONDecodeError('Extra data', text, end)
+    return result
+
+
+def loadJsonFile(path, onProgress=None, isCancelled=None, backend=None):
+    # reading is the first 20 %, parsing the rest. With nobody listening
+    # the whole file goes through the backend's decoder at once (orjson
+    # straight from the mapped file); progress and cancel need the
+    # incremental parser whatever the backend, as one orjson call on a big
+    # catalog can be neither followed nor stopped.
+    backend = backend or jsonBackend()
+    if onProgress is None and isCancelled is None:
+        if backend.incremental:
+            with open(path, 'rb') as f:
+                return json.loads(f.read().decode('utf-8'))
+        with mappedFile(path) as buffer:
+            return backend.loads(buffer)
+    size = max(os.path.getsize(path), 1)
+    chunks, done = [], 0
+    with open(path, 'rb') as f:
+        while True:
+            if isCancelled and isCancelled():
+                raise LoadCancelled()
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            done += len(chunk)
+            if onProgress:
+                onProgress(20 * done // size)
+    text = b''.join(chunks).decode('utf-8')
+    del chunks
+    parseProgress = None
+    if onProgress:
+        parseProgress = lambda i, total: onProgress(20 + 80 * i // total)
+    data = parseJsonIncremental(text, parseProgress, isCancelled)
+    if onProgress:
+        onProgress(100)
+    return data
+
+
+def rebaseNode(node):
+    # toData() that also makes the result the source of every edited node
+    # under `node`, which is then no longer dirty
+    if node.source is None:
+        node.dirty = False
+        return node.value
+    if node.children is None or not node.dirty:
+        return node.source
+    if isinstance(node.source, list):
+        data = [rebaseNode(c) for c in node.children]
+    else:
+        data = {k: rebaseNode(v) if isinstance(v, JsonNode) else v for k, v in node.dictItems()}
+    node.source, node.dirty = data, False
+    return data
+
+
+def writeJson(root, write, onProgress=None, isCancelled=None, depth=4,
+              fragments=None, used=None, backend=None, rebase=False):
+    # Same text as json.dump(root.toData(), indent=2, ensure_ascii=False),
+    # written piece by piece: edited nodes and the outer `depth` levels of
+    # untouched data are walked here (progress/cancel between elements),
+    # anything deeper is encoded whole by the C encoder. With `fragments`
+    # (id(source) → (source, level, text, ...)) those encodings are reused
+    # from the last save, which relies on sources never being changed in
+    # place; the ones used this time are collected into `used`.
+    # With `rebase` the edited nodes of `root` (a snapshot) get what was
+    # written as their source, and their encodings go into `used` too.
+    backend = backend or jsonBackend()
+    put = write
+
+    def dumps(x, level):
+        s = backend.dumps(x)
+        return s.replace('\n', '\n' + '  ' * level) if level else s
+
+    def encode(x, level):
+        # a value at the frontier, as one string
+        if isinstance(x, JsonNode):
+            if x.source is None:
+                return dumps(x.value, level)
+            if x.children is not None and x.dirty:
+                if not rebase:
+                    return dumps(x.toData(), level)
+                x = rebaseNode(x)
+                entry = (x, level, dumps(x, level))
+                if used is not None:
+                    used[id(x)] = entry
+                return entry[2]
+            x = x.source
+        if fragments is None or not isinstance(x, (dict, list)):
+            return dumps(x, level)
+        entry = fragments.get(id(x))
+        if entry is None or entry[0] is not x or entry[1] != level:
+            entry = (x, level, dumps(x, level))
+        if used is not None:
+            used[id(x)] = entry
+        return entry[2]
+
+    def step(fraction):
+        if isCancelled and isCancelled():
+            raise LoadCancelled()
+        if onProgress:
+            onProgress(int(100 * fraction))
+
+    def emit(x, level, lo, hi):
+        # lists of frontier values (a section's cards) are kept whole too,
+        # with the entries of their items: an untouched section is one write
+        # and its cards stay cached for when one of them is edited
+        nonlocal put, used
+        src = x
+        if isinstance(x, JsonNode):
+            src = x.source if x.children is None or not x.dirty else None
+        whole = level == depth - 1 and fragments is not None and used is not None \
+            and (src is None or isinstance(src, (dict, list)))
+        if whole and src is not None:
+            entry = fragments.get(id(src))
+            if entry is not None and entry[0] is src and entry[1] == level:
+                used.update(entry[3])
+                used[id(src)] = entry
+                put(entry[2])
+                return
+        if not whole:
+            walk(x, level, lo, hi)
+            if rebase and isinstance(x, JsonNode) and x.dirty:
+                # what's under it already was, so this only gathers their sources
+                rebaseNode(x)
+            return
+        outer, parts, inner = (put, used), [], {}
+        put, used = parts.append, inner
+        try:
+            walk(x, level, lo, hi)
+        finally:
+            put, used = outer
+        used.update(inner)
+        if src is None and rebase:
+            src = rebaseNode(x)
+        text = ''.join(parts)
+        if src is not None:
+            used[id(src)] = (src, level, text, inner)
+        put(text)
+
+    def walk(x, level, lo, hi):
+        if isinstance(x, JsonNode):
+            if x.source is None:
+                put(dumps(x.value, level))
+                return
+            if x.children is None or not x.dirty:
+                x = x.source
+            elif isinstance(x.source, list):
+                items, brackets = [(None, c) for c in x.children], '[]'
+            else:
+                items, brackets = list(x.dictItems()), '{}'
+        if not isinstance(x, JsonNode):
+            if level >= depth or not isinstance(x, (dict, list)):
+                put(encode(x, level))
+                return
+            if isinstance(x, dict):
+                items, brackets = list(x.items()), '{}'
+            else:
+                items, brackets = [(None, v) for v in x], '[]'
+        if not items:
+            put(brackets)
+            return
+        pad = '\n' + '  ' * (level + 1)
+        n = len(items)
+        put(brackets[0])
+        if level + 1 >= depth:
+            # children are frontier values (cards): encode/splice them in
+            # batches rather than one write per element
+            sep = ',' + pad
+            for i in range(0, n, FRONTIER_BATCH):
+                step(lo + (hi - lo) * i / n)
+                put((sep if i else pad) + sep.join(
+                    (json.dumps(k, ensure_ascii=False) + ': ' if k is not None else '')
+                    + encode(v, level + 1)
+                    for k, v in items[i:i + FRONTIER_BATCH]))
+        else:
+            for i, (k, v) in enumerate(items):
+                put(',' + pad if i else pad)
+                if k is not None:
+                    put(json.dumps(k, ensure_ascii=False) + ': ')
+                start = lo + (hi - lo) * i / n
+                step(start)
+                emit(v, level + 1, start, lo + (hi - lo) * (i + 1) / n)
+        put('\n' + '  ' * level + brackets[1])
+
+    emit(root, 0, 0.0, 1.0)
+
+
+def saveJsonAtomic(path, root, onProgress=None, isCancelled=None,
+                   fragments=None, used=None, backend=None, rebase=False):
+    # stream into a temp file next to the target, fsync, then rename over
+    # it: a crash or cancel leaves the previous catalog untouched
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            parts, size = [], 0
+
+            def write(s):
+                nonlocal size
+                parts.append(s)
+                size += len(s)
+                if size >= WRITE_CHUNK:
+                    f.write(''.join(parts))
+                    parts.clear()
+                    size = 0
+
+            writeJson(root, write, onProgress, isCancelled,
+                      fragments=fragments, used=used, backend=backend, rebase=rebase)
+            f.write(''.join(parts))
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp)
+        else:
+            # mkstemp files are private; a new catalog gets the usual mode
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp, 0o666 & ~umask)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    try:
+        dirfd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return  # no directory handles (Windows)
+    try:
+        os.fsync(dirfd)
+    except OSError:
+        pass
+    finally:
+        os.close(dirfd)
+    if onProgress:
+        onProgress(100)
+
+
+# fields Unity's CardJson declares (Assets/Scripts/Data/CatalogJson.cs);
+# JsonUtility ignores any others
+CARD_FIELDS = {
+    'name': str,
+    'streetName': str,
+    'location': str,
+    'price': float,
+    'type': str,
+    'size': str,
+    'area': int,
+    'description': str,
+    'detailsLeft': str,
+    'detailsRight': str,
+    'imageName': str,
+    'latitude': float,
+    'longitude': float,
+    'scanImageName': str,
+    'modelPrefabName': str,
+}
+
+
+def iterCards(data):
+    # (section index, card index, section, card) for every card dict
+    sections = data.get('sections') if isinstance(data, dict) else None
+    for si, section in enumerate(sections if isinstance(sections, list) else ()):
+        cards = section.get('cards') if isinstance(section, dict) else None
+        for ci, card in enumerate(cards if isinstance(cards, list) else ()):
+            if isinstance(card, dict):
+                yield si, ci, section, card
+
+
+def _typeName(value):
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (int, float)):
+        return 'number'
+    return {str: 'string', list: 'list', dict: 'object', type(None): 'null'}.get(type(value), type(value).__name__)
+
+
+def coerceField(field, value):
+    # value in the JSON type CardJson declares for `field`, or unchanged
+    # when it can't be converted
+    ftype = CARD_FIELDS.get(field)
+    if ftype is str and isinstance(value, list):
+        return '\n'.join(str(v) for v in value)
+    if ftype in (int, float):
+        if isinstance(value, str):
+            value = coerceValue(value, float)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if ftype is float:
+                return float(value)
+            if value == int(value):
+                return int(value)
+    return value
+
+
+def normalizeCatalog(data):
+    # rewrite card fields into CardJson's types in place (detail lists to
+    # newline-joined strings, numbers stored as text or the wrong kind of
+    # number); returns how many fields changed
+    changed = 0
+    for _, _, _, card in iterCards(data):
+        for field in CARD_FIELDS.keys() & card.keys():
+            value = coerceField(field, card[field])
+            if type(value) is not type(card[field]) or value != card[field]:
+                card[field] = value
+                changed += 1
+    return changed
+
+
+def applyEdits(data, edits, where=None, section=None):
+    # set `edits` (field → value) on every card matching all of `where`
+    # (field → value) in sections titled `section`; returns cards changed
+    changed = 0
+    for _, _, sec, card in iterCards(data):
+        if section is not None and sec.get('title') != section:
+            continue
+        if where and any(card.get(k) != coerceField(k, v) for k, v in where.items()):
+            continue
+        touched = False
+        for field, value in edits.items():
+            value = coerceField(field, value)
+            if field not in card or card[field] != value or type(card[field]) is not type(value):
+                card[field] = value
+                touched = True
+        changed += touched
+    return changed
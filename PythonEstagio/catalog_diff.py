@@ -0,0 +1,408 @@
+import sys
+import json
+import time
+import argparse
+from array import array
+from bisect import bisect_left
+from collections import namedtuple, Counter
+from difflib import SequenceMatcher
+
+from catalog_core import JsonNode, rowsFor, _childRows, loadJsonFile, detailsLeft, detailsRight
+
+# One row-level change, addressed the way the tree shows rows: `path` is
+# the row numbers from the root down to the container, `row` is in the
+# numbering from before any change was applied.
+#   set     the scalar at `row` becomes `value`
+#   remove  `count` rows from `row` on
+#   insert  `value` = [(key, value, container or None)] before `row`
+Change = namedtuple('Change', 'kind path row count value')
+
+_ORDER = {'set': 0, 'remove': 1, 'insert': 2}
+# biggest block of changed list items (old × new) aligned item by item
+ALIGN_LIMIT = 250000
+
+
+def _rows(item):
+    # rows of an old container; scalar rows of expanded nodes come with
+    # no child, like rowsFor gives them
+    if isinstance(item, JsonNode) and item.children is not None:
+        return [(c.key, c.value, c if c.source is not None else None) for c in item.children]
+    return list(_childRows(item))
+
+
+def _container(item):
+    if isinstance(item, JsonNode):
+        return item.source
+    return item
+
+
+def _current(item):
+    # parsed data of a row's container, or None if the parsed source is
+    # out of date (edited below)
+    if isinstance(item, JsonNode):
+        if item.children is not None and item.dirty:
+            return None
+        return item.source
+    return item
+
+
+def _data(value, child):
+    if child is None:
+        return value
+    return child.toData() if isinstance(child, JsonNode) else child
+
+
+def sameValue(a, b):
+    return type(a) is type(b) and (a == b or (a != a and b != b))
+
+
+def _fingerprint(value, child):
+    # hashable summary of a list item for matching rows; two items with
+    # the same fingerprint are paired and diffed further
+    if child is None:
+        return (type(value).__name__, value)
+    data = _data(value, child)
+    if isinstance(data, dict):
+        return tuple((k, v) if not isinstance(v, (dict, list)) else (k, len(v))
+                     for k, v in data.items())
+    return ('list', len(data))
+
+
+def _diffRow(path, i, old, new, out):
+    k1, v1, c1 = old
+    _, v2, c2 = new
+    if c1 is None and c2 is None:
+        if not sameValue(v1, v2):
+            out.append(Change('set', path, i, 1, v2))
+    elif c1 is not None and c2 is not None and type(_container(c1)) is type(c2):
+        current = _current(c1)
+        if current is None or current != c2:
+            _diffRows(c1, c2, path + (i,), out)
+    else:
+        out.append(Change('remove', path, i, 1, None))
+        out.append(Change('insert', path, i, 0, [new]))
+
+
+def _diffRows(old, new, path, out):
+    oldRows = _rows(old)
+    newRows = list(rowsFor(new))
+    lo, hiOld, hiNew = 0, len(oldRows), len(newRows)
+    if isinstance(new, list):
+        # lists are matched on item data: unchanged ends are skipped, the
+        # middle is aligned on fingerprints
+        while (lo < hiOld and lo < hiNew
+               and _same(oldRows[lo], newRows[lo])):
+            lo += 1
+        while (hiOld > lo and hiNew > lo
+               and _same(oldRows[hiOld - 1], newRows[hiNew - 1])):
+            hiOld -= 1
+            hiNew -= 1
+        a = [_fingerprint(v, c) for _, v, c in oldRows[lo:hiOld]]
+        b = [_fingerprint(v, c) for _, v, c in newRows[lo:hiNew]]
+    else:
+        # dict rows (and the detail label rows) are matched on their keys
+        a = [k for k, _, _ in oldRows]
+        b = [k for k, _, _ in newRows]
+        hiOld, hiNew = len(oldRows), len(newRows)
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            pairs = [(i, j1 + i - i1) for i in range(i1, i2)]
+        elif tag == 'replace':
+            pairs = _align(a[i1:i2], b[j1:j2], i1, j1)
+        else:
+            pairs = []
+        # rows left over between two pairs are removed / inserted
+        i, j = i1, j1
+        for pi, pj in pairs + [(i2, j2)]:
+            if pi > i:
+                out.append(Change('remove', path, i + lo, pi - i, None))
+            if pj > j:
+                out.append(Change('insert', path, pi + lo, 0, newRows[j + lo:pj + lo]))
+            if pi < i2:
+                _diffRow(path, pi + lo, oldRows[pi + lo], newRows[pj + lo], out)
+            i, j = pi + 1, pj + 1
+
+
+def _comparable(fingerprint):
+    # dict fingerprints as (set of fields, field count), scalars as they are
+    if isinstance(fingerprint, tuple) and fingerprint and isinstance(fingerprint[0], tuple):
+        return set(fingerprint), len(fingerprint)
+    return fingerprint
+
+
+def _similar(a, b):
+    # two list items are the same item edited if most of their fields
+    # (or the whole scalar) still match
+    if isinstance(a, tuple) and isinstance(b, tuple) and isinstance(a[0], set) and isinstance(b[0], set):
+        return 2 * len(a[0] & b[0]) >= max(a[1], b[1])
+    return a == b
+
+
+def _align(a, b, i0, j0):
+    # (i, j) pairs of a longest chain of similar list items; blocks too
+    # big to compare pairwise are paired up in order
+    n, m = len(a), len(b)
+    if n * m > ALIGN_LIMIT:
+        return [(i0 + k, j0 + k) for k in range(min(n, m))]
+    a = [_comparable(x) for x in a]
+    b = [_comparable(x) for x in b]
+    best = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        row, below = best[i], best[i + 1]
+        for j in range(m - 1, -1, -1):
+            if _similar(a[i], b[j]):
+                row[j] = below[j + 1] + 1
+            else:
+                row[j] = max(below[j], row[j + 1])
+    pairs, i, j = [], 0, 0
+    while i < n and j < m:
+        if _similar(a[i], b[j]) and best[i][j] == best[i + 1][j + 1] + 1:
+            pairs.append((i0 + i, j0 + j))
+            i += 1
+            j += 1
+        elif best[i + 1][j] >= best[i][j + 1]:
+            i += 1
+        else:
+            j += 1
+    return pairs
+
+
+def _same(old, new):
+    k1, v1, c1 = old
+    _, v2, c2 = new
+    if c1 is None or c2 is None:
+        return c1 is None and c2 is None and sameValue(v1, v2)
+    current = _current(c1)
+    return current is not None and type(current) is type(c2) and current == c2
+
+
+def diffTree(old, new):
+    # Changes that turn the rows of `old` (a JsonNode tree, expanded or
+    # not, or parsed data) into those of `new` (parsed data), ordered so
+    # they can be applied one after another: deepest containers first,
+    # rows from the bottom up. None if the root itself changed type.
+    if type(_container(old)) is not type(new) or not isinstance(new, (dict, list)):
+        return None
+    out = []
+    current = _current(old)
+    if current is None or current != new:
+        _diffRows(old, new, (), out)
+    out.sort(key=lambda c: (-len(c.path), c.path, -c.row, _ORDER[c.kind]))
+    return out
+
+
+# ── catalog versions ──────────────────────────────────────────────────
+# One card between two versions of a catalog. `old` / `new` are its
+# (section index, card index) on each side (None if it isn't there),
+# `fields` the (field, before, after) of what changed in it; details
+# lines show up as "detailsLeft/Quartos".
+#   added, removed, moved (maybe with fields), changed
+CardDiff = namedtuple('CardDiff', 'kind key old new fields')
+CARD_KINDS = ('added', 'removed', 'moved', 'changed')
+
+
+class _Missing:
+    def __repr__(self):
+        return '(missing)'
+
+
+MISSING = _Missing()
+_DETAIL_LABELS = {'detailsLeft': detailsLeft, 'detailsRight': detailsRight}
+
+
+def cardKey(card):
+    # what identifies a card across versions, whatever its position
+    name, image = card.get('name', ''), card.get('imageName', '')
+    if type(name) is not str or type(image) is not str:
+        return str(name), str(image)
+    return name, image
+
+
+def _flatCards(data):
+    # every card dict in order, the section index of each, and each
+    # section's first card
+    cards, sectionOf, firsts = [], array('l'), []
+    sections = data.get('sections') if isinstance(data, dict) else None
+    for si, section in enumerate(sections if isinstance(sections, list) else ()):
+        found = section.get('cards') if isinstance(section, dict) else None
+        firsts.append(len(cards))
+        if isinstance(found, list):
+            if not all(type(c) is dict for c in found):
+                found = [c for c in found if isinstance(c, dict)]
+            cards.extend(found)
+            sectionOf.extend(array('l', [si]) * len(found))
+    return cards, sectionOf, firsts
+
+
+def _fields(card):
+    for key, value in card.items():
+        labels = _DETAIL_LABELS.get(key)
+        if labels is not None and isinstance(value, str):
+            for i, line in enumerate(value.splitlines()):
+                yield f"{key}/{labels[i].rstrip(':') if i < len(labels) else f'[{i}]'}", line
+        else:
+            yield key, value
+
+
+def cardFieldChanges(old, new):
+    # (field, before, after) in the new card's field order, then the
+    # fields it lost
+    before = dict(_fields(old))
+    out = []
+    for field, value in _fields(new):
+        was = before.pop(field, MISSING)
+        if was is MISSING or not sameValue(was, value):
+            out.append((field, was, value))
+    out.extend((field, value, MISSING) for field, value in before.items())
+    return out
+
+
+def _stable(order):
+    # new positions (into `order`, the old ordinal of each matched card in
+    # new order) of a longest increasing run: the cards that kept their
+    # relative order; everything else moved. Patience sorting, O(n log n)
+    tails, tailAt = [], []
+    back = array('l', [-1]) * len(order)
+    for i, x in enumerate(order):
+        k = bisect_left(tails, x)
+        if k == len(tails):
+            tails.append(x)
+            tailAt.append(i)
+        else:
+            tails[k] = x
+            tailAt[k] = i
+        back[i] = tailAt[k - 1] if k else -1
+    keep = bytearray(len(order))
+    i = tailAt[-1] if tailAt else -1
+    while i >= 0:
+        keep[i] = 1
+        i = back[i]
+    return keep
+
+
+def compareCatalogs(old, new):
+    # CardDiffs from one parsed catalog to the next, cards matched on
+    # cardKey (repeated keys pair up in order). The new side's cards come
+    # in order, then the removed ones; unchanged cards aren't listed.
+    # One pass over each side plus the ordering check, nothing is copied.
+    oldCards, oldSection, oldFirsts = _flatCards(old)
+    newCards, newSection, newFirsts = _flatCards(new)
+    oldTitles = [_title(old, si) for si in range(len(oldFirsts))]
+    newTitles = [_title(new, si) for si in range(len(newFirsts))]
+    first, more = {}, {}
+    for i, key in enumerate(map(cardKey, oldCards)):
+        if key in first:
+            more.setdefault(key, []).append(i)
+        else:
+            first[key] = i
+    for rest in more.values():
+        rest.reverse()
+    matched = array('l', [-1]) * len(newCards)
+    order = array('l')
+    for j, key in enumerate(map(cardKey, newCards)):
+        i = first.pop(key, None)
+        if i is None:
+            continue
+        rest = more.get(key)
+        if rest:
+            first[key] = rest.pop()
+        matched[j] = i
+        order.append(i)
+    stable = _stable(order)
+    used = bytearray(len(oldCards))
+    m = 0
+    for j, card in enumerate(newCards):
+        i = matched[j]
+        if i < 0:
+            yield CardDiff('added', cardKey(card), None, _at(newSection, newFirsts, j), [])
+            continue
+        used[i] = 1
+        oldCard = oldCards[i]
+        moved = not stable[m] or oldTitles[oldSection[i]] != newTitles[newSection[j]]
+        m += 1
+        fields = cardFieldChanges(oldCard, card) if oldCard != card else []
+        if moved or fields:
+            yield CardDiff('moved' if moved else 'changed', cardKey(card),
+                           _at(oldSection, oldFirsts, i), _at(newSection, newFirsts, j), fields)
+    for i, card in enumerate(oldCards):
+        if not used[i]:
+            yield CardDiff('removed', cardKey(card), _at(oldSection, oldFirsts, i), None, [])
+
+
+def _title(data, si):
+    section = data['sections'][si]
+    return section.get('title') if isinstance(section, dict) else None
+
+
+def _at(sectionOf, firsts, i):
+    si = sectionOf[i]
+    return si, i - firsts[si]
+
+
+def cardLocation(at):
+    return f'sections[{at[0]}].cards[{at[1]}]' if at is not None else ''
+
+
+def _show(value):
+    return '(missing)' if value is MISSING else json.dumps(value, ensure_ascii=False)
+
+
+def writeReport(diffs, out):
+    # plain-text report, one block per card; returns how many of each kind
+    counts = Counter()
+    marks = {'added': '+', 'removed': '-', 'moved': '>', 'changed': '~'}
+    for d in diffs:
+        counts[d.kind] += 1
+        name, image = d.key
+        where = cardLocation(d.old or d.new) if d.kind != 'moved' else f'{cardLocation(d.old)} -> {cardLocation(d.new)}'
+        out.write(f'{marks[d.kind]} {name!r} ({image})  {where}\n')
+        for field, before, after in d.fields:
+            out.write(f'      {field}: {_show(before)} -> {_show(after)}\n')
+    return counts
+
+
+def writeJsonReport(diffs, out):
+    # the same as JSON Lines, one object per card
+    counts = Counter()
+    for d in diffs:
+        counts[d.kind] += 1
+        entry = {'kind': d.kind, 'name': d.key[0], 'imageName': d.key[1],
+                 'old': cardLocation(d.old) or None, 'new': cardLocation(d.new) or None}
+        if d.fields:
+            entry['fields'] = [dict({'field': field},
+                                    **({} if before is MISSING else {'old': before}),
+                                    **({} if after is MISSING else {'new': after}))
+                               for field, before, after in d.fields]
+        out.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m catalog_diff',
+        description='Report the cards added, removed, moved and changed between two catalog versions.')
+    parser.add_argument('old', help='earlier catalog JSON')
+    parser.add_argument('new', help='later catalog JSON')
+    parser.add_argument('--json', action='store_true', help='write JSON Lines instead of text')
+    parser.add_argument('-o', '--output', help='write the report here instead of stdout')
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    try:
+        old = loadJsonFile(args.old)
+        new = loadJsonFile(args.new)
+    except (OSError, ValueError) as e:
+        parser.exit(2, f'{parser.prog}: {e}\n')
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        counts = (writeJsonReport if args.json else writeReport)(compareCatalogs(old, new), out)
+    finally:
+        if args.output:
+            out.close()
+    summary = ', '.join(f'{counts[kind]} {kind}' for kind in CARD_KINDS)
+    print(f'{summary}, {time.perf_counter() - start:.2f} s', file=sys.stderr)
+    return 1 if sum(counts.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
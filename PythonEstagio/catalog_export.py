@@ -0,0 +1,242 @@
+import os
+import sys
+import gzip
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog_core import loadJsonFile
+from catalog_json import jsonBackend
+
+try:
+    import brotli
+except ImportError:  # gzip variants only
+    brotli = None
+
+EXPORT_VERSION = 1
+# characters of the content hash put in file names
+HASH_CHARS = 16
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+VARIANT_EXTENSIONS = ('.gz', '.br')
+
+# what was written for one JSON document: its name in the output folder,
+# size, sha256 and the size of each compressed variant (None if not made)
+Output = namedtuple('Output', 'file bytes sha256 gzip br')
+
+
+def _writeAtomic(path, data):
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _variants(formats):
+    # (extension, compress) for the formats asked for that can be made here
+    out = []
+    if 'gzip' in formats:
+        out.append(('.gz', lambda b: gzip.compress(b, GZIP_LEVEL, mtime=0)))
+    if 'br' in formats and brotli is not None:
+        out.append(('.br', lambda b: brotli.compress(b, quality=BROTLI_QUALITY)))
+    return out
+
+
+def _writeDocument(folder, names, data, variants):
+    # runs on the pool: zlib, brotli and sha256 let go of the GIL, so
+    # documents are compressed and hashed side by side. Each of `names`
+    # is (base name, hashed), the content hash going before ".json" in
+    # hashed ones; an Output per name
+    start = time.perf_counter()
+    digest = hashlib.sha256(data).hexdigest()
+    files = [f'{base}.{digest[:HASH_CHARS]}.json' if hashed else f'{base}.json' for base, hashed in names]
+    packed = [(ext, compress(data)) for ext, compress in variants]
+    made = {ext for ext, _ in packed}
+    for name in files:
+        _writeAtomic(os.path.join(folder, name), data)
+        for ext, blob in packed:
+            _writeAtomic(os.path.join(folder, name + ext), blob)
+        # an older variant left next to it would no longer match
+        for ext in VARIANT_EXTENSIONS:
+            if ext not in made and os.path.exists(os.path.join(folder, name + ext)):
+                os.remove(os.path.join(folder, name + ext))
+    sizes = {ext: len(blob) for ext, blob in packed}
+    outputs = [Output(name, len(data), digest, sizes.get('.gz'), sizes.get('.br')) for name in files]
+    return outputs, time.perf_counter() - start
+
+
+class ExportReport:
+    # what an export wrote and what it saved over the source file
+    def __init__(self):
+        self.catalog = None         # Output of the whole catalog, hashed
+        self.stable = None          # Output of <name>.json, the file CatalogLoader reads
+        self.sections = []          # (title, cards, Output) when split
+        self.manifest = None
+        self.sourceBytes = None     # the catalog file exported, as it is on disk
+        self.encodeSeconds = 0.0
+        self.workSeconds = 0.0      # compress + hash + write, summed over documents
+        self.seconds = 0.0
+        self.workers = 1
+        self.skipped = []           # formats asked for that couldn't be made
+        self.removed = []           # stale files of the previous export
+
+    def lines(self):
+        def size(n):
+            return f'{n / 1e6:.2f} MB' if n >= 1e5 else f'{n / 1e3:.1f} kB'
+
+        def saving(n, base):
+            return f' ({100 * (1 - n / base):.0f}% smaller)' if base else ''
+
+        c = self.catalog
+        base = self.sourceBytes
+        out = []
+        if base:
+            out.append(f'source          {size(base)}')
+        out.append(f'minified        {size(c.bytes)}{saving(c.bytes, base)}')
+        if c.gzip is not None:
+            out.append(f'gzip            {size(c.gzip)}{saving(c.gzip, base)}')
+        if c.br is not None:
+            out.append(f'brotli          {size(c.br)}{saving(c.br, base)}')
+        if self.sections:
+            first = self.sections[0][2]
+            smallest = min(v for v in (first.br, first.gzip, first.bytes) if v is not None)
+            whole = min(v for v in (c.br, c.gzip, c.bytes) if v is not None)
+            out.append(f'{len(self.sections)} section files; the first shows after {size(smallest)} '
+                       f'instead of {size(whole)}')
+        for fmt in self.skipped:
+            out.append(f'{fmt}: not available here, skipped')
+        threads = f"{self.workers} thread{'s' if self.workers > 1 else ''}"
+        out.append(f'encoded in {self.encodeSeconds:.2f} s; compressed, hashed and written in '
+                   f'{self.seconds - self.encodeSeconds:.2f} s on {threads} '
+                   f'({self.workSeconds:.2f} s of work)')
+        if self.removed:
+            out.append(f'{len(self.removed)} files of the previous export removed')
+        out.append(f'manifest        {self.manifest}')
+        return out
+
+
+def _previousFiles(path):
+    # files named by an earlier manifest, to clean up after this export
+    try:
+        with open(path, encoding='utf-8') as f:
+            old = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if not isinstance(old, dict) or old.get('version') != EXPORT_VERSION:
+        return set()
+    entries = [old.get('catalog')] + list(old.get('sections') or ())
+    names = set()
+    for e in entries:
+        if isinstance(e, dict) and isinstance(e.get('file'), str):
+            names.update(e['file'] + ext for ext in ('',) + VARIANT_EXTENSIONS)
+    return names
+
+
+def exportCatalog(data, folder, name='catalog', split=False, formats=('gzip', 'br'),
+                  workers=None, sourceBytes=None, backend=None):
+    # Write `data` for Unity into `folder`:
+    #   <name>.json                 minified, where CatalogLoader looks today
+    #   <name>.<hash>.json          the same, named by its content
+    #   <name>.s<i>.<hash>.json     with `split`, one file per section
+    #   <name>.index.json           manifest of the above, written last
+    # each with .gz/.br variants for hosts that serve precompressed files
+    start = time.perf_counter()
+    backend = backend or jsonBackend()
+    report = ExportReport()
+    report.sourceBytes = sourceBytes
+    report.skipped = [f for f in formats if f == 'br' and brotli is None]
+    os.makedirs(folder, exist_ok=True)
+    manifestPath = os.path.join(folder, f'{name}.index.json')
+    stale = _previousFiles(manifestPath)
+
+    sections = data.get('sections') if isinstance(data, dict) else None
+    parts = []
+    if split and isinstance(sections, list):
+        parts = [backend.dumpsMinified(s) for s in sections]
+        if list(data) == ['sections']:
+            # the whole catalog is the sections joined, no second encoding
+            whole = b'{"sections":[' + b','.join(parts) + b']}'
+        else:
+            whole = backend.dumpsMinified(data)
+    else:
+        whole = backend.dumpsMinified(data)
+    report.encodeSeconds = time.perf_counter() - start
+
+    variants = _variants(formats)
+    jobs = [([(name, False), (name, True)], whole)]
+    jobs += [([(f'{name}.s{i}', True)], part) for i, part in enumerate(parts)]
+    report.workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    with ThreadPoolExecutor(report.workers) as pool:
+        results = list(pool.map(lambda job: _writeDocument(folder, job[0], job[1], variants), jobs))
+    report.workSeconds = sum(seconds for _, seconds in results)
+    outputs = [output for written, _ in results for output in written]
+    report.stable, report.catalog = outputs[0], outputs[1]
+    for section, output in zip(sections if parts else (), outputs[2:]):
+        title = section.get('title') if isinstance(section, dict) else None
+        cards = section.get('cards') if isinstance(section, dict) else None
+        report.sections.append((title, len(cards) if isinstance(cards, list) else 0, output))
+
+    def entry(output, **extra):
+        return dict(extra, file=output.file, bytes=output.bytes, sha256=output.sha256,
+                    gzip=output.gzip, br=output.br)
+
+    manifest = {
+        'version': EXPORT_VERSION,
+        'catalog': entry(report.catalog),
+        'sections': [entry(output, title=title, cards=cards) for title, cards, output in report.sections],
+    }
+    _writeAtomic(manifestPath, json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8'))
+    report.manifest = os.path.basename(manifestPath)
+    # only once the new manifest is in place, so a reader never follows
+    # it to a missing file
+    keep = {o.file + ext for o in outputs for ext in ('',) + VARIANT_EXTENSIONS}
+    for stale in sorted(stale - keep):
+        try:
+            os.remove(os.path.join(folder, stale))
+            report.removed.append(stale)
+        except OSError:
+            pass
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m catalog_export',
+        description='Write a catalog for Unity: minified, optionally split per section, '
+                    'with precompressed variants and content-hashed names.')
+    parser.add_argument('catalog', help='catalog JSON to export')
+    parser.add_argument('folder', help='output folder (e.g. Assets/StreamingAssets)')
+    parser.add_argument('--name', default='catalog', help='base file name (default: catalog)')
+    parser.add_argument('--split', action='store_true', help='also write one file per section')
+    parser.add_argument('--no-gzip', action='store_true', help="don't write .gz variants")
+    parser.add_argument('--no-brotli', action='store_true', help="don't write .br variants")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='compression threads (default: one per CPU)')
+    args = parser.parse_args(argv)
+    formats = [f for f, off in (('gzip', args.no_gzip), ('br', args.no_brotli)) if not off]
+    try:
+        data = loadJsonFile(args.catalog)
+        report = exportCatalog(data, args.folder, args.name, args.split, formats, args.jobs,
+                               sourceBytes=os.path.getsize(args.catalog))
+    except (OSError, ValueError) as e:
+        parser.exit(2, f'{parser.prog}: {e}\n')
+    for line in report.lines():
+        print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import sys
+import random
+import argparse
+
+from catalog_core import saveJsonAtomic
+
+SECTION_TITLES = ["Novidades", "Catalogo", "Descontos", "Destaques", "Arrendamento", "Luxo"]
+LOCATIONS = ["Lisboa", "Porto", "Viseu", "Coimbra", "Braga", "Faro", "Aveiro", "Évora", "Leiria", "Setúbal"]
+STREETS = ["Rua Direita", "Avenida da Liberdade", "Rua do Comércio", "Largo da Sé", "Rua Formosa", "Avenida Central"]
+TYPES = ["MORADIA", "APARTAMENTO", "TERRENO", "LOJA", "ESCRITORIO"]
+SIZES = ["T0", "T1", "T2", "T3", "T4", "T5"]
+WORDS = ("casa ampla luminosa com vista jardim garagem piscina terraço cozinha equipada "
+         "varanda remodelada centro próximo escola transportes sossegada").split()
+ENERGY = ["A+", "A", "B", "B-", "C", "D", "E", "F"]
+
+
+def generateCard(rng, n):
+    area = rng.randint(40, 600)
+    return {
+        "name": f"Casa {n}",
+        "streetName": f"{rng.choice(STREETS)} {rng.randint(1, 300)}",
+        "location": f"{rng.choice(LOCATIONS)}, Portugal",
+        "price": float(rng.randrange(50000, 1500000, 5000)),
+        "type": rng.choice(TYPES),
+        "size": rng.choice(SIZES),
+        "area": area,
+        "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 30))).capitalize(),
+        "imageName": f"House{rng.randint(1, 60)}",
+        "mapImageName": "mapteste",
+        "detailsLeft": "\n".join(str(v) for v in (
+            area, area + rng.randint(0, 400), rng.randint(0, 6), rng.randint(0, 12),
+            rng.randint(0, 1), rng.randint(0, 2))),
+        "detailsRight": "\n".join(str(v) for v in (
+            area + rng.randint(0, 50), max(area - rng.randint(0, 40), 10), rng.randint(1900, 2025),
+            rng.randint(1, 4), rng.randint(0, 3), rng.choice(ENERGY))),
+        "latitude": round(rng.uniform(37.0, 42.0), 6),
+        "longitude": round(rng.uniform(-9.5, -6.2), 6),
+    }
+
+
+def generateCatalog(cards, sections=None, seed=0):
+    # same schema as teste_catalog.json, deterministic for a given seed;
+    # by default one section per 1000 cards (at least 3)
+    rng = random.Random(seed)
+    if sections is None:
+        sections = max(3, cards // 1000)
+    sections = max(1, min(sections, cards or 1))
+    out, start = [], 0
+    for s in range(sections):
+        count = cards // sections + (s < cards % sections)
+        title = SECTION_TITLES[s % len(SECTION_TITLES)]
+        if s >= len(SECTION_TITLES):
+            title += f" {s // len(SECTION_TITLES) + 1}"
+        out.append({"title": title, "cards": [generateCard(rng, start + i) for i in range(count)]})
+        start += count
+    return {"sections": out}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m catalog_generate',
+        description='Write a synthetic catalog in the editor/Unity schema.')
+    parser.add_argument('cards', type=int, help='number of cards, e.g. 1000 or 1000000')
+    parser.add_argument('output', help='catalog file to write')
+    parser.add_argument('--sections', type=int, help='number of sections (default: one per 1000 cards)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    saveJsonAtomic(args.output, generateCatalog(args.cards, args.sections, args.seed))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import os
+import json
+import tempfile
+
+JOURNAL_SUFFIX = '.journal'
+JOURNAL_VERSION = 1
+# operations appended between two rewrites of the journal
+COMPACT_EVERY = 10000
+
+# One operation per line, rows addressed by their row numbers from the
+# root ("p"), as the tree shows them:
+#   {"o": "set", "p": cell, "v": value}
+#   {"o": "rm", "p": parent, "r": first row, "n": count}
+#   {"o": "copy", "p": parent, "r": row, "from": original, "n": copies}
+#   {"o": "ins", "p": parent, "r": row, "rows": [[key, data], …]}
+#   {"o": "state", "data": whole catalog}
+
+
+def rowPath(node):
+    path = []
+    while node.parent is not None:
+        path.append(node.row)
+        node = node.parent
+    path.reverse()
+    return path
+
+
+def compactOps(ops):
+    # (seq, op) with cell edits dropped when a later edit of the same cell
+    # or the removal of its row makes them moot; only edits no structural
+    # op has moved since are compared, so paths stay comparable. `under`
+    # finds the edited cells below a row without scanning all of them
+    out, lastSet, under = [], {}, {}
+
+    def forget(key):
+        for i in range(len(key)):
+            under[key[:i]].discard(key)
+        return lastSet.pop(key)
+
+    for seq, op in ops:
+        kind = op['o']
+        if kind == 'set':
+            key = tuple(op['p'])
+            if key in lastSet:
+                out[lastSet[key]] = None
+            else:
+                for i in range(len(key)):
+                    under.setdefault(key[:i], set()).add(key)
+            lastSet[key] = len(out)
+        elif kind == 'state':
+            out, lastSet, under = [], {}, {}
+        else:
+            if kind == 'copy':
+                # the copies carry the edits made to their original so far
+                for key in list(under.get(tuple(op['from']), ())):
+                    forget(key)
+            depth = len(op['p'])
+            for key in [k for k in under.get(tuple(op['p']), ()) if k[depth] >= op['r']]:
+                at = forget(key)
+                if kind == 'rm' and key[depth] < op['r'] + op['n']:
+                    out[at] = None
+        out.append((seq, op))
+    return [entry for entry in out if entry is not None]
+
+
+class EditJournal:
+    # Unsaved edits of one catalog file, as JSON Lines next to it: a
+    # header naming the version of the file (mtime, size) they apply to,
+    # then one operation per line. Writes are buffered until flush(), and
+    # a cell edit is held back until something else is recorded, so typing
+    # in a cell makes one line rather than one per keystroke; every
+    # COMPACT_EVERY operations the file is rewritten without the
+    # superseded ones. `seq` numbers operations so a save can keep the ones
+    # made after its snapshot.
+    def __init__(self, catalogPath):
+        self.path = catalogPath + JOURNAL_SUFFIX
+        self.stamp = None
+        self.ops = []
+        self.seq = 0
+        self._file = None
+        self._appended = 0
+        self._pending = None    # the last 'set', not written yet
+
+    def __len__(self):
+        return len(self.ops)
+
+    def start(self, stamp, ops=()):
+        # a new base version; `ops` are (seq, op) still to apply on top
+        self.stamp = stamp
+        self.ops = list(ops)
+        self._rewrite()
+
+    def record(self, op):
+        self.seq += 1
+        if op['o'] == 'set' and self._pending is not None and self._pending['p'] == op['p']:
+            # the same cell again: the edit replaces the held one, under a
+            # new seq so a save made in between still keeps it
+            self.ops[-1] = (self.seq, op)
+            self._pending = op
+            return
+        self._writePending()
+        self.ops.append((self.seq, op))
+        if op['o'] == 'set':
+            self._pending = op
+        else:
+            self._write(op)
+
+    def _writePending(self):
+        if self._pending is not None:
+            op, self._pending = self._pending, None
+            self._write(op)
+
+    def _write(self, op):
+        self._file.write(json.dumps(op, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._appended += 1
+        if self._appended >= COMPACT_EVERY:
+            self.compact()
+
+    def flush(self):
+        if self._file is not None:
+            self._writePending()
+            self._file.flush()
+
+    def compact(self):
+        self.ops = compactOps(self.ops)
+        self._rewrite()
+
+    def since(self, seq):
+        return [(s, op) for s, op in self.ops if s > seq]
+
+    def _rewrite(self):
+        # every op, the held one too, goes into the new file
+        self._pending = None
+        self.close()
+        folder = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(prefix='.journal-', dir=folder)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'journal': JOURNAL_VERSION,
+                                    'stamp': list(self.stamp) if self.stamp else None}) + '\n')
+                for _, op in self.ops:
+                    f.write(json.dumps(op, ensure_ascii=False, separators=(',', ':')) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._appended = 0
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._writePending()
+            finally:
+                self._file.close()
+                self._file = None
+
+    def discard(self):
+        self._pending = None
+        self.close()
+        self.ops = []
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def read(catalogPath):
+        # (stamp, ops) left by an earlier session, None if there's nothing
+        # to recover; a line cut short by a crash ends the journal
+        try:
+            with open(catalogPath + JOURNAL_SUFFIX, encoding='utf-8') as f:
+                lines = f.read().split('\n')
+        except OSError:
+            return None
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return None
+        if not isinstance(header, dict) or header.get('journal') != JOURNAL_VERSION:
+            return None
+        ops = []
+        for line in lines[1:]:
+            if not line:
+                continue
+            try:
+                ops.append(json.loads(line))
+            except ValueError:
+                break
+        stamp = header.get('stamp')
+        return (tuple(stamp) if stamp else None), ops
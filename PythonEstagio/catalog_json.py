@@ -0,0 +1,122 @@
+import os
+import json
+import mmap
+from contextlib import contextmanager
+
+try:
+    import orjson
+except ImportError:  # the stdlib parser/encoder does everything
+    orjson = None
+
+# CATALOG_JSON=json forces the stdlib backend, CATALOG_JSON=orjson asks
+# for orjson (falling back to the stdlib when it isn't installed)
+ENV_BACKEND = 'CATALOG_JSON'
+
+
+def _sameAsStdlib(value):
+    # orjson writes floats outside [1e-4, 1e16) differently from
+    # json.dumps (1e16 vs 1e+16, 0.00001 vs 1e-05) and NaN/Infinity as null
+    t = type(value)
+    if t is float:
+        return value == 0.0 or 1e-4 <= abs(value) < 1e16
+    if t is dict:
+        for v in value.values():
+            t = type(v)
+            if t is str or t is int or v is None:
+                continue
+            if not _sameAsStdlib(v):
+                return False
+        return True
+    if t is list:
+        return all(map(_sameAsStdlib, value))
+    return True
+
+
+class StdlibBackend:
+    name = 'json'
+    # parses a decoded str, so a quiet loadJsonFile reads the file into
+    # one rather than mapping it
+    incremental = True
+
+    def loads(self, buffer):
+        return json.loads(bytes(buffer).decode('utf-8'))
+
+    def dumps(self, value):
+        return json.dumps(value, indent=2, ensure_ascii=False)
+
+    def dumpsMinified(self, value):
+        # UTF-8 bytes without any whitespace
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class OrjsonBackend:
+    # Parses straight from the file's bytes (no decoded str copy) and
+    # encodes with OPT_INDENT_2; whatever orjson can't represent exactly
+    # like the stdlib goes through the stdlib, so files come out the same
+    name = 'orjson'
+    incremental = False
+
+    def loads(self, buffer):
+        try:
+            return orjson.loads(buffer)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity literals, integers past 64 bits, lone
+            # surrogates: the stdlib accepts them (or reports the error)
+            return STDLIB.loads(buffer)
+
+    def dumps(self, value):
+        if not _sameAsStdlib(value):
+            return STDLIB.dumps(value)
+        try:
+            return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode('utf-8')
+        except TypeError:
+            # non-string keys, integers past 64 bits
+            return STDLIB.dumps(value)
+
+    def dumpsMinified(self, value):
+        if not _sameAsStdlib(value):
+            return STDLIB.dumpsMinified(value)
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            return STDLIB.dumpsMinified(value)
+
+
+STDLIB = StdlibBackend()
+BACKENDS = {'json': STDLIB}
+if orjson is not None:
+    BACKENDS['orjson'] = OrjsonBackend()
+
+_backend = None
+
+
+def jsonBackend():
+    global _backend
+    if _backend is None:
+        name = os.environ.get(ENV_BACKEND, '').strip().lower()
+        _backend = BACKENDS.get(name) or BACKENDS.get('orjson', STDLIB)
+    return _backend
+
+
+def setJsonBackend(name):
+    # 'json' or 'orjson'; KeyError if that one isn't available
+    global _backend
+    _backend = BACKENDS[name]
+    return _backend
+
+
+@contextmanager
+def mappedFile(path):
+    # the file's bytes as a read-only buffer, memory-mapped where possible
+    with open(path, 'rb') as f:
+        try:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # empty file, or nothing to map it with
+            yield f.read()
+            return
+        try:
+            with memoryview(m) as view:
+                yield view
+        finally:
+            m.close()
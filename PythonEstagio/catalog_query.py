@@ -0,0 +1,171 @@
+import re
+
+from catalog_core import SearchResult
+from catalog_store import np, NUMERIC_COLUMNS, TEXT_COLUMNS
+
+# Card predicates typed into the search box, all of which must hold:
+#   type=MORADIA price<300000 "Quartos">=3 location~lisboa size!=T0
+# Field names are card fields or detail labels (quoted when they contain
+# spaces), case-insensitive. = and != compare numbers when the field has
+# numbers and the value is one, text (case-insensitive) otherwise; < > <= >=
+# are numeric; ~ is "text contains".
+OPERATORS = ('<=', '>=', '!=', '=', '<', '>', '~')
+_TOKEN = re.compile(r'\s*(?:"([^"]*)"|\'([^\']*)\'|(<=|>=|!=|[=<>~])|((?:[^\s"\'<>=!~]|!(?!=))+))')
+
+_FIELDS = {}
+for _name in NUMERIC_COLUMNS + TEXT_COLUMNS:
+    _FIELDS.setdefault(_name.lower(), _name)
+
+
+class QueryError(ValueError):
+    pass
+
+
+def _tokens(text):
+    # (kind, text) with kind 'op' or 'word'; quoted words keep their spaces
+    pos, out = 0, []
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if m is None or m.end() == pos:
+            raise QueryError(f"can't read {text[pos:]!r}")
+        dq, sq, op, word = m.groups()
+        if op is not None:
+            out.append(('op', op))
+        else:
+            out.append(('word', dq if dq is not None else sq if sq is not None else word))
+        pos = m.end()
+    return out
+
+
+def _number(text):
+    try:
+        return float(text.replace(',', '.'))
+    except ValueError:
+        return None
+
+
+class Term:
+    __slots__ = ('field', 'op', 'value', 'number')
+
+    def __init__(self, field, op, value):
+        self.field = field
+        self.op = op
+        self.value = value
+        self.number = _number(value)
+        numeric = field in NUMERIC_COLUMNS
+        if op in ('<', '>', '<=', '>='):
+            if not numeric:
+                raise QueryError(f"{field} isn't numeric")
+            if self.number is None:
+                raise QueryError(f"{field}{op} needs a number, got {value!r}")
+        elif op in ('=', '!='):
+            if not (numeric and self.number is not None) and field not in TEXT_COLUMNS:
+                raise QueryError(f"{field}{op} needs a number, got {value!r}")
+        elif field not in TEXT_COLUMNS:
+            raise QueryError(f"{field} has no text to search")
+
+    def __repr__(self):
+        return f'{self.field}{self.op}{self.value!r}'
+
+    def mask(self, store):
+        op = self.op
+        if op in ('=', '!=') and self.number is not None and self.field in NUMERIC_COLUMNS:
+            col, v = store.numeric(self.field), self.number
+            if np is not None:
+                # NaN (missing) is never equal, so it does count as !=
+                return col == v if op == '=' else ~(col == v)
+            return [(x == v) == (op == '=') for x in col]
+        if op in ('=', '!=', '~'):
+            want = self.value.lower()
+            values = store.textValues(self.field)
+            if op == '~':
+                match = [i for i, t in enumerate(values) if want in t.lower()]
+            else:
+                match = [i for i, t in enumerate(values) if t.lower() == want]
+            codes = store.codes(self.field)
+            if np is not None:
+                m = np.isin(codes, np.array(match, dtype=np.int32))
+                return ~m if op == '!=' else m
+            match = set(match)
+            return [(c in match) != (op == '!=') for c in codes]
+        col, v = store.numeric(self.field), self.number
+        if np is not None:
+            return {'<': col < v, '>': col > v, '<=': col <= v, '>=': col >= v}[op]
+        test = {'<': v.__gt__, '>': v.__lt__, '<=': v.__ge__, '>=': v.__le__}[op]
+        return [test(x) for x in col]
+
+
+class Query:
+    def __init__(self, terms):
+        self.terms = terms
+
+    def __repr__(self):
+        return ' '.join(map(repr, self.terms))
+
+    def mask(self, store):
+        # per store row: alive and every term holds
+        m = store.alive()
+        for term in self.terms:
+            t = term.mask(store)
+            m = m & t if np is not None else [a and b for a, b in zip(m, t)]
+        return m
+
+    def cardIds(self, store):
+        # search-index ids of the matching cards
+        m = self.mask(store)
+        if np is not None:
+            return np.frombuffer(store.nids, dtype=np.int32)[m]
+        return [n for n, ok in zip(store.nids, m) if ok]
+
+    def result(self, text, index, store):
+        # a SearchResult the proxy can filter with: hit = matching cards,
+        # desc = everything above them
+        ids = self.cardIds(store)
+        result = SearchResult(text, -1, index.version, len(index))
+        result.cards = True
+        result.storeVersion = store.version
+        if np is not None:
+            # written through views of the result's own bitsets
+            hit = np.frombuffer(result.hit, dtype=np.uint8)
+            desc = np.frombuffer(result.desc, dtype=np.uint8)
+            hit[ids] = 1
+            parent = np.frombuffer(index.parent, dtype=np.int32)
+            while len(ids):
+                ids = np.unique(parent[ids])
+                ids = ids[ids >= 0]
+                desc[ids] = 1
+            del hit, desc, parent
+            return result
+        hit, desc, parent = result.hit, result.desc, index.parent
+        for e in ids:
+            hit[e] = 1
+            p = parent[e]
+            while p >= 0 and not desc[p]:
+                desc[p] = 1
+                p = parent[p]
+        return result
+
+
+def parseQuery(text):
+    # Query for `text`, None if it's a plain search (no operators);
+    # QueryError if it's meant as a query but doesn't parse
+    if not any(c in text for c in '<>=~'):
+        return None
+    tokens = _tokens(text)
+    if not any(kind == 'op' for kind, _ in tokens):
+        return None
+    terms = []
+    i = 0
+    while i < len(tokens):
+        if len(tokens) - i < 3:
+            raise QueryError(f"incomplete condition at {tokens[i][1]!r}")
+        (k1, name), (k2, op), (k3, value) = tokens[i:i + 3]
+        if k1 != 'word' or k2 != 'op' or k3 != 'word':
+            raise QueryError(f"expected FIELD OP VALUE at {name!r}")
+        field = _FIELDS.get(name.lower().rstrip(':').strip())
+        if field is None:
+            raise QueryError(f"unknown field {name!r}")
+        terms.append(Term(field, op, value))
+        i += 3
+    return Query(terms)
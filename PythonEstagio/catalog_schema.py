@@ -0,0 +1,207 @@
+from collections import namedtuple
+
+from catalog_core import JsonNode, CARD_FIELDS, detailsLeft, detailsRight, _childRows, _typeName
+
+# What CatalogJson.cs declares and CatalogLoader.cs relies on. Objects list
+# their fields; a field has a type, may be required, a list field may
+# give the schema of its items, and a string may need an exact number of
+# lines (one per label in the details panels).
+_JSON_TYPES = {str: 'string', float: 'number', int: 'integer'}
+
+CARD_SCHEMA = {
+    'type': 'object',
+    'fields': {field: {'type': _JSON_TYPES[ftype]} for field, ftype in CARD_FIELDS.items()},
+}
+CARD_SCHEMA['fields']['name']['required'] = True
+CARD_SCHEMA['fields']['imageName']['required'] = True
+CARD_SCHEMA['fields']['detailsLeft']['lines'] = len(detailsLeft)
+CARD_SCHEMA['fields']['detailsRight']['lines'] = len(detailsRight)
+
+SECTION_SCHEMA = {
+    'type': 'object',
+    'fields': {
+        'title': {'type': 'string', 'required': True},
+        'cards': {'type': 'list', 'required': True, 'items': CARD_SCHEMA},
+    },
+}
+
+CATALOG_SCHEMA = {
+    'type': 'object',
+    'fields': {
+        'sections': {'type': 'list', 'required': True, 'items': SECTION_SCHEMA},
+    },
+}
+
+# Python expressions testing `x`; bool is its own type, so never a number
+_TESTS = {
+    'string': 'type(x) is str',
+    'number': '(type(x) is float or type(x) is int)',
+    'integer': '(type(x) is int or type(x) is float and x.is_integer())',
+    'object': 'type(x) is dict',
+    'list': 'type(x) is list',
+}
+
+
+class _Missing:
+    pass
+
+
+_MISSING = _Missing()
+
+# a compiled object schema: `check(value)` → [(field or None, message)]
+# for the value itself (not what's under it), `children` the compiled
+# schema of the items of each list field
+Level = namedtuple('Level', 'check children')
+
+
+def _compileCheck(spec):
+    # straight-line source with one test per field, so checking a card is
+    # a handful of dict lookups and type() calls
+    src = ['def check(v):',
+           '    if type(v) is not dict:',
+           "        return [(None, 'expected object, got ' + typeName(v))]",
+           '    out = []']
+    for field, f in spec['fields'].items():
+        kind = f['type']
+        src.append(f'    x = v.get({field!r}, MISSING)')
+        src.append('    if x is MISSING:')
+        if f.get('required'):
+            src.append(f'        out.append((None, {"missing " + field!r}))')
+        else:
+            src.append('        pass')
+        src.append(f'    elif not {_TESTS[kind]}:')
+        src.append(f'        out.append(({field!r}, {"expected " + kind + ", got "!r} + '
+                   f'(repr(x) if type(x) is float else typeName(x))))')
+        if 'lines' in f:
+            src.append(f"    elif len(x.splitlines()) != {f['lines']}:")
+            src.append(f"        out.append(({field!r}, str(len(x.splitlines())) + "
+                       f"{' lines, expected ' + str(f['lines'])!r}))")
+    src.append('    return out')
+    namespace = {'MISSING': _MISSING, 'typeName': _typeName}
+    exec(compile('\n'.join(src), f"<schema {'/'.join(spec['fields'])}>", 'exec'), namespace)
+    return namespace['check']
+
+
+def compileSchema(spec):
+    return Level(_compileCheck(spec),
+                 {field: compileSchema(f['items']) for field, f in spec['fields'].items()
+                  if f['type'] == 'list' and 'items' in f})
+
+
+def _shallow(node):
+    # what a node's own checks look at: its scalars, and only the type of
+    # its containers (so a section doesn't rebuild its cards)
+    if node.source is None:
+        return node.value
+    if node.children is None or not isinstance(node.source, dict):
+        return node.source
+    return {k: (v.value if v.source is None else v.source) if isinstance(v, JsonNode) else v
+            for k, v in node.dictItems()}
+
+
+def _fields(index, nid, item):
+    # (row id, key, container or None) under an object, like
+    # catalog_store._rowsUnder
+    if isinstance(item, JsonNode) and item.children is not None:
+        for c in item.children:
+            yield c.nid, c.key, c
+    else:
+        c = nid + 1
+        for key, _, child in _childRows(item):
+            yield c, key, child
+            c = index.end[c]
+
+
+def _items(index, nid, item):
+    # (row id, item) of a list, scalars as their values
+    if isinstance(item, JsonNode) and item.children is not None:
+        for c in item.children:
+            yield c.nid, c if c.source is not None else c.value
+    else:
+        c = nid + 1
+        for _, value, child in _childRows(item):
+            yield c, child if child is not None else value
+            c = index.end[c]
+
+
+class Validator:
+    # a schema compiled once, checked against parsed data or the tree;
+    # problems are keyed by the search-index row id of the object they
+    # belong to (-1 for the root), so they can be updated object by object
+    def __init__(self, spec=CATALOG_SCHEMA):
+        self.root = compileSchema(spec)
+
+    def validate(self, index, item, nid=-1, level=None, isCancelled=None):
+        # {row id: [(field or None, message)]} for `item` (whose own row is
+        # `nid`) and every object under it that has problems
+        out = {}
+        stack = [(level or self.root, nid, item)]
+        n = 0
+        while stack:
+            level, nid, item = stack.pop()
+            problems = level.check(_shallow(item) if isinstance(item, JsonNode) else item)
+            if problems:
+                out[nid] = problems
+            if not level.children or not isinstance(item, (dict, JsonNode)):
+                continue
+            for fnid, key, child in _fields(index, nid, item):
+                sub = level.children.get(key)
+                if sub is None or child is None:
+                    continue
+                if not isinstance(child.source if isinstance(child, JsonNode) else child, list):
+                    continue
+                for inid, value in _items(index, fnid, child):
+                    stack.append((sub, inid, value))
+                    n += 1
+                    if isCancelled and not n & 0xFFFF and isCancelled():
+                        return None
+        return out
+
+    def problems(self, data):
+        # the same checks over parsed data, as "path: message" strings for
+        # the command-line tools
+        out = []
+        stack = [(self.root, '', data)]
+        while stack:
+            level, where, item = stack.pop()
+            for field, message in level.check(item):
+                at = f'{where}.{field}' if where and field else field or where or 'root'
+                out.append(f'{at}: {message}')
+            if not level.children or type(item) is not dict:
+                continue
+            for key, sub in reversed(list(level.children.items())):
+                items = item.get(key)
+                if type(items) is list:
+                    base = f'{where}.{key}' if where else key
+                    stack.extend((sub, f'{base}[{i}]', items[i]) for i in reversed(range(len(items))))
+        return out
+
+    def objectOf(self, node):
+        # (innermost schema object holding `node`: a card, a section or the
+        # root; its compiled level)
+        chain = []
+        while node is not None:
+            chain.append(node)
+            node = node.parent
+        chain.reverse()
+        level, obj = self.root, chain[0]
+        for i in range(1, len(chain) - 1, 2):
+            field, item = chain[i], chain[i + 1]
+            sub = level.children.get(field.key)
+            if sub is None or not isinstance(field.source, list):
+                break
+            level, obj = sub, item
+        return obj, level
+
+    def check(self, node, level):
+        # one object's own problems, however big the branch under it
+        return level.check(_shallow(node))
+
+
+_catalogValidator = Validator()
+
+
+def validateCatalog(data):
+    # problems that would break or silently zero a field in CatalogLoader,
+    # as "path: message" strings
+    return _catalogValidator.problems(data)
@@ -0,0 +1,471 @@
+import re
+import sys
+import gzip
+import json
+import asyncio
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from email.utils import formatdate
+
+from catalog_core import JsonNode, loadJsonFile
+from catalog_json import jsonBackend
+
+SERVE_HOST = '127.0.0.1'
+SERVE_PORT = 8765
+# encodings of untouched subtrees kept between snapshots
+FRAGMENT_CACHE_BYTES = 256 * 1024 * 1024
+# catalog → sections → section: levels assembled from cached pieces
+SPLIT_DEPTH = 2
+# smaller bodies aren't worth compressing
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+SSE_KEEPALIVE_S = 15
+MAX_HEADER_BYTES = 64 * 1024
+
+_ROUTES = [
+    (re.compile(r'/(?:catalog\.json)?'), 'catalog'),
+    (re.compile(r'/sections(?:\.json)?'), 'sections'),
+    (re.compile(r'/sections/(\d+)(?:\.json)?'), 'section'),
+    (re.compile(r'/sections/(\d+)/cards/(\d+)(?:\.json)?'), 'card'),
+    (re.compile(r'/events'), 'events'),
+]
+_REASONS = {200: 'OK', 204: 'No Content', 304: 'Not Modified', 400: 'Bad Request',
+            404: 'Not Found', 405: 'Method Not Allowed', 503: 'Service Unavailable'}
+
+
+def _etag(data):
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+
+def _etagMatches(header, tag):
+    # If-None-Match: "*" or a comma separated list of (maybe weak, W/)
+    # quoted tags, each compared whole with the served one
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(t.strip().removeprefix('W/').strip() == tag for t in header.split(','))
+
+
+class FragmentCache:
+    # Minified encodings of parsed subtrees, by identity of their source
+    # (never mutated, like the save's fragments), least recently used
+    # first out. An expanded branch that was edited is joined from its
+    # children's encodings, so only what changed is encoded again.
+    def __init__(self, maxBytes=FRAGMENT_CACHE_BYTES, backend=None):
+        self.maxBytes = maxBytes
+        self.backend = backend or jsonBackend()
+        self._entries = OrderedDict()   # id(source) → (source, bytes)
+        self.bytes = 0
+
+    def encode(self, item, depth=0):
+        # `depth` is where `item` sits in the catalog, the root being 0
+        # containers above SPLIT_DEPTH are joined from their children's
+        # encodings rather than encoded in one call, which would hold the
+        # GIL (and so the editor) for as long as the whole catalog takes
+        if isinstance(item, JsonNode):
+            if item.source is None:
+                return self.backend.dumpsMinified(item.value)
+            if item.children is not None and item.dirty:
+                return self._join(item.source, item.children if isinstance(item.source, list)
+                                  else item.dictItems(), depth)
+            item = item.source
+        if not isinstance(item, (dict, list)):
+            return self.backend.dumpsMinified(item)
+        if depth < SPLIT_DEPTH:
+            # cheap to join again; caching it would hold the catalog twice
+            return self._join(item, item if isinstance(item, list) else item.items(), depth)
+        entry = self._entries.get(id(item))
+        if entry is not None and entry[0] is item:
+            self._entries.move_to_end(id(item))
+            return entry[1]
+        data = self.backend.dumpsMinified(item)
+        self._store(item, data)
+        return data
+
+    def _join(self, container, items, depth):
+        if isinstance(container, list):
+            return b'[' + b','.join(self.encode(v, depth + 1) for v in items) + b']'
+        dumps = self.backend.dumpsMinified
+        return b'{' + b','.join(dumps(k) + b':' + self.encode(v, depth + 1) for k, v in items) + b'}'
+
+    def _store(self, item, data):
+        old = self._entries.pop(id(item), None)
+        if old is not None:
+            self.bytes -= len(old[1])
+        if len(data) > self.maxBytes:
+            return
+        self._entries[id(item)] = (item, data)
+        self.bytes += len(data)
+        while self.bytes > self.maxBytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+
+
+def _children(item):
+    # (key, child) of a snapshot node or of parsed data
+    if isinstance(item, JsonNode):
+        if item.children is not None:
+            return [(c.key, c) for c in item.children]
+        item = item.source
+    if isinstance(item, dict):
+        return list(item.items())
+    if isinstance(item, list):
+        return [(f'[{i}]', v) for i, v in enumerate(item)]
+    return []
+
+
+def _child(item, key):
+    if isinstance(item, JsonNode) and item.children is None:
+        item = item.source
+    if isinstance(item, dict):
+        return item.get(key)
+    if isinstance(item, list):
+        return item[key] if isinstance(key, int) and 0 <= key < len(item) else None
+    if isinstance(item, JsonNode):
+        if isinstance(key, int):
+            return item.children[key] if 0 <= key < len(item.children) else None
+        return next((c for c in item.children if c.key == key), None)
+    return None
+
+
+def snapshotTree(node, parent=None, row=0):
+    # what a Snapshot needs of the editor's tree: the edited branches
+    # copied, untouched ones cut down to their parsed source, so
+    # publishing costs what was edited rather than what was expanded
+    c = JsonNode(node.key, node.value, node.source, parent, row)
+    c.vtype = node.vtype
+    if node.children is not None and node.dirty:
+        c.dirty = True
+        c.children = [snapshotTree(ch, c, i) for i, ch in enumerate(node.children)]
+    return c
+
+
+class Body:
+    # an encoded document with its ETag; the gzip variant is made on
+    # first request
+    __slots__ = ('data', 'etag', '_gzipped')
+
+    def __init__(self, data):
+        self.data = data
+        self.etag = _etag(data)
+        self._gzipped = None
+
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.data, GZIP_LEVEL, mtime=0)
+        return self._gzipped
+
+
+class Snapshot:
+    # One published version of the catalog, as parsed data or a
+    # snapshotTree() of the editor's. Documents are encoded on demand
+    # and kept for as long as the version is the current one.
+    def __init__(self, root, version, cache):
+        self.root = root
+        self.version = version
+        self.cache = cache
+        self._bodies = {}
+        self._sections = None
+
+    def sections(self):
+        if self._sections is None:
+            top = _child(self.root, 'sections')
+            self._sections = [node for _, node in _children(top)] if top is not None else []
+        return self._sections
+
+    def _body(self, key, make):
+        body = self._bodies.get(key)
+        if body is None:
+            body = self._bodies[key] = Body(make())
+        return body
+
+    def catalog(self):
+        return self._body('catalog', lambda: self.cache.encode(self.root))
+
+    def section(self, i):
+        sections = self.sections()
+        if not 0 <= i < len(sections):
+            return None
+        return self._body(('section', i), lambda: self.cache.encode(sections[i], SPLIT_DEPTH))
+
+    def card(self, i, j):
+        sections = self.sections()
+        if not 0 <= i < len(sections):
+            return None
+        cards = _child(sections[i], 'cards')
+        card = _child(cards, j) if cards is not None else None
+        if card is None:
+            return None
+        return self._body(('card', i, j), lambda: self.cache.encode(card, SPLIT_DEPTH + 2))
+
+    def index(self):
+        # what there is to fetch, with each section's ETag
+        def make():
+            out = []
+            for i, node in enumerate(self.sections()):
+                title = _child(node, 'title')
+                if isinstance(title, JsonNode):
+                    title = title.value
+                cards = _child(node, 'cards')
+                out.append({'title': title, 'cards': len(_children(cards)) if cards is not None else 0,
+                            'etag': self.section(i).etag})
+            return json.dumps({'version': self.version, 'etag': self.catalog().etag, 'sections': out},
+                              ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return self._body('index', make)
+
+
+class CatalogServer:
+    # The open catalog over HTTP on localhost, for the WebGL visit to load
+    # instead of StreamingAssets:
+    #   GET /catalog.json                   the whole catalog
+    #   GET /sections.json                  titles, card counts, ETags
+    #   GET /sections/<i>.json              one section
+    #   GET /sections/<i>/cards/<j>.json    one card
+    #   GET /events                         server-sent "catalog" events
+    # Responses carry ETags (a matching If-None-Match gets a 304) and are
+    # gzipped when the client takes it. Everything runs on an asyncio loop
+    # in its own thread; publish() is the only call made from outside.
+    def __init__(self, host=SERVE_HOST, port=SERVE_PORT, cache=None):
+        self.host = host
+        self.port = port
+        self.cache = cache or FragmentCache()
+        self.snapshot = None
+        self.requests = 0
+        self.notModified = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._listeners = set()
+        self._connections = set()
+        self._ready = threading.Event()
+        self._error = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}/'
+
+    def start(self):
+        # returns once listening; OSError if the port can't be bound
+        self._thread = threading.Thread(target=self._run, name='catalog-server', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            raise self._error
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+    def publish(self, root, version):
+        # a new version of the tree (a clone the caller won't touch again)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._publish, root, version)
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self._server = loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            loop.close()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            for listener in list(self._listeners):
+                listener.put_nowait(None)
+            # dropped connections end their handlers, which then finish
+            for writer in list(self._connections):
+                writer.transport.abort()
+            tasks = asyncio.all_tasks(loop)
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+
+    def _publish(self, root, version):
+        previous = self.snapshot
+        self.snapshot = snapshot = Snapshot(root, version, self.cache)
+        if not self._listeners:
+            return
+        # sections whose encoding changed, found from the cached fragments
+        changed = [i for i in range(len(snapshot.sections()))
+                   if previous is None or i >= len(previous.sections())
+                   or previous.section(i).etag != snapshot.section(i).etag]
+        if previous is not None and len(previous.sections()) > len(snapshot.sections()):
+            changed.extend(range(len(snapshot.sections()), len(previous.sections())))
+        event = json.dumps({'version': version, 'etag': snapshot.catalog().etag,
+                            'sections': changed, 'count': len(snapshot.sections())})
+        for listener in self._listeners:
+            listener.put_nowait(event)
+
+    async def _handle(self, reader, writer):
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                if len(head) > MAX_HEADER_BYTES:
+                    return
+                lines = head.decode('latin-1').split('\r\n')
+                parts = lines[0].split()
+                if len(parts) != 3:
+                    await self._send(writer, 400, b'', close=True)
+                    return
+                method, target, version = parts
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(':')
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get('connection', '').lower()
+                keepAlive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                self.requests += 1
+                if not await self._respond(writer, method, target.split('?', 1)[0], headers, keepAlive):
+                    return
+                if not keepAlive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _respond(self, writer, method, path, headers, keepAlive):
+        # False when the connection is done with
+        if method == 'OPTIONS':
+            await self._send(writer, 204, b'', extra={
+                'Access-Control-Allow-Methods': 'GET, HEAD',
+                'Access-Control-Allow-Headers': 'If-None-Match',
+                'Access-Control-Max-Age': '86400'}, close=not keepAlive)
+            return True
+        if method not in ('GET', 'HEAD'):
+            await self._send(writer, 405, b'', extra={'Allow': 'GET, HEAD, OPTIONS'}, close=not keepAlive)
+            return True
+        for pattern, kind in _ROUTES:
+            match = pattern.fullmatch(path)
+            if match:
+                break
+        else:
+            await self._send(writer, 404, b'', close=not keepAlive)
+            return True
+        if kind == 'events':
+            await self._events(writer)
+            return False
+        snapshot = self.snapshot
+        if snapshot is None:
+            await self._send(writer, 503, b'', extra={'Retry-After': '1'}, close=not keepAlive)
+            return True
+        if kind == 'catalog':
+            body = snapshot.catalog()
+        elif kind == 'sections':
+            body = snapshot.index()
+        elif kind == 'section':
+            body = snapshot.section(int(match.group(1)))
+        else:
+            body = snapshot.card(int(match.group(1)), int(match.group(2)))
+        if body is None:
+            await self._send(writer, 404, b'', close=not keepAlive)
+            return True
+        zipped = len(body.data) >= GZIP_MIN_BYTES and 'gzip' in headers.get('accept-encoding', '')
+        # the gzipped bytes are another representation, so another tag
+        tag = f'"{body.etag}-gz"' if zipped else f'"{body.etag}"'
+        extra = {'ETag': tag, 'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache',
+                 'Content-Type': 'application/json; charset=utf-8'}
+        if _etagMatches(headers.get('if-none-match'), tag):
+            self.notModified += 1
+            await self._send(writer, 304, b'', extra=extra, close=not keepAlive)
+            return True
+        data = body.data
+        if zipped:
+            data = body.gzipped()
+            extra['Content-Encoding'] = 'gzip'
+        await self._send(writer, 200, data, extra=extra, close=not keepAlive, head=method == 'HEAD')
+        return True
+
+    async def _send(self, writer, status, data, extra=None, close=False, head=False):
+        lines = [f'HTTP/1.1 {status} {_REASONS[status]}',
+                 f'Date: {formatdate(usegmt=True)}',
+                 'Access-Control-Allow-Origin: *',
+                 'Access-Control-Expose-Headers: ETag',
+                 f'Content-Length: {len(data)}']
+        lines += [f'{k}: {v}' for k, v in (extra or {}).items()]
+        if close:
+            lines.append('Connection: close')
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if data and not head and status != 304:
+            writer.write(data)
+        await writer.drain()
+
+    async def _events(self, writer):
+        # a "catalog" event per published version (which sections changed);
+        # comments keep idle proxies from closing the stream
+        queue = asyncio.Queue()
+        self._listeners.add(queue)
+        try:
+            writer.write(('HTTP/1.1 200 OK\r\n'
+                          'Content-Type: text/event-stream\r\n'
+                          'Cache-Control: no-cache\r\n'
+                          'Access-Control-Allow-Origin: *\r\n'
+                          'Connection: keep-alive\r\n\r\n').encode('latin-1'))
+            if self.snapshot is not None:
+                writer.write(f'event: hello\ndata: {json.dumps({"version": self.snapshot.version})}\n\n'.encode())
+            await writer.drain()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    writer.write(b': keep-alive\n\n')
+                else:
+                    if event is None:
+                        return
+                    writer.write(f'event: catalog\ndata: {event}\n\n'.encode('utf-8'))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._listeners.discard(queue)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m catalog_server',
+        description='Serve a catalog file over HTTP for the WebGL build, with ETags and gzip.')
+    parser.add_argument('catalog', help='catalog JSON to serve')
+    parser.add_argument('--host', default=SERVE_HOST, help=f'address to listen on (default: {SERVE_HOST})')
+    parser.add_argument('--port', type=int, default=SERVE_PORT, help=f'port (default: {SERVE_PORT})')
+    args = parser.parse_args(argv)
+    try:
+        data = loadJsonFile(args.catalog)
+        server = CatalogServer(args.host, args.port).start()
+    except (OSError, ValueError) as e:
+        parser.exit(2, f'{parser.prog}: {e}\n')
+    server.publish(data, 1)
+    print(f'serving {args.catalog} at {server.url}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from collections import deque
+
+# CATALOG_STATS=1 turns the timers on from startup, CATALOG_STATS=<file>
+# also streams every event to that file as JSON lines.
+# CATALOG_PROFILE=cprofile[:<file>] or tracemalloc[:<file>] profiles the
+# whole session and writes the result when the process exits.
+ENV_STATS = 'CATALOG_STATS'
+ENV_PROFILE = 'CATALOG_PROFILE'
+MAX_EVENTS = 10000
+
+IMPORT_TIME = time.time()
+
+
+def processStartTime():
+    # wall-clock start of this process; falls back to when this module was
+    # first imported where /proc isn't available
+    try:
+        with open('/proc/self/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return IMPORT_TIME
+
+
+class _NoTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+class _Timer:
+    __slots__ = ('stats', 'name', 'info', 'start')
+
+    def __init__(self, stats, name, info):
+        self.stats = stats
+        self.name = name
+        self.info = info
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        # cancelled / failed runs aren't timings of the operation
+        if excType is None:
+            self.stats.record(self.name, time.perf_counter() - self.start, **self.info)
+        return False
+
+
+class Stats:
+    # Opt-in timers and counters for the editor's hot paths. While disabled
+    # every hook costs one attribute check; timers may be recorded from
+    # worker threads, counters only from the GUI thread.
+    def __init__(self):
+        self.enabled = False
+        self.timers = {}     # name → [count, total, max, last]
+        self.counters = {}
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.startup = None
+        self._lock = threading.Lock()
+        self._log = None
+
+    def enable(self, logPath=None):
+        if logPath and self._log is None:
+            self._log = open(logPath, 'a', encoding='utf-8', buffering=1)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.events.clear()
+
+    def timer(self, name, **info):
+        return _Timer(self, name, info) if self.enabled else _NO_TIMER
+
+    def record(self, name, seconds, **info):
+        if not self.enabled:
+            return
+        event = {'time': time.time(), 'kind': 'timer', 'name': name, 'seconds': seconds}
+        event.update(info)
+        with self._lock:
+            t = self.timers.get(name)
+            if t is None:
+                t = self.timers[name] = [0, 0.0, 0.0, 0.0]
+            t[0] += 1
+            t[1] += seconds
+            t[2] = max(t[2], seconds)
+            t[3] = seconds
+            self.events.append(event)
+            if self._log is not None:
+                self._log.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def markStartup(self):
+        # called once the first window is up
+        self.startup = time.time() - processStartTime()
+        self.record('startup', self.startup)
+
+    def snapshot(self):
+        # (name, count, total s, max s, last s) rows, timers then counters
+        with self._lock:
+            rows = [(name, t[0], t[1], t[2], t[3]) for name, t in sorted(self.timers.items())]
+        rows += [(name, n, None, None, None) for name, n in sorted(self.counters.items())]
+        return rows
+
+    def export(self, path):
+        # every recorded event, then one summary line per timer and counter
+        with self._lock:
+            events = list(self.events)
+            timers = {name: list(t) for name, t in self.timers.items()}
+        with open(path, 'w', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + '\n')
+            for name, (n, total, longest, last) in sorted(timers.items()):
+                f.write(json.dumps({'kind': 'summary', 'name': name, 'count': n, 'total': total,
+                                    'max': longest, 'last': last}) + '\n')
+            for name, n in sorted(self.counters.items()):
+                f.write(json.dumps({'kind': 'counter', 'name': name, 'count': n}) + '\n')
+
+
+stats = Stats()
+
+
+def startProfiling(spec):
+    # "cprofile[:file]" or "tracemalloc[:file]"; cProfile only sees the GUI
+    # thread, load/save/search workers show up in the stats timers instead
+    mode, _, path = spec.partition(':')
+    mode = mode.strip().lower()
+    if mode == 'cprofile':
+        import cProfile
+        path = path or f'catalog_profile_{os.getpid()}.prof'
+        profiler = cProfile.Profile()
+
+        def dump():
+            profiler.disable()
+            profiler.dump_stats(path)
+            sys.stderr.write(f'cProfile written to {os.path.abspath(path)}\n')
+        profiler.enable()
+    elif mode == 'tracemalloc':
+        import tracemalloc
+        path = path or f'catalog_memory_{os.getpid()}.txt'
+        tracemalloc.start(25)
+
+        def dump():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f'current {current / (1 << 20):.1f} MB, peak {peak / (1 << 20):.1f} MB\n\n')
+                for stat in snapshot.statistics('traceback')[:50]:
+                    f.write(f'{stat.size / 1024:.1f} KiB in {stat.count} blocks\n')
+                    f.write('\n'.join(stat.traceback.format(limit=10)) + '\n\n')
+            sys.stderr.write(f'tracemalloc report written to {os.path.abspath(path)}\n')
+    else:
+        sys.stderr.write(f'{ENV_PROFILE}: unknown profiler {mode!r} (use cprofile or tracemalloc)\n')
+        return False
+    atexit.register(dump)
+    return True
+
+
+def configureFromEnvironment(environ=os.environ):
+    value = environ.get(ENV_STATS, '').strip()
+    if value and value.lower() not in ('0', 'false', 'no', 'off'):
+        stats.enable(None if value.lower() in ('1', 'true', 'yes', 'on') else value)
+    spec = environ.get(ENV_PROFILE, '').strip()
+    if spec:
+        startProfiling(spec)
@@ -0,0 +1,248 @@
+import sys
+from array import array
+from bisect import bisect_left
+
+from catalog_core import JsonNode, LoadCancelled, detailsLeft, detailsRight, _childRows
+
+try:
+    import numpy as np
+except ImportError:  # columns stay plain arrays; queries/stats loop in Python
+    np = None
+
+# detail lines are stored under their label, without the trailing ':'
+DETAIL_COLUMNS = ([('detailsLeft', i, l.rstrip(':')) for i, l in enumerate(detailsLeft)]
+                  + [('detailsRight', i, l.rstrip(':')) for i, l in enumerate(detailsRight)])
+DETAIL_NAMES = [name for _, _, name in DETAIL_COLUMNS]
+
+NUMERIC_FIELDS = ['price', 'area', 'latitude', 'longitude']
+TEXT_FIELDS = ['name', 'streetName', 'location', 'type', 'size', 'description',
+               'imageName', 'mapImageName', 'scanImageName', 'modelPrefabName']
+# detail lines are mostly numbers ("Quartos"), some aren't
+# ("Eficiência Energética"), so they get both a numeric and a text column
+NUMERIC_COLUMNS = NUMERIC_FIELDS + DETAIL_NAMES
+TEXT_COLUMNS = TEXT_FIELDS + DETAIL_NAMES
+
+NAN = float('nan')
+
+
+def toNumber(value):
+    if value is None or isinstance(value, bool):
+        return NAN
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().replace(',', '.'))
+    except ValueError:
+        return NAN
+
+
+def _lines(value):
+    if isinstance(value, str):
+        return value.splitlines()
+    return value if isinstance(value, list) else ()
+
+
+def _rowsUnder(index, nid, item):
+    # (search-index row id, key, child) for the rows under `item`, whose own
+    # row is `nid`; expanded nodes know their children's ids, unexpanded
+    # branches were indexed as one contiguous pre-order run
+    if isinstance(item, JsonNode) and item.children is not None:
+        for c in item.children:
+            yield c.nid, c.key, c
+    else:
+        c = nid + 1
+        for key, _, child in _childRows(item):
+            yield c, key, child
+            c = index.end[c]
+
+
+def _cardsOf(index, sectionNid, section):
+    for cardsNid, key, cards in _rowsUnder(index, sectionNid, section):
+        if key == 'cards' and cards is not None:
+            for cardNid, _, card in _rowsUnder(index, cardsNid, cards):
+                if card is not None:
+                    yield sectionNid, cardNid, card
+
+
+def isCardsNode(node):
+    # root → "sections" → [s] → "cards"
+    s = node.parent.parent if node.parent is not None else None
+    return (node.key == 'cards' and s is not None and s.key == 'sections'
+            and s.parent is not None and s.parent.parent is None)
+
+
+def isSectionsNode(node):
+    return node.key == 'sections' and node.parent is not None and node.parent.parent is None
+
+
+class _TextColumn:
+    # interned strings as int codes into `values`; -1 is missing
+    __slots__ = ('codes', 'values', 'lookup')
+
+    def __init__(self):
+        self.codes = array('i')
+        self.values = []
+        self.lookup = {}
+
+    def code(self, value):
+        if value is None:
+            return -1
+        value = str(value)
+        c = self.lookup.get(value)
+        if c is None:
+            c = self.lookup[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return c
+
+    def extend(self, values):
+        lookup, code = self.lookup, self.code
+        self.codes.extend([lookup[v] if v in lookup else code(v) for v in values])
+
+
+class CardStore:
+    # Every card of the catalog as one row of typed columns, next to the
+    # tree: numbers in float64 arrays (NaN when missing or not numeric),
+    # strings interned into int32 codes. `nids` maps a row to the card's
+    # search-index id (what the proxy filters on, and JsonNode.nid once the
+    # card is expanded) and `sectionNids` to its section's; rows are
+    # appended in nid order, so nid → row is a bisect. Deleted cards stay
+    # in the columns and are masked through the index's `dead` flags.
+    def __init__(self, index, root, isCancelled=None):
+        self.index = index
+        self.nids = array('i')
+        self.sectionNids = array('i')
+        self.numbers = {name: array('d') for name in NUMERIC_COLUMNS}
+        self.texts = {name: _TextColumn() for name in TEXT_COLUMNS}
+        self.version = 0
+        # callables (kind, row): 'appended' with the first new row,
+        # 'updating' / 'updated' around a row rewrite, 'invalidated'
+        # (row None) after deletes
+        self.watchers = []
+        self._isCancelled = isCancelled
+        for nid, key, sections in _rowsUnder(index, -1, root):
+            if key == 'sections' and sections is not None:
+                found = [c for sNid, _, section in _rowsUnder(index, nid, sections)
+                         if section is not None
+                         for c in _cardsOf(index, sNid, section)]
+                # cards duplicated before the store was built sit in later
+                # index segments
+                found.sort(key=lambda c: c[1])
+                self._appendCards(found)
+        self._isCancelled = None
+
+    def __len__(self):
+        return len(self.nids)
+
+    def _step(self):
+        if self._isCancelled and self._isCancelled():
+            raise LoadCancelled()
+
+    def _notify(self, kind, row):
+        for watcher in self.watchers:
+            watcher(kind, row)
+
+    def _appendCards(self, found):
+        # found: (section nid, card nid, card JsonNode or dict)
+        if not found:
+            return
+        start = len(self.nids)
+        cards = [c.toData() if isinstance(c, JsonNode) else c for _, _, c in found]
+        cards = [c if isinstance(c, dict) else {} for c in cards]
+        self.sectionNids.extend([s for s, _, _ in found])
+        self.nids.extend([n for _, n, _ in found])
+        for name in NUMERIC_FIELDS:
+            self._step()
+            self.numbers[name].extend([v if type(v) is float else toNumber(v)
+                                       for v in [c.get(name) for c in cards]])
+        for name in TEXT_FIELDS:
+            self._step()
+            self.texts[name].extend([c.get(name) for c in cards])
+        for field in ('detailsLeft', 'detailsRight'):
+            lines = [_lines(c.get(field)) for c in cards]
+            for f, i, name in DETAIL_COLUMNS:
+                if f != field:
+                    continue
+                self._step()
+                text = self.texts[name]
+                first = len(text.codes)
+                text.extend([l[i] if i < len(l) else None for l in lines])
+                # detail lines repeat a lot: convert each distinct one once
+                asNumber = [toNumber(v) for v in text.values] + [NAN]
+                self.numbers[name].extend([asNumber[c] for c in text.codes[first:]])
+        self.version += 1
+        self._notify('appended', start)
+
+    # ── keeping in sync with the model ────────────────────────────────
+    def appendNodes(self, parentNode, nodes):
+        # nodes were just inserted under parentNode (and indexed)
+        index = self.index
+        if isCardsNode(parentNode):
+            sNid = parentNode.parent.nid
+            self._appendCards([(sNid, n.nid, n) for n in nodes if n.isContainer()])
+        elif isSectionsNode(parentNode):
+            self._appendCards([c for n in nodes if n.isContainer()
+                               for c in _cardsOf(index, n.nid, n)])
+
+    def invalidate(self):
+        # cards were deleted (the index's dead flags already say which)
+        self.version += 1
+        self._notify('invalidated', None)
+
+    def rowOf(self, nid):
+        if nid is None:
+            return None
+        r = bisect_left(self.nids, nid)
+        return r if r < len(self.nids) and self.nids[r] == nid else None
+
+    def updateCard(self, card):
+        # a cell of this card node was edited or removed; the row is
+        # re-read from what the card would save as (removing one detail
+        # line shifts the ones after it)
+        row = self.rowOf(card.nid)
+        if row is None:
+            return
+        data = card.toData()
+        if not isinstance(data, dict):
+            data = {}
+        self._notify('updating', row)
+        for name in NUMERIC_FIELDS:
+            self.numbers[name][row] = toNumber(data.get(name))
+        for name in TEXT_FIELDS:
+            self.texts[name].codes[row] = self.texts[name].code(data.get(name))
+        for field in ('detailsLeft', 'detailsRight'):
+            lines = _lines(data.get(field))
+            for f, i, name in DETAIL_COLUMNS:
+                if f == field:
+                    value = lines[i] if i < len(lines) else None
+                    self.numbers[name][row] = toNumber(value)
+                    self.texts[name].codes[row] = self.texts[name].code(value)
+        self.version += 1
+        self._notify('updated', row)
+
+    # ── reading ───────────────────────────────────────────────────────
+    def alive(self):
+        # per row: the card hasn't been deleted
+        dead = self.index.dead
+        if np is not None:
+            ids = np.frombuffer(self.nids, dtype=np.int32)
+            return np.frombuffer(dead, dtype=np.uint8)[ids] == 0
+        return [not dead[n] for n in self.nids]
+
+    def numeric(self, name):
+        # a copy: array buffers can't grow while numpy views them
+        col = self.numbers[name]
+        return np.array(col, dtype=np.float64) if np is not None else array('d', col)
+
+    def codes(self, name):
+        col = self.texts[name].codes
+        return np.array(col, dtype=np.int32) if np is not None else array('i', col)
+
+    def textValues(self, name):
+        return self.texts[name].values
+
+    def text(self, name, row):
+        c = self.texts[name].codes[row]
+        return self.texts[name].values[c] if c >= 0 else None
+
+    def number(self, name, row):
+        return self.numbers[name][row]
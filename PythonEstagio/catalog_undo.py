@@ -0,0 +1,135 @@
+from collections import deque
+from contextlib import contextmanager
+
+# steps kept, and rows the branches they took out may hold, before the
+# oldest ones are forgotten
+UNDO_LIMIT = 1000
+UNDO_MAX_ROWS = 2000000
+
+
+class Step:
+    # one undoable action: the operations that revert it, in the order
+    # they were recorded (applied last to first), and how many rows of
+    # removed branches they keep alive
+    __slots__ = ('text', 'ops', 'rows')
+
+    def __init__(self, text):
+        self.text = text
+        self.ops = []
+        self.rows = 0
+
+
+class UndoHistory:
+    # Undo and redo stacks of inverse operations, in catalog_journal's
+    # format addressed by row paths, plus "put", which gives removed nodes
+    # back to their parent: the very objects, so a deleted section costs
+    # no copy and comes back as one batch. Undoing a step records its own
+    # inverse as the step to redo. Consecutive edits of one cell are one
+    # step, as typing in the value line makes one edit per keystroke.
+    def __init__(self, limit=UNDO_LIMIT, maxRows=UNDO_MAX_ROWS):
+        self.limit = limit
+        self.maxRows = maxRows
+        self.undoSteps = deque()
+        self.redoSteps = deque()
+        self.rows = 0
+        self._group = None
+        self._depth = 0
+        self._last = None
+
+    def clear(self):
+        self.undoSteps.clear()
+        self.redoSteps.clear()
+        self.rows = 0
+        self._last = None
+        if self._group is not None:
+            self._group.ops.clear()
+            self._group.rows = 0
+
+    def canUndo(self):
+        return bool(self.undoSteps)
+
+    def canRedo(self):
+        return bool(self.redoSteps)
+
+    def undoText(self):
+        return self.undoSteps[-1].text if self.undoSteps else ''
+
+    def redoText(self):
+        return self.redoSteps[-1].text if self.redoSteps else ''
+
+    @contextmanager
+    def group(self, text):
+        # everything recorded inside is one step; nested groups join the
+        # outer one
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        self._group, self._depth = Step(text), 1
+        try:
+            yield
+        finally:
+            step, self._group, self._depth = self._group, None, 0
+            if step.ops:
+                self._dropRedo()
+                self._push(self.undoSteps, step)
+
+    def record(self, text, op, rows=1):
+        if self._group is not None:
+            self._group.ops.append(op)
+            self._group.rows += rows
+            return
+        top = self.undoSteps[-1] if self.undoSteps else None
+        if (op['o'] == 'set' and top is not None and top is self._last and len(top.ops) == 1
+                and top.ops[0]['o'] == 'set' and top.ops[0]['p'] == op['p']):
+            # the cell's value before the first of the edits is kept
+            self._dropRedo()
+            return
+        self._dropRedo()
+        step = Step(text)
+        step.ops.append(op)
+        step.rows = rows
+        self._push(self.undoSteps, step)
+        self._last = step
+
+    def undo(self, apply):
+        # `apply(op)` performs one operation, recording its inverse here
+        return self._revert(self.undoSteps, self.redoSteps, apply)
+
+    def redo(self, apply):
+        return self._revert(self.redoSteps, self.undoSteps, apply)
+
+    def _revert(self, source, target, apply):
+        if not source:
+            return None
+        step = source.pop()
+        self.rows -= step.rows
+        self._last = None
+        self._group, self._depth = Step(step.text), 1
+        try:
+            for op in reversed(step.ops):
+                apply(op)
+        finally:
+            inverse, self._group, self._depth = self._group, None, 0
+            self._push(target, inverse)
+        return step
+
+    def _dropRedo(self):
+        for step in self.redoSteps:
+            self.rows -= step.rows
+        self.redoSteps.clear()
+
+    def _push(self, steps, step):
+        steps.append(step)
+        self.rows += step.rows
+        # the oldest steps go first; the one just pushed stays
+        while len(self.undoSteps) > self.limit or self.rows > self.maxRows:
+            for oldest in (self.undoSteps, self.redoSteps):
+                if oldest and oldest[0] is not step:
+                    self.rows -= oldest.popleft().rows
+                    break
+            else:
+                break
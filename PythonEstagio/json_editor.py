@@ -1,654 +1,2921 @@
-import sys
-import json
-import ast
-from PyQt5 import QtWidgets, QtGui, QtCore
-from PyQt5.QtWidgets import QStyledItemDelegate
-
-# === Custom labels ===
-detailsLeft = [
-    "Area Bruta Privativa:",
-    "Area Total do Lote:",
-    "Quartos:",
-    "Piso:",
-    "Elevador:",
-    "Carr. Carros Eletricos:"
-]
-detailsRight = [
-    "Area Bruta:",
-    "Area Util:",
-    "Ano de Construção:",
-    "Casas de Banho:",
-    "Estacionamento:",
-    "Eficiência Energética:"
-]
-# ========================
-
-# Light and Dark style sheets
-light_qss = """
-/* Base font & off-white background */
-* { font-family: 'Roboto', sans-serif; }
-QMainWindow { background-color: #F9F9F9; }
-
-/* Toolbar flat, ghost buttons */
-QToolBar { background-color: #FFFFFF; spacing: 8px; padding: 4px; min-height: 36px; border-bottom: 1px solid #DDD; }
-QToolBar QToolButton, QToolBar QLineEdit, QToolBar QPushButton { font-size: 15px; font-weight: 400; }
-QToolBar QToolButton { background: transparent; }
-QToolBar QToolButton:hover { background-color: rgba(0,150,136,0.1); }
-
-/* Accent color */
-:selection, QTreeView::item:selected { background-color: #009688; color: #FFFFFF; }
-
-/* Tree view typography, spacing & separators */
-QTreeView {
-  background-color: #FFFFFF;
-  alternate-background-color: #F9F9F9;
-  font-size: 15px;
-  font-weight: 300;
-  show-decoration-selected: 1;
-}
-QTreeView::item {
-  padding: 6px 8px;
-  border-bottom: 1px solid #E0E0E0;
-}
-QTreeView::item:hover {
-  background-color: rgba(0, 0, 0, 0.05);
-}
-/* — Header Row (Light) — */
-QHeaderView {
-  background: transparent;
-}
-QHeaderView::section {
-  background-color: #E0E0E0;
-  padding: 6px 12px;
-  border: none;
-  font-size: 15px;
-  font-weight: 500;
-  /* round only the top corners of the entire header */
-  border-top-left-radius: 8px;
-  border-top-right-radius: 8px;
-}
-
-
-/* Inputs & buttons */
-QLineEdit, QToolButton, QGroupBox, QPushButton { background-color: #FFFFFF; color: #000000; font-size: 14px; font-weight: 400; }
-QLineEdit { border: 1px solid #CCC; border-radius: 4px; padding: 4px; }
-
-/* — Light Mode: scrollbar handle ≈ #F0F0F0 darkened 10% (via rgba) — */
-QScrollBar:vertical, QScrollBar:horizontal {
-  background: rgba(10,10,10,0.10);
-  width: 12px; height: 12px; margin: 0;
-}
-QScrollBar::add-line, QScrollBar::sub-line {
-  width: 0; height: 0;
-}
-QScrollBar::add-page, QScrollBar::sub-page {
-  background: transparent;
-}
-QScrollBar::handle:vertical, QScrollBar::handle:horizontal {
-  /* black @ 10% against #F0F0F0 → ~#E5E5E5 */
-  background: rgba(0,0,0,0.10);
-  min-height: 20px; min-width: 20px; border-radius: 6px;
-}
-QScrollBar::handle:hover {
-  /* black @ 15% → ~#DBDBDB */
-  background: rgba(0,0,0,0.15);
-}
-QScrollBar::handle:pressed {
-  /* black @ 20% → ~#D9D9D9 */
-  background: rgba(0,0,0,0.20);
-}
-QScrollBar::groove {
-  background: transparent; margin: 0; border-radius: 6px;
-}
-
-
-"""
-
-dark_qss = """
-/* Base font & dark gray background */
-* { font-family: 'Roboto', sans-serif; }
-QMainWindow { background-color: #212121; }
-
-/* Toolbar flat, ghost buttons */
-QToolBar { background-color: #2B2B2B; spacing: 8px; padding: 4px; min-height: 36px; border-bottom: 1px solid #444; }
-QToolBar QToolButton, QToolBar QLineEdit, QToolBar QPushButton { font-size: 15px; font-weight: 400; color: #FFFFFF; }
-QToolBar QToolButton { background: transparent; }
-QToolBar QToolButton:hover { background-color: rgba(77,182,172,0.1); }
-
-/* Accent color */
-:selection, QTreeView::item:selected { background-color: #4DB6AC; color: #000000; }
-
-/* Tree view typography, spacing & separators */
-QTreeView {
-  background-color: #2C2C2C;
-  alternate-background-color: #212121;
-  color: #FFFFFF;
-  font-size: 15px;
-  font-weight: 300;
-  show-decoration-selected: 1;
-}
-QTreeView::item {
-  padding: 6px 8px;
-  border-bottom: 1px solid #383838;
-}
-QTreeView::item:hover {
-  background-color: rgba(255, 255, 255, 0.05);
-}
-/* — Header Row (Dark) — */
-QHeaderView {
-  background: transparent;
-}
-QHeaderView::section {
-  background-color: #383838;
-  color: #FFFFFF;
-  padding: 6px 12px;
-  border: none;
-  font-size: 15px;
-  font-weight: 500;
-  border-top-left-radius: 8px;
-  border-top-right-radius: 8px;
-}
-
-
-/* Inputs & buttons */
-QLineEdit, QToolButton, QGroupBox, QPushButton { background-color: #2C2C2C; color: #FFFFFF; font-size: 14px; font-weight: 400; }
-QLineEdit { border: 1px solid #555; border-radius: 4px; padding: 4px; }
-
-/* — Dark Mode: scrollbar handle ≈ #2C2C2C lightened 10% (via rgba) — */
-QScrollBar:vertical, QScrollBar:horizontal {
-  background: rgba(225,225,225,0.10);
-  width: 12px; height: 12px; margin: 0;
-}
-QScrollBar::add-line, QScrollBar::sub-line {
-  width: 0; height: 0;
-}
-QScrollBar::add-page, QScrollBar::sub-page {
-  background: transparent;
-}
-QScrollBar::handle:vertical, QScrollBar::handle:horizontal {
-  /* white @ 10% against #2C2C2C → ~#393939 */
-  background: rgba(255,255,255,0.10);
-  min-height: 20px; min-width: 20px; border-radius: 6px;
-}
-QScrollBar::handle:hover {
-  /* white @ 15% → ~#404040 */
-  background: rgba(255,255,255,0.15);
-}
-QScrollBar::handle:pressed {
-  /* white @ 20% → ~#4C4C4C */
-  background: rgba(255,255,255,0.20);
-}
-QScrollBar::groove {
-  background: transparent; margin: 0; border-radius: 6px;
-}
-
-
-"""
-
-class DropArea(QtWidgets.QWidget):
-    fileDropped = QtCore.pyqtSignal(str)
-
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setAcceptDrops(True)
-        layout = QtWidgets.QVBoxLayout(self)
-        self.label = QtWidgets.QLabel(
-            "\n\n Drop a JSON file here \n\n or click to browse",
-            alignment=QtCore.Qt.AlignCenter
-        )
-        self.label.setStyleSheet("border: 2px dashed #aaa; font-size: 16px; padding: 40px;")
-        layout.addWidget(self.label)
-        self.setLayout(layout)
-
-    def dragEnterEvent(self, event):
-        if event.mimeData().hasUrls():
-            event.accept()
-        else:
-            event.ignore()
-
-    def dropEvent(self, event):
-        for url in event.mimeData().urls():
-            path = url.toLocalFile()
-            if path.lower().endswith('.json'):
-                self.fileDropped.emit(path)
-                break
-
-    def mousePressEvent(self, event):
-        path, _ = QtWidgets.QFileDialog.getOpenFileName(
-            self, 'Open JSON', '', 'JSON Files (*.json)'
-        )
-        if path:
-            self.fileDropped.emit(path)
-
-class JsonModel(QtGui.QStandardItemModel):
-    def __init__(self, data=None, parent=None):
-        super().__init__(parent)
-        self.setHorizontalHeaderLabels(['Key', 'Value'])
-        if data:
-            self.loadData(data)
-
-    def loadData(self, data, parent=None):
-        parent = parent or self.invisibleRootItem()
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if key in ("detailsLeft", "detailsRight"):
-                    vals = value.splitlines() if isinstance(value, str) else value
-                    labels = detailsLeft if key == "detailsLeft" else detailsRight
-                    for i, v in enumerate(vals):
-                        ki = QtGui.QStandardItem(labels[i] if i < len(labels) else f"[{i}]")
-                        ki.setEditable(False)
-                        vi = QtGui.QStandardItem(str(v))
-                        vi.setEditable(True)
-                        parent.appendRow([ki, vi])
-                    continue
-                ki = QtGui.QStandardItem(str(key))
-                ki.setEditable(False)
-                if isinstance(value, (dict, list)):
-                    parent.appendRow([ki, QtGui.QStandardItem('')])
-                    self.loadData(value, ki)
-                else:
-                    vi = QtGui.QStandardItem(str(value))
-                    vi.setEditable(True)
-                    parent.appendRow([ki, vi])
-        elif isinstance(data, list):
-            for i, item in enumerate(data):
-                ki = QtGui.QStandardItem(f"[{i}]")
-                ki.setEditable(False)
-                if isinstance(item, (dict, list)):
-                    parent.appendRow([ki, QtGui.QStandardItem('')])
-                    self.loadData(item, ki)
-                else:
-                    vi = QtGui.QStandardItem(str(item))
-                    vi.setEditable(True)
-                    parent.appendRow([ki, vi])
-
-    def toData(self, parent=None):
-        def parseItem(item):
-            if item.hasChildren():
-                keys = [item.child(r, 0).text() for r in range(item.rowCount())]
-                if not all(k.startswith('[') for k in keys):
-                    d, left, right = {}, {}, {}
-                    for r in range(item.rowCount()):
-                        k = item.child(r, 0).text()
-                        v = parseValue(item.child(r, 1).text())
-                        if k in detailsLeft:
-                            left[k] = v
-                        elif k in detailsRight:
-                            right[k] = v
-                        else:
-                            ch = item.child(r, 0)
-                            d[k] = parseItem(ch) if ch.hasChildren() else v
-                    if left:
-                        d['detailsLeft'] = '\n'.join(str(left[l]) for l in detailsLeft if l in left)
-                    if right:
-                        d['detailsRight'] = '\n'.join(str(right[r]) for r in detailsRight if r in right)
-                    return d
-                return [
-                    parseItem(item.child(r, 0)) if item.child(r, 0).hasChildren()
-                    else parseValue(item.child(r, 1).text())
-                    for r in range(item.rowCount())
-                ]
-            return parseValue(item.text())
-        return parseItem(parent or self.invisibleRootItem())
-
-
-def parseValue(s):
-    try:
-        return ast.literal_eval(s)
-    except:
-        return s
-
-class TreeFilterProxyModel(QtCore.QSortFilterProxyModel):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.filterString = ''
-        self.searchInKeys = False
-        self.showWholeCard = True
-
-    def setFilterString(self, text):
-        self.filterString = text.lower()
-        self.invalidateFilter()
-
-    def setSearchInKeys(self, flag):
-        self.searchInKeys = flag
-        self.invalidateFilter()
-
-    def setShowWholeCard(self, flag):
-        self.showWholeCard = flag
-        self.invalidateFilter()
-
-    def hasDescendantMatch(self, index):
-        model = self.sourceModel()
-        for row in range(model.rowCount(index)):
-            col = 0 if self.searchInKeys else 1
-            idx = model.index(row, col, index)
-            if self.filterString in str(model.data(idx) or '').lower():
-                return True
-            if self.hasDescendantMatch(model.index(row, 0, index)):  # recurse
-                return True
-        return False
-
-    def filterAcceptsRow(self, sourceRow, sourceParent):
-        if not self.filterString:
-            return True
-        model = self.sourceModel()
-        idx = model.index(sourceRow, 0 if self.searchInKeys else 1, sourceParent)
-        if self.filterString in str(model.data(idx) or '').lower():
-            return True
-        idx0 = model.index(sourceRow, 0, sourceParent)
-        if self.hasDescendantMatch(idx0):
-            return True
-        if self.showWholeCard and sourceParent.isValid():
-            if self.hasDescendantMatch(sourceParent):
-                return True
-        return False
-    
-class PlusButtonDelegate(QStyledItemDelegate):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.parent = parent
-        self.hitWidth = 20  # px for clickable area
-
-    def paint(self, painter, option, index):
-        super().paint(painter, option, index)
-        text = index.data()
-        if index.column() == 0 and text in ("sections", "cards"):
-            # draw a tiny “+”
-            r = option.rect
-            size = 8
-            x = r.x()
-            y = r.y() + (r.height() - size)//2
-            pen = painter.pen()
-            painter.setPen(QtGui.QPen(QtGui.QColor(0,150,136), 2))
-            painter.drawLine(x, y + size//2, x + size, y + size//2)
-            painter.drawLine(x + size//2, y, x + size//2, y + size)
-            painter.setPen(pen)
-
-    def editorEvent(self, event, model, option, index):
-        if (index.column() == 0 and
-            index.data() in ("sections", "cards") and
-            event.type() == QtCore.QEvent.MouseButtonRelease):
-            relx = event.pos().x() - option.rect.x()
-            if relx < self.hitWidth:
-                if index.data() == "sections":
-                    self.parent.addSection()
-                else:
-                    self.parent.addCard(index)
-                return True
-        return super().editorEvent(event, model, option, index)
-
-class JsonEditor(QtWidgets.QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.current_theme = 'light'
-        self.init_ui()
-        self.apply_theme()
-
-    def init_ui(self):
-        self.setWindowTitle('JSON Catalog Editor')
-        self.resize(900, 650)
-
-        # Toolbar
-        tb = self.addToolBar('Main')
-        tb.setMovable(False)
-        icon_open = self.style().standardIcon(QtWidgets.QStyle.SP_DialogOpenButton)
-        icon_save = self.style().standardIcon(QtWidgets.QStyle.SP_DialogSaveButton)
-
-        # Open & Save
-        a_open = QtWidgets.QAction(icon_open, 'Open', self)
-        a_open.triggered.connect(self.openFile)
-        tb.addAction(a_open)
-        a_save = QtWidgets.QAction(icon_save, 'Save', self)
-        a_save.triggered.connect(self.saveFile)
-        tb.addAction(a_save)
-
-        tb.addSeparator()
-        # Collapse & Expand
-        a_collapse = QtWidgets.QAction('Collapse All', self)
-        a_collapse.triggered.connect(lambda: self.tree.collapseAll())
-        tb.addAction(a_collapse)
-        a_expand = QtWidgets.QAction('Expand All', self)
-        a_expand.triggered.connect(lambda: self.tree.expandAll())
-        tb.addAction(a_expand)
-
-        tb.addSeparator()
-        # Search input
-        self.search_input = QtWidgets.QLineEdit()
-        self.search_input.setPlaceholderText('Search...')
-        tb.addWidget(self.search_input)
-
-        # Options dropdown
-        btn_opts = QtWidgets.QToolButton(self)
-        btn_opts.setText('Options')
-        btn_opts.setPopupMode(QtWidgets.QToolButton.InstantPopup)
-        menu = QtWidgets.QMenu(btn_opts)
-        w = QtWidgets.QWidget()
-        ly = QtWidgets.QVBoxLayout(w)
-        g1 = QtWidgets.QGroupBox('Search In')
-        h1 = QtWidgets.QHBoxLayout(g1)
-        rbV = QtWidgets.QRadioButton('Values')
-        rbK = QtWidgets.QRadioButton('Keys')
-        rbV.setChecked(True)
-        h1.addWidget(rbV)
-        h1.addWidget(rbK)
-        ly.addWidget(g1)
-        g2 = QtWidgets.QGroupBox('Show')
-        h2 = QtWidgets.QHBoxLayout(g2)
-        rbLine = QtWidgets.QRadioButton('Line Only')
-        rbCard = QtWidgets.QRadioButton('Whole Card')
-        rbCard.setChecked(True)
-        h2.addWidget(rbLine)
-        h2.addWidget(rbCard)
-        ly.addWidget(g2)
-        actW = QtWidgets.QWidgetAction(menu)
-        actW.setDefaultWidget(w)
-        menu.addAction(actW)
-        btn_opts.setMenu(menu)
-        tb.addWidget(btn_opts)
-
-        tb.addSeparator()
-        # Theme toggles
-        theme_act = QtWidgets.QAction('Toggle Theme', self)
-        theme_act.triggered.connect(self.toggle_theme)
-        tb.addAction(theme_act)
-
-        # Central
-        self.proxy = TreeFilterProxyModel(self)
-        self.stack = QtWidgets.QStackedWidget()
-        self.setCentralWidget(self.stack)
-        self.drop = DropArea()
-        self.stack.addWidget(self.drop)
-        page = QtWidgets.QWidget()
-        v = QtWidgets.QVBoxLayout(page)
-        self.tree = QtWidgets.QTreeView()
-        v.addWidget(self.tree)
-        self.stack.addWidget(page)
-
-        # persistent line‐edit under the tree for the “Value” column
-        self.bottom_edit = QtWidgets.QLineEdit(self)
-        self.bottom_edit.setPlaceholderText("Edit selected value …")
-        self.bottom_edit.setMinimumHeight(24)
-        v.addWidget(self.bottom_edit)
-
-
-        # Signals
-        self.drop.fileDropped.connect(self.loadJson)
-        self.search_input.textChanged.connect(self.proxy.setFilterString)
-        rbK.toggled.connect(lambda f: self.proxy.setSearchInKeys(f))
-        rbV.toggled.connect(lambda f: self.proxy.setSearchInKeys(not f))
-        rbLine.toggled.connect(lambda f: self.proxy.setShowWholeCard(not f))
-        rbCard.toggled.connect(lambda f: self.proxy.setShowWholeCard(f))
-
-        self.current_path = None
-
-    def apply_theme(self):
-        self.setStyleSheet(light_qss if self.current_theme == 'light' else dark_qss)
-
-    def toggle_theme(self):
-        self.current_theme = 'dark' if self.current_theme == 'light' else 'light'
-        self.apply_theme()
-
-    def openFile(self):
-        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open JSON', '', 'JSON Files (*.json)')
-        if path:
-            self.loadJson(path)
-
-    def loadJson(self, path):
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except Exception as e:
-            QtWidgets.QMessageBox.warning(self, 'Error', f'Failed to load JSON:\n{e}')
-            return
-        model = JsonModel(data)
-        self.proxy.setSourceModel(model)
-        self.tree.setModel(self.proxy)
-        hdr = self.tree.header()
-        hdr.setSectionResizeMode(0, QtWidgets.QHeaderView.Interactive)
-        hdr.setSectionResizeMode(1, QtWidgets.QHeaderView.Stretch)
-        self.tree.setColumnWidth(0, self.width() // 3)
-        self.tree.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.tree.customContextMenuRequested.connect(self.openMenu)
-        self.tree.expandAll()
-        self.search_input.clear()
-        self.stack.setCurrentIndex(1)
-        self.current_path = path
-
-                # ────────────────────────────────────────────────────────────────────
-        # Install our “+”‐button delegate on the Key column
-        self.delegate = PlusButtonDelegate(self)
-        self.tree.setItemDelegateForColumn(0, self.delegate)
-
-        self.current_path = path
-
-    # install plus‐button decorator on column 0
-        self.delegate = PlusButtonDelegate(self)
-        self.tree.setItemDelegateForColumn(0, self.delegate)
-
-    # ─── hook up bottom‐bar editing now that the model exists ────────────
-        sel = self.tree.selectionModel()
-        sel.currentChanged.connect(self.onSelectionChanged)
-        self.bottom_edit.textChanged.connect(self.onBottomEdited)
-
-
-
-    def saveFile(self):
-        if not self.current_path:
-            path, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Save JSON', '', 'JSON Files (*.json)')
-            if not path:
-                return
-            self.current_path = path
-        data = self.proxy.sourceModel().toData()
-        try:
-            with open(self.current_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            QtWidgets.QMessageBox.information(self, 'Saved', f'Saved to {self.current_path}')
-        except Exception as e:
-            QtWidgets.QMessageBox.warning(self, 'Error', f'Failed to save JSON:\n{e}')
-
-    def openMenu(self, pos):
-        idx = self.tree.indexAt(pos)
-        if not idx.isValid():
-            return
-        menu = QtWidgets.QMenu()
-        action = menu.addAction('Delete')
-        if menu.exec_(self.tree.viewport().mapToGlobal(pos)) == action:
-            if QtWidgets.QMessageBox.question(
-                self, 'Confirm Delete', 'Delete this item?',
-                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
-            ) != QtWidgets.QMessageBox.Yes:
-                return
-
-            # map the proxy index back to the source model
-            src_idx    = self.proxy.mapToSource(idx)
-            src_parent = src_idx.parent()
-            src_row    = src_idx.row()
-
-            # remove that row from the source model
-            self.proxy.sourceModel().removeRow(src_row, src_parent)
-
-    def resizeEvent(self, event):
-        super().resizeEvent(event)
-        if hasattr(self, 'tree'):
-            self.tree.setColumnWidth(0, self.width() // 3)
-
-    def cloneRow(self, keyItem):
-        
-        model = keyItem.model()
-        parent = keyItem.parent() or model.invisibleRootItem()
-        row = keyItem.row()
-        
-        origVal = model.item(row, 1)
-        
-        cloneKey   = QtGui.QStandardItem(keyItem.text())
-        cloneKey.setEditable(keyItem.isEditable())
-        cloneKey.setIcon(keyItem.icon())
-        if origVal is not None:
-            cloneVal = QtGui.QStandardItem(origVal.text())
-            cloneVal.setEditable(origVal.isEditable())
-            cloneVal.setIcon(origVal.icon())
-        else:
-            cloneVal = QtGui.QStandardItem()
-        
-        for i in range(keyItem.rowCount()):
-            childKey = keyItem.child(i, 0)
-            ck, cv = self.cloneRow(childKey)
-            cloneKey.appendRow([ck, cv])
-        
-        return cloneKey, cloneVal
-    
-    def addSection(self):
-        m = self.proxy.sourceModel()
-        root = m.invisibleRootItem()
-        sectionsItem = root.child(0, 0)
-        if sectionsItem.text() != "sections" or sectionsItem.rowCount() == 0:
-            return
-        firstSec = sectionsItem.child(0, 0)
-        newKey, newVal = self.cloneRow(firstSec)
-        # rename the “[0]” to the new index
-        newKey.setText(f"[{sectionsItem.rowCount()}]")
-        sectionsItem.appendRow([newKey, newVal])
-        # ensure it’s shown
-        secIdx = sectionsItem.index()
-        self.tree.expand(self.proxy.mapFromSource(secIdx))
-
-    def addCard(self, proxyIndex):
-        # proxyIndex is the QModelIndex for the “cards” cell
-        src = self.proxy.mapToSource(proxyIndex)
-        m = self.proxy.sourceModel()
-        cardsItem = m.itemFromIndex(src)
-        if cardsItem.rowCount() == 0:
-            return
-        firstCard = cardsItem.child(0, 0)
-        newKey, newVal = self.cloneRow(firstCard)
-        newKey.setText(f"[{cardsItem.rowCount()}]")
-        cardsItem.appendRow([newKey, newVal])
-        # expand that section’s “cards”
-        self.tree.expand(proxyIndex)
-
-    def onSelectionChanged(self, current: QtCore.QModelIndex, previous: QtCore.QModelIndex):
-        # map proxy → source, then grab the VALUE column
-        src_idx = self.proxy.mapToSource(current)
-        val_idx = src_idx.sibling(src_idx.row(), 1)
-        item    = self.proxy.sourceModel().itemFromIndex(val_idx)
-        self.bottom_edit.blockSignals(True)
-        self.bottom_edit.setText(item.text() if item else "")
-        self.bottom_edit.blockSignals(False)
-
-    def onBottomEdited(self, text: str):
-        idx = self.tree.currentIndex()
-        if not idx.isValid():
-            return
-        src_idx = self.proxy.mapToSource(idx)
-        val_idx = src_idx.sibling(src_idx.row(), 1)
-        item    = self.proxy.sourceModel().itemFromIndex(val_idx)
-        if item:
-            item.setText(text)
-
-
-
-if __name__ == '__main__':
-    app = QtWidgets.QApplication(sys.argv)
-    editor = JsonEditor()
-    editor.show()
-    sys.exit(app.exec_())
+import sys
+import os
+import json
+import time
+from collections import OrderedDict
+from PyQt5 import QtWidgets, QtGui, QtCore
+from PyQt5.QtWidgets import QStyledItemDelegate
+from catalog_core import (
+    rowsFor, coerceValue, JsonNode, SearchIndex, SearchCancelled,
+    LoadCancelled, loadJsonFile, saveJsonAtomic,
+)
+from catalog_stats import stats, configureFromEnvironment
+from catalog_store import CardStore, isCardsNode
+from catalog_query import parseQuery, QueryError
+from catalog_aggregate import AGGREGATE_NUMBERS, AGGREGATE_TEXTS, Summary, SectionAggregates, filterRows
+from catalog_schema import Validator
+from catalog_journal import EditJournal, rowPath
+from catalog_undo import UndoHistory
+import catalog_export
+from catalog_server import CatalogServer, SERVE_PORT, snapshotTree
+from catalog_diff import MISSING, CARD_KINDS, diffTree, sameValue, compareCatalogs, writeReport, cardLocation
+from catalog_assets import (
+    ASSET_FOLDERS, RESOURCE_PATHS, AssetResolver, AssetIndex, assetRootsFromEnvironment,
+    defaultCacheDir, defaultIndexFile, storeAssetProblems, thumbnailFile,
+)
+
+
+# Light and Dark style sheets
+light_qss = """
+/* Base font & off-white background */
+* { font-family: 'Roboto', sans-serif; }
+QMainWindow { background-color: #F9F9F9; }
+
+/* Toolbar flat, ghost buttons */
+QToolBar { background-color: #FFFFFF; spacing: 8px; padding: 4px; min-height: 36px; border-bottom: 1px solid #DDD; }
+QToolBar QToolButton, QToolBar QLineEdit, QToolBar QPushButton { font-size: 15px; font-weight: 400; }
+QToolBar QToolButton { background: transparent; }
+QToolBar QToolButton:hover { background-color: rgba(0,150,136,0.1); }
+
+/* Accent color */
+:selection, QTreeView::item:selected { background-color: #009688; color: #FFFFFF; }
+
+/* Tree view typography, spacing & separators */
+QTreeView {
+  background-color: #FFFFFF;
+  alternate-background-color: #F9F9F9;
+  font-size: 15px;
+  font-weight: 300;
+  show-decoration-selected: 1;
+}
+QTreeView::item {
+  padding: 6px 8px;
+  border-bottom: 1px solid #E0E0E0;
+}
+QTreeView::item:hover {
+  background-color: rgba(0, 0, 0, 0.05);
+}
+/* — Header Row (Light) — */
+QHeaderView {
+  background: transparent;
+}
+QHeaderView::section {
+  background-color: #E0E0E0;
+  padding: 6px 12px;
+  border: none;
+  font-size: 15px;
+  font-weight: 500;
+  /* round only the top corners of the entire header */
+  border-top-left-radius: 8px;
+  border-top-right-radius: 8px;
+}
+
+
+/* Inputs & buttons */
+QLineEdit, QToolButton, QGroupBox, QPushButton { background-color: #FFFFFF; color: #000000; font-size: 14px; font-weight: 400; }
+QLineEdit { border: 1px solid #CCC; border-radius: 4px; padding: 4px; }
+
+/* — Light Mode: scrollbar handle ≈ #F0F0F0 darkened 10% (via rgba) — */
+QScrollBar:vertical, QScrollBar:horizontal {
+  background: rgba(10,10,10,0.10);
+  width: 12px; height: 12px; margin: 0;
+}
+QScrollBar::add-line, QScrollBar::sub-line {
+  width: 0; height: 0;
+}
+QScrollBar::add-page, QScrollBar::sub-page {
+  background: transparent;
+}
+QScrollBar::handle:vertical, QScrollBar::handle:horizontal {
+  /* black @ 10% against #F0F0F0 → ~#E5E5E5 */
+  background: rgba(0,0,0,0.10);
+  min-height: 20px; min-width: 20px; border-radius: 6px;
+}
+QScrollBar::handle:hover {
+  /* black @ 15% → ~#DBDBDB */
+  background: rgba(0,0,0,0.15);
+}
+QScrollBar::handle:pressed {
+  /* black @ 20% → ~#D9D9D9 */
+  background: rgba(0,0,0,0.20);
+}
+QScrollBar::groove {
+  background: transparent; margin: 0; border-radius: 6px;
+}
+
+
+"""
+
+dark_qss = """
+/* Base font & dark gray background */
+* { font-family: 'Roboto', sans-serif; }
+QMainWindow { background-color: #212121; }
+
+/* Toolbar flat, ghost buttons */
+QToolBar { background-color: #2B2B2B; spacing: 8px; padding: 4px; min-height: 36px; border-bottom: 1px solid #444; }
+QToolBar QToolButton, QToolBar QLineEdit, QToolBar QPushButton { font-size: 15px; font-weight: 400; color: #FFFFFF; }
+QToolBar QToolButton { background: transparent; }
+QToolBar QToolButton:hover { background-color: rgba(77,182,172,0.1); }
+
+/* Accent color */
+:selection, QTreeView::item:selected { background-color: #4DB6AC; color: #000000; }
+
+/* Tree view typography, spacing & separators */
+QTreeView {
+  background-color: #2C2C2C;
+  alternate-background-color: #212121;
+  color: #FFFFFF;
+  font-size: 15px;
+  font-weight: 300;
+  show-decoration-selected: 1;
+}
+QTreeView::item {
+  padding: 6px 8px;
+  border-bottom: 1px solid #383838;
+}
+QTreeView::item:hover {
+  background-color: rgba(255, 255, 255, 0.05);
+}
+/* — Header Row (Dark) — */
+QHeaderView {
+  background: transparent;
+}
+QHeaderView::section {
+  background-color: #383838;
+  color: #FFFFFF;
+  padding: 6px 12px;
+  border: none;
+  font-size: 15px;
+  font-weight: 500;
+  border-top-left-radius: 8px;
+  border-top-right-radius: 8px;
+}
+
+
+/* Inputs & buttons */
+QLineEdit, QToolButton, QGroupBox, QPushButton { background-color: #2C2C2C; color: #FFFFFF; font-size: 14px; font-weight: 400; }
+QLineEdit { border: 1px solid #555; border-radius: 4px; padding: 4px; }
+
+/* — Dark Mode: scrollbar handle ≈ #2C2C2C lightened 10% (via rgba) — */
+QScrollBar:vertical, QScrollBar:horizontal {
+  background: rgba(225,225,225,0.10);
+  width: 12px; height: 12px; margin: 0;
+}
+QScrollBar::add-line, QScrollBar::sub-line {
+  width: 0; height: 0;
+}
+QScrollBar::add-page, QScrollBar::sub-page {
+  background: transparent;
+}
+QScrollBar::handle:vertical, QScrollBar::handle:horizontal {
+  /* white @ 10% against #2C2C2C → ~#393939 */
+  background: rgba(255,255,255,0.10);
+  min-height: 20px; min-width: 20px; border-radius: 6px;
+}
+QScrollBar::handle:hover {
+  /* white @ 15% → ~#404040 */
+  background: rgba(255,255,255,0.15);
+}
+QScrollBar::handle:pressed {
+  /* white @ 20% → ~#4C4C4C */
+  background: rgba(255,255,255,0.20);
+}
+QScrollBar::groove {
+  background: transparent; margin: 0; border-radius: 6px;
+}
+
+
+"""
+
+class DropArea(QtWidgets.QWidget):
+    fileDropped = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAcceptDrops(True)
+        layout = QtWidgets.QVBoxLayout(self)
+        self.label = QtWidgets.QLabel(
+            "\n\n Drop a JSON file here \n\n or click to browse",
+            alignment=QtCore.Qt.AlignCenter
+        )
+        self.label.setStyleSheet("border: 2px dashed #aaa; font-size: 16px; padding: 40px;")
+        layout.addWidget(self.label)
+        self.setLayout(layout)
+
+    def showProgress(self, text):
+        self.label.setText(f"\n\n {text} \n\n")
+
+    def reset(self):
+        self.label.setText("\n\n Drop a JSON file here \n\n or click to browse")
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.accept()
+        else:
+            event.ignore()
+
+    def dropEvent(self, event):
+        for url in event.mimeData().urls():
+            path = url.toLocalFile()
+            if path.lower().endswith('.json'):
+                self.fileDropped.emit(path)
+                break
+
+    def mousePressEvent(self, event):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, 'Open JSON', '', 'JSON Files (*.json)'
+        )
+        if path:
+            self.fileDropped.emit(path)
+
+VALUE_ROLE = QtCore.Qt.UserRole + 1
+
+
+# flagged rows (JsonModel.setMarks)
+MARK_ROLES = {
+    QtCore.Qt.ToolTipRole: None,
+    QtCore.Qt.ForegroundRole: QtGui.QBrush(QtGui.QColor('#E53935')),
+    QtCore.Qt.BackgroundRole: QtGui.QBrush(QtGui.QColor(229, 57, 53, 40)),
+}
+
+
+def fileStamp(path):
+    # what tells one version of a file from the next, None if it's gone
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def editorSettings():
+    return QtCore.QSettings('EstagioIPV', 'JsonCatalogEditor')
+
+
+class JsonModel(QtCore.QAbstractItemModel):
+    # the undo/redo stacks changed
+    historyChanged = QtCore.pyqtSignal()
+    # the journal couldn't be written and was switched off (the OSError)
+    journalFailed = QtCore.pyqtSignal(str)
+
+    def __init__(self, data=None, parent=None, searchIndex=None, cardStore=None):
+        super().__init__(parent)
+        self.root = JsonNode('')
+        self.root.children = []
+        self._searchIndex = None
+        self._cardStore = None
+        # encoded text of untouched subtrees from the last save
+        self.fragments = {}
+        self._marks = {}
+        self.revision = 0
+        self._tracking = True
+        self._forgetEdits()
+        # EditJournal every local edit is recorded in, if any
+        self.journal = None
+        self.history = UndoHistory()
+        if data:
+            self.loadData(data, searchIndex, cardStore)
+
+    def loadData(self, data, searchIndex=None, cardStore=None):
+        # searchIndex / cardStore may come prebuilt from the load worker
+        self.beginResetModel()
+        self.root = JsonNode('', '', data)
+        self.root.fetch()
+        self.revision += 1
+        self.fragments = {}
+        self._forgetEdits()
+        self._clearHistory()
+        self._searchIndex = searchIndex
+        self._cardStore = cardStore if searchIndex is not None else None
+        if searchIndex is not None:
+            searchIndex.assignChildren(self.root)
+        self.endResetModel()
+
+    def _forgetEdits(self):
+        # unsaved local edits, told apart from changes made to the file on
+        # disk: cell → its value before the first edit, inserted nodes,
+        # parent → (key or None in lists, data) of the rows removed from it
+        self.editedCells = {}
+        self.insertedNodes = set()
+        self.removedRows = {}
+
+    def _clearHistory(self):
+        if self.history.canUndo() or self.history.canRedo():
+            self.history.clear()
+            self.historyChanged.emit()
+
+    def markSaved(self, revision, saved=None):
+        # a save of the tree as of `revision` finished; edits made after
+        # the snapshot are still unsaved. `saved` is that snapshot, its
+        # edited nodes rebased on what was written: with nothing edited
+        # since, the tree takes those sources and is clean again, so the
+        # next save splices them from the fragment cache
+        if revision != self.revision:
+            return
+        self._forgetEdits()
+        if saved is None:
+            return
+        pairs, stack = [], [(self.root, saved)]
+        while stack:
+            node, snap = stack.pop()
+            if not node.dirty:
+                continue
+            if snap.dirty or node.key != snap.key or (node.children is None) != (snap.children is None) \
+                    or node.children is not None and len(node.children) != len(snap.children):
+                # not the tree that was saved after all; a clean parent
+                # over a dirty child would hide later edits from the save
+                return
+            pairs.append((node, snap))
+            stack.extend(zip(node.children or (), snap.children or ()))
+        for node, snap in pairs:
+            node.source, node.dirty = snap.source, False
+
+    def searchIndex(self):
+        if self._searchIndex is None:
+            self._searchIndex = SearchIndex(self.root)
+        return self._searchIndex
+
+    def cardStore(self):
+        # columnar copy of every card, kept in sync from here on
+        if self._cardStore is None:
+            self._cardStore = CardStore(self.searchIndex(), self.root)
+        return self._cardStore
+
+    # ── node helpers ──────────────────────────────────────────────────
+    def nodeFromIndex(self, index):
+        if index.isValid():
+            return index.internalPointer()
+        return self.root
+
+    def indexFromNode(self, node, column=0):
+        if node is self.root or node is None:
+            return QtCore.QModelIndex()
+        return self.createIndex(node.row, column, node)
+
+    def fetchNode(self, node):
+        if node.children is None:
+            self.fetchMore(self.indexFromNode(node))
+        return node.children
+
+    def appendNode(self, parentNode, node, source=None):
+        self.insertNodes(parentNode, None, [node], source)
+
+    def insertNodes(self, parentNode, row, nodes, source=None, revive=False):
+        # the whole batch is one index segment and one rowsInserted, so the
+        # proxy filters the new rows in a single pass; list items after it
+        # get their "[i]" keys renumbered with one dataChanged. `source` is
+        # the node they were all cloned from, journaled as just that;
+        # `revive` brings back removed rows still in the search index
+        if not nodes:
+            return
+        children = self.fetchNode(parentNode)
+        row = len(children) if row is None else row
+        if self._tracking:
+            path = rowPath(parentNode)
+            self.history.record('Insert', {'o': 'rm', 'p': path, 'r': row, 'n': len(nodes)})
+            if self.journal is not None:
+                if source is not None:
+                    self.writeJournal(self.journal.record, {'o': 'copy', 'p': path, 'r': row,
+                                                            'from': rowPath(source), 'n': len(nodes)})
+                else:
+                    self.writeJournal(self.journal.record, {'o': 'ins', 'p': path, 'r': row,
+                                                            'rows': [[n.key, n.toData()] for n in nodes]})
+        isList = isinstance(parentNode.source, list)
+        for i, node in enumerate(nodes, row):
+            node.parent, node.row = parentNode, i
+            if isList:
+                node.key = f"[{i}]"
+        parentNode.markDirty()
+        with stats.timer('model.insert', rows=len(nodes)):
+            if self._searchIndex is not None:
+                if revive:
+                    for node in nodes:
+                        self._searchIndex.revive(node)
+                else:
+                    self._searchIndex.appendSubtrees(parentNode, nodes)
+            if self._cardStore is not None:
+                if revive:
+                    self._cardStore.invalidate()
+                else:
+                    self._cardStore.appendNodes(parentNode, nodes)
+            self.beginInsertRows(self.indexFromNode(parentNode), row, row + len(nodes) - 1)
+            children[row:row] = nodes
+            for r in range(row + len(nodes), len(children)):
+                children[r].row = r
+            self.endInsertRows()
+            if self._cardStore is not None and parentNode.parent is not None and isCardsNode(parentNode.parent):
+                self._cardStore.updateCard(parentNode)
+            self._renumberKeys(parentNode, row + len(nodes))
+        if self._tracking:
+            self.insertedNodes.update(nodes)
+            self.historyChanged.emit()
+        self.revision += 1
+
+    def _renumberKeys(self, parentNode, start):
+        if not isinstance(parentNode.source, list):
+            return
+        children = parentNode.children
+        changed = [r for r in range(start, len(children)) if children[r].key != f"[{r}]"]
+        if not changed:
+            return
+        for r in changed:
+            children[r].key = f"[{r}]"
+            if self._searchIndex is not None and children[r].nid is not None:
+                self._searchIndex.setKey(children[r], children[r].key)
+        parent = self.indexFromNode(parentNode)
+        self.dataChanged.emit(self.index(changed[0], 0, parent), self.index(changed[-1], 0, parent),
+                              [QtCore.Qt.DisplayRole, QtCore.Qt.EditRole])
+
+    # ── QAbstractItemModel ────────────────────────────────────────────
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        node = self.nodeFromIndex(parent)
+        if node.children is None or not (0 <= row < len(node.children)):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index=None):
+        if index is None:
+            return QtCore.QObject.parent(self)
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self.indexFromNode(index.internalPointer().parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = self.nodeFromIndex(parent)
+        return len(node.children) if node.children is not None else 0
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 2
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return False
+        return self.nodeFromIndex(parent).hasRows()
+
+    def canFetchMore(self, parent):
+        node = self.nodeFromIndex(parent)
+        return node.children is None and node.hasRows()
+
+    def fetchMore(self, parent):
+        node = self.nodeFromIndex(parent)
+        if node.children is not None:
+            return
+        count = sum(1 for _ in rowsFor(node.source))
+        if count:
+            self.beginInsertRows(parent, 0, count - 1)
+            node.fetch()
+            if self._searchIndex is not None:
+                self._searchIndex.assignChildren(node)
+            self.endInsertRows()
+        else:
+            node.children = []
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return node.key if index.column() == 0 else node.text
+        if role == VALUE_ROLE and index.column() == 1 and not node.isContainer():
+            return node.value
+        if role in MARK_ROLES and self._marks:
+            message = self.markFor(node)
+            if message is not None:
+                return message if role == QtCore.Qt.ToolTipRole else MARK_ROLES[role]
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        # EditRole text is coerced to the cell's JSON type, VALUE_ROLE is
+        # stored as given (the typed editors use it)
+        if role not in (QtCore.Qt.EditRole, VALUE_ROLE) or not index.isValid():
+            return False
+        node = index.internalPointer()
+        if index.column() != 1 or node.isContainer():
+            return False
+        old = node.value
+        if self._tracking:
+            self.editedCells.setdefault(node, old)
+        node.value = coerceValue(value, node.vtype) if role == QtCore.Qt.EditRole else value
+        node.markDirty()
+        self.revision += 1
+        if self._tracking:
+            path = rowPath(node)
+            self.history.record('Edit', {'o': 'set', 'p': path, 'v': old})
+            if self.journal is not None:
+                self.writeJournal(self.journal.record, {'o': 'set', 'p': path, 'v': node.value})
+            self.historyChanged.emit()
+        if self._searchIndex is not None:
+            self._searchIndex.setValue(node, node.value)
+        if self._cardStore is not None and node.parent.parent is not None and isCardsNode(node.parent.parent):
+            self._cardStore.updateCard(node.parent)
+        self.dataChanged.emit(index, index, [QtCore.Qt.DisplayRole, QtCore.Qt.EditRole, VALUE_ROLE])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.column() == 1 and not index.internalPointer().isContainer():
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return ('Key', 'Value')[section]
+        return None
+
+    def removeRows(self, row, count, parent=QtCore.QModelIndex()):
+        node = self.nodeFromIndex(parent)
+        if node.children is None or row < 0 or row + count > len(node.children):
+            return False
+        if self._tracking:
+            # the removed nodes themselves are what undo puts back
+            path = rowPath(node)
+            removed = node.children[row:row + count]
+            self.history.record('Delete', {'o': 'put', 'p': path, 'r': row, 'nodes': removed,
+                                           'index': self._searchIndex},
+                                self._rowsUnder(removed))
+            if self.journal is not None:
+                self.writeJournal(self.journal.record, {'o': 'rm', 'p': path, 'r': row, 'n': count})
+        if self._searchIndex is not None:
+            for child in node.children[row:row + count]:
+                self._searchIndex.remove(child)
+        if self._cardStore is not None:
+            self._cardStore.invalidate()
+        if self._tracking:
+            isList = isinstance(node.source, list)
+            for child in node.children[row:row + count]:
+                if child in self.insertedNodes:
+                    self.insertedNodes.discard(child)
+                else:
+                    self.removedRows.setdefault(node, []).append(
+                        (None if isList else child.key, child.toData()))
+        node.markDirty()
+        self.revision += 1
+        self.beginRemoveRows(parent, row, row + count - 1)
+        del node.children[row:row + count]
+        for r in range(row, len(node.children)):
+            node.children[r].row = r
+        self.endRemoveRows()
+        if self._cardStore is not None and node.parent is not None and isCardsNode(node.parent):
+            self._cardStore.updateCard(node)
+        self._renumberKeys(node, row)
+        if self._tracking:
+            self.historyChanged.emit()
+        return True
+
+    def _rowsUnder(self, nodes):
+        # tree rows in these branches, as far as the search index knows
+        index = self._searchIndex
+        if index is None:
+            return len(nodes)
+        return sum(index.end[n.nid] - n.nid if n.nid is not None else 1 for n in nodes)
+
+    def writeJournal(self, method, *args):
+        # every journal write goes through here: the edit it records has
+        # already been made, so a journal that can't be written (disk full,
+        # read-only folder) is switched off, not retried, and reported once
+        try:
+            method(*args)
+        except OSError as e:
+            journal, self.journal = self.journal, None
+            if journal is not None:
+                try:
+                    journal.close()
+                except OSError:
+                    pass
+            self.journalFailed.emit(str(e))
+            return False
+        return True
+
+    def nodeAt(self, path):
+        node = self.root
+        for r in path:
+            node = self.fetchNode(node)[r]
+        return node
+
+    def replay(self, ops):
+        # journaled operations, applied (and journaled again) in order
+        for op in ops:
+            self._apply(op)
+
+    def undo(self):
+        # the step undone, None if there was none
+        return self.history.undo(self._apply)
+
+    def redo(self):
+        return self.history.redo(self._apply)
+
+    def _apply(self, op):
+        kind = op['o']
+        if kind == 'state':
+            self.loadData(op['data'])
+            if self.journal is not None:
+                self.writeJournal(self.journal.record, op)
+            return
+        node = self.nodeAt(op['p'])
+        if kind == 'set':
+            self.setData(self.indexFromNode(node, 1), op['v'], VALUE_ROLE)
+            return
+        self.fetchNode(node)
+        if kind == 'put':
+            self._putBack(node, op['r'], op['nodes'], op['index'])
+        elif kind == 'rm':
+            self.removeRows(op['r'], op['n'], self.indexFromNode(node))
+        elif kind == 'copy':
+            original = self.nodeAt(op['from'])
+            self.insertNodes(node, op['r'], [original.clone() for _ in range(op['n'])], original)
+        elif kind == 'ins':
+            self.insertNodes(node, op['r'], [
+                JsonNode(key, '', data) if isinstance(data, (dict, list)) else JsonNode(key, data)
+                for key, data in op['rows']])
+
+    def _putBack(self, parent, row, nodes, index):
+        # undoing a delete: the rows aren't new, just no longer removed
+        revive = index is not None and index is self._searchIndex and None not in [n.nid for n in nodes]
+        self.insertNodes(parent, row, nodes, revive=revive)
+        removed = self.removedRows.get(parent)
+        if removed:
+            isList = isinstance(parent.source, list)
+            for node in nodes:
+                entry = (None if isList else node.key, node.toData())
+                if entry in removed:
+                    removed.remove(entry)
+                    self.insertedNodes.discard(node)
+
+    def applyChanges(self, changes):
+        # patch the tree row by row with diffTree's changes for a newer
+        # version of the file, so expansion, selection and the filter stay
+        # put. Unsaved local edits are kept; the ones the file changed too
+        # come back as (node, message) conflicts
+        conflicts = []
+        # row paths recorded for undo no longer hold
+        self._clearHistory()
+        self._tracking = False
+        try:
+            for change in changes:
+                parent = self.root
+                for r in change.path:
+                    parent = self.fetchNode(parent)[r]
+                children = self.fetchNode(parent)
+                if change.kind == 'set':
+                    self._applySet(children[change.row], change.value, conflicts)
+                elif change.kind == 'remove':
+                    self._applyRemove(parent, change.row, change.row + change.count, conflicts)
+                else:
+                    self._applyInsert(parent, change.row, change.value)
+        finally:
+            self._tracking = True
+        return conflicts
+
+    def _applySet(self, node, value, conflicts):
+        if node in self.editedCells:
+            # the file only conflicts if it changed the cell as well
+            if not sameValue(self.editedCells[node], value) and not sameValue(node.value, value):
+                conflicts.append((node, f'Changed on disk to {value!r}, unsaved edit kept'))
+            return
+        node.vtype = type(value)
+        self.setData(self.indexFromNode(node, 1), value, VALUE_ROLE)
+
+    def _applyRemove(self, parent, first, end, conflicts):
+        # rows added here, or with edits below, stay; the others go in runs
+        children = parent.children
+        index = self.indexFromNode(parent)
+        stop = end
+        for r in range(end - 1, first - 1, -1):
+            node = children[r]
+            if node in self.insertedNodes:
+                keep = True
+            else:
+                keep = self._hasEdits(node)
+                if keep:
+                    conflicts.append((node, 'Removed on disk, kept for its unsaved edits'))
+            if keep:
+                if stop > r + 1:
+                    self.removeRows(r + 1, stop - r - 1, index)
+                stop = r
+        if stop > first:
+            self.removeRows(first, stop - first, index)
+
+    def _applyInsert(self, parent, row, rows):
+        # rows deleted here and not saved yet stay deleted
+        removed = self.removedRows.get(parent)
+        isList = isinstance(parent.source, list)
+        nodes = []
+        for key, value, source in rows:
+            entry = (None if isList else key, value if source is None else source)
+            if removed and entry in removed:
+                removed.remove(entry)
+                continue
+            nodes.append(JsonNode(key, value, source))
+        self.insertNodes(parent, row, nodes)
+
+    def _hasEdits(self, node):
+        for edited in (*self.editedCells, *self.insertedNodes, *self.removedRows):
+            under = False
+            while edited.parent is not None:
+                # nodes removed since their edit don't count
+                if edited.parent.children is None or edited.parent.children[edited.row:edited.row + 1] != [edited]:
+                    under = False
+                    break
+                under = under or edited is node
+                edited = edited.parent
+            if under and edited is self.root:
+                return True
+        return False
+
+    def setMarks(self, source, marks):
+        # rows to flag, per source of problems ('assets', …): {nid: message}
+        # for a row, {(parent nid, key): message} for a row that may not
+        # have been expanded yet
+        if marks:
+            self._marks[source] = marks
+        else:
+            self._marks.pop(source, None)
+
+    def marks(self, source):
+        return self._marks.setdefault(source, {})
+
+    def markFor(self, node):
+        messages = []
+        for marks in self._marks.values():
+            message = marks.get(node.nid)
+            if message is None and node.parent is not None:
+                message = marks.get((node.parent.nid, node.key))
+            if message:
+                messages.append(message)
+        return '\n'.join(messages) or None
+
+    def toData(self, node=None):
+        with stats.timer('model.toData'):
+            return (node or self.root).toData()
+
+
+SEARCH_DEBOUNCE_MS = 200
+COMPARE_MAX_CARDS = 5000
+RELOAD_DELAY_MS = 300
+# how long journaled edits may sit in the write buffer
+JOURNAL_FLUSH_MS = 1000
+# expanded rows are remembered for this many recently opened files, up
+# to this many rows each
+EXPANSION_FILES = 20
+EXPANSION_ROWS = 5000
+# Expand All asks first past this many rows: each one is built and laid
+# out (about 25 per card, ~1 s per 1000 cards)
+EXPAND_ALL_ROWS = 10000
+# edits are published to the catalog server after this pause
+SERVE_PUBLISH_MS = 300
+
+
+def rowsBelow(item, limit):
+    # rows under a node or parsed value once fully expanded, counted up to
+    # `limit`; unexpanded branches aren't turned into nodes
+    count, stack = 0, [item]
+    while stack and count < limit:
+        item = stack.pop()
+        for _, _, child in item.rows() if isinstance(item, JsonNode) else rowsFor(item):
+            count += 1
+            if child is not None:
+                stack.append(child)
+    return count
+
+
+class TreeFilterProxyModel(QtCore.QSortFilterProxyModel):
+    filterChanged = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.filterString = ''
+        self.searchInKeys = False
+        self.showWholeCard = True
+        self._result = None
+        self._resultIndex = None
+        self._queryText = None
+        self._query = None
+
+    def structuredQuery(self):
+        # the filter string as a card query (catalog_query), or None for a
+        # plain substring search; text that doesn't parse is searched as is
+        if self._queryText != self.filterString:
+            self._queryText = self.filterString
+            try:
+                self._query = parseQuery(self.filterString)
+            except QueryError:
+                self._query = None
+        return self._query
+
+    def setFilterString(self, text):
+        self.filterString = text.lower()
+        self.invalidateFilter()
+
+    def invalidateFilter(self):
+        with stats.timer('filter.invalidate', query=self.filterString):
+            super().invalidateFilter()
+        self.filterChanged.emit()
+
+    def setSearchInKeys(self, flag):
+        self.searchInKeys = flag
+        self.invalidateFilter()
+
+    def setShowWholeCard(self, flag):
+        self.showWholeCard = flag
+        self.invalidateFilter()
+
+    def setSearchResult(self, result):
+        # result of a query already run off-thread against the source index
+        self.filterString = result.text if result is not None else ''
+        self._result = result
+        self._resultIndex = self.sourceModel().searchIndex() if result is not None else None
+        self.invalidateFilter()
+
+    def matches(self):
+        # falls back to a synchronous query if the cached result doesn't fit
+        # the current state; after edits that is a cheap refinement
+        index = self.sourceModel().searchIndex()
+        col = 0 if self.searchInKeys else 1
+        r = self._result
+        if r is not None and self._resultIndex is not index:
+            r = None
+        query = self.structuredQuery()
+        if query is not None:
+            store = self.sourceModel().cardStore()
+            if (r is None or not r.cards or r.text != self.filterString
+                    or r.version != index.version or r.storeVersion != store.version):
+                self._result = query.result(self.filterString, index, store)
+                self._resultIndex = index
+            return self._result
+        if r is not None and r.cards:
+            r = None
+        if (r is None or r.text != self.filterString or r.column != col
+                or r.version != index.version):
+            self._result = index.query(self.filterString, col, previous=r)
+            self._resultIndex = index
+        return self._result
+
+    def currentResult(self):
+        if self._result is not None and self._resultIndex is self.sourceModel().searchIndex():
+            return self._result
+        return None
+
+    def hasDescendantMatch(self, index):
+        node = self.sourceModel().nodeFromIndex(index)
+        if node.nid is None:
+            return any(self.matches().desc)
+        return bool(self.matches().desc[node.nid])
+
+    def filterAcceptsRow(self, sourceRow, sourceParent):
+        if stats.enabled:
+            stats.count('filter.acceptsRow')
+        if not self.filterString:
+            return True
+        model = self.sourceModel()
+        parentNode = model.nodeFromIndex(sourceParent)
+        result = self.matches()
+        hit, desc = result.hit, result.desc
+        nid = parentNode.children[sourceRow].nid
+        if hit[nid] or desc[nid]:
+            return True
+        if result.cards:
+            # a matching card shows all of its fields
+            return sourceParent.isValid() and bool(hit[parentNode.nid])
+        if self.showWholeCard and sourceParent.isValid():
+            if desc[parentNode.nid]:
+                return True
+        return False
+    
+class PlusButtonDelegate(QStyledItemDelegate):
+    # rows are all one height, so the "+" is the same two lines at an
+    # offset from the cell's corner, worked out once per row height
+    PEN = QtGui.QPen(QtGui.QColor(0, 150, 136), 2)
+    SIZE = 8
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.hitWidth = 20  # px for clickable area
+        self._lines = {}    # row height → the two lines, from (0, 0)
+
+    def plusLines(self, height):
+        lines = self._lines.get(height)
+        if lines is None:
+            size = self.SIZE
+            y = (height - size) // 2
+            lines = self._lines[height] = (QtCore.QLine(0, y + size // 2, size, y + size // 2),
+                                           QtCore.QLine(size // 2, y, size // 2, y + size))
+        return lines
+
+    def paint(self, painter, option, index):
+        if stats.enabled:
+            stats.count('delegate.paint')
+        super().paint(painter, option, index)
+        if index.data() not in ("sections", "cards"):
+            return
+        # draw a tiny “+”
+        r = option.rect
+        painter.save()
+        painter.translate(r.x(), r.y())
+        painter.setPen(self.PEN)
+        painter.drawLines(*self.plusLines(r.height()))
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QtCore.QEvent.MouseButtonRelease and
+            index.data() in ("sections", "cards")):
+            relx = event.pos().x() - option.rect.x()
+            if relx < self.hitWidth:
+                if index.data() == "sections":
+                    self.parent.addSection()
+                else:
+                    self.parent.addCard(index)
+                return True
+        return super().editorEvent(event, model, option, index)
+
+class ValueDelegate(QStyledItemDelegate):
+    # the editor follows the JSON type of the cell, so a commit stores a
+    # typed value instead of text that has to be guessed back on save.
+    # Asset names (imageName, …) get their thumbnail, or a warning icon
+    # when the configured Assets folder doesn't have them; thumbnails not
+    # decoded yet are requested and the cell is drawn without one
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.resolver = None
+        self.thumbnails = None
+
+    def assetFor(self, index):
+        # (field, Asset or None) for an asset-name cell, else None
+        if self.resolver is None or index.column() != 1:
+            return None
+        field = index.sibling(index.row(), 0).data()
+        if field not in ASSET_FOLDERS:
+            return None
+        name = index.data()
+        if not name:
+            return None
+        return field, self.resolver.resolve(field, name)
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        found = self.assetFor(index)
+        if found is None:
+            return
+        asset = found[1]
+        if asset is None:
+            icon = QtWidgets.QApplication.style().standardIcon(QtWidgets.QStyle.SP_MessageBoxWarning)
+        else:
+            icon = self.thumbnails.icon(asset)
+            if icon is None:
+                return
+        option.features |= QtWidgets.QStyleOptionViewItem.HasDecoration
+        option.icon = icon
+        h = option.fontMetrics.height()
+        option.decorationSize = QtCore.QSize(h, h)
+
+    def helpEvent(self, event, view, option, index):
+        found = self.assetFor(index)
+        if found is None or event.type() != QtCore.QEvent.ToolTip:
+            return super().helpEvent(event, view, option, index)
+        field, asset = found
+        if asset is None:
+            text = f"{index.data()} is not in {' or '.join(self.resolver.folders(field))}"
+        else:
+            text = asset.path
+            thumb = self.thumbnails.cachedFile(asset)
+            if thumb is not None:
+                text = f'<img src="{QtCore.QUrl.fromLocalFile(thumb).toString()}"><br>{text}'
+        QtWidgets.QToolTip.showText(event.globalPos(), text, view)
+        return True
+
+    def createEditor(self, parent, option, index):
+        value = index.data(VALUE_ROLE)
+        if isinstance(value, bool):
+            editor = QtWidgets.QComboBox(parent)
+            editor.addItems(['True', 'False'])
+            return editor
+        editor = super().createEditor(parent, option, index)
+        if isinstance(editor, QtWidgets.QLineEdit):
+            if type(value) is int:
+                editor.setValidator(QtGui.QRegExpValidator(QtCore.QRegExp(r'-?\d+'), editor))
+            elif type(value) is float:
+                v = QtGui.QDoubleValidator(editor)
+                v.setLocale(QtCore.QLocale.c())
+                editor.setValidator(v)
+        return editor
+
+    def setEditorData(self, editor, index):
+        if isinstance(editor, QtWidgets.QComboBox):
+            editor.setCurrentText(str(index.data(VALUE_ROLE)))
+            return
+        super().setEditorData(editor, index)
+
+    def setModelData(self, editor, model, index):
+        if isinstance(editor, QtWidgets.QComboBox):
+            model.setData(index, editor.currentText() == 'True', VALUE_ROLE)
+            return
+        # text goes through EditRole and is coerced by the model
+        super().setModelData(editor, model, index)
+
+
+THUMBNAIL_SIZE = 256
+THUMBNAIL_CACHE_BYTES = 64 << 20
+
+
+class ThumbnailJob(QtCore.QRunnable):
+    # decodes one asset scaled down to THUMBNAIL_SIZE (or reads it back from
+    # the disk cache) on the thread pool
+    def __init__(self, cache, asset):
+        super().__init__()
+        self.cache = cache
+        self.asset = asset
+
+    def run(self):
+        with stats.timer('thumbnail.decode'):
+            path = thumbnailFile(self.cache.cacheDir, self.asset, THUMBNAIL_SIZE)
+            image = QtGui.QImage()
+            if os.path.exists(path):
+                image.load(path)
+            if image.isNull():
+                reader = QtGui.QImageReader(self.asset.path)
+                size = reader.size()
+                if size.isValid() and max(size.width(), size.height()) > THUMBNAIL_SIZE:
+                    # most formats decode straight to the smaller size
+                    reader.setScaledSize(size.scaled(THUMBNAIL_SIZE, THUMBNAIL_SIZE,
+                                                     QtCore.Qt.KeepAspectRatio))
+                image = reader.read()
+                if not image.isNull():
+                    try:
+                        os.makedirs(self.cache.cacheDir, exist_ok=True)
+                        tmp = f'{path}.{os.getpid()}.tmp'
+                        if image.save(tmp, 'PNG'):
+                            os.replace(tmp, path)
+                    except OSError:
+                        pass  # cache is best effort
+        self.cache.decoded.emit(self.asset, image)
+
+
+class ThumbnailCache(QtCore.QObject):
+    # Thumbnails of asset files, keyed by Asset (path, mtime, size): a
+    # byte-bounded LRU of pixmaps in memory over PNGs in `cacheDir`. icon()
+    # never blocks; a miss queues a decode on the pool (newest requests
+    # first) and `ready` is emitted once it's in.
+    ready = QtCore.pyqtSignal(object)
+    decoded = QtCore.pyqtSignal(object, object)
+
+    def __init__(self, cacheDir=None, maxBytes=THUMBNAIL_CACHE_BYTES, parent=None):
+        super().__init__(parent)
+        self.cacheDir = cacheDir or defaultCacheDir()
+        self.maxBytes = maxBytes
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(max(2, min(4, QtCore.QThread.idealThreadCount())))
+        self._entries = OrderedDict()   # Asset → (pixmap, icon, bytes)
+        self._bytes = 0
+        self._pending = set()
+        self._failed = set()
+        self._priority = 0
+        self.decoded.connect(self._store)
+
+    def _request(self, asset):
+        if asset in self._pending or asset in self._failed:
+            return
+        self._pending.add(asset)
+        # whatever was asked for last is what's on screen now
+        self._priority = min(self._priority + 1, 1 << 30)
+        self.pool.start(ThumbnailJob(self, asset), self._priority)
+
+    def _get(self, asset):
+        entry = self._entries.get(asset)
+        if entry is None:
+            self._request(asset)
+            return None
+        self._entries.move_to_end(asset)
+        return entry
+
+    def pixmap(self, asset):
+        entry = self._get(asset)
+        return entry[0] if entry is not None else None
+
+    def icon(self, asset):
+        entry = self._get(asset)
+        return entry[1] if entry is not None else None
+
+    def failed(self, asset):
+        return asset in self._failed
+
+    def cachedFile(self, asset):
+        path = thumbnailFile(self.cacheDir, asset, THUMBNAIL_SIZE)
+        return path if os.path.exists(path) else None
+
+    def _store(self, asset, image):
+        self._pending.discard(asset)
+        if image.isNull():
+            self._failed.add(asset)
+        else:
+            pixmap = QtGui.QPixmap.fromImage(image)
+            size = image.sizeInBytes()
+            self._entries[asset] = (pixmap, QtGui.QIcon(pixmap), size)
+            self._bytes += size
+            while self._bytes > self.maxBytes and len(self._entries) > 1:
+                _, (_, _, dropped) = self._entries.popitem(last=False)
+                self._bytes -= dropped
+        self.ready.emit(asset)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+        self._failed.clear()
+
+    def shutdown(self):
+        self.pool.clear()
+        self.pool.waitForDone()
+
+
+class JsonLoadWorker(QtCore.QObject):
+    progress = QtCore.pyqtSignal(int)
+    loaded = QtCore.pyqtSignal(object, object, object)
+    failed = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._cancel = False
+        self._last = -1
+
+    def cancel(self):
+        self._cancel = True
+
+    def _report(self, percent):
+        # only emit when the number changes, the parser calls this per card
+        if percent != self._last:
+            self._last = percent
+            self.progress.emit(percent)
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        # taken before reading, so a write during the load is noticed
+        self.stamp = fileStamp(self.path)
+        try:
+            with stats.timer('load.parse', path=self.path):
+                data = loadJsonFile(self.path, self._report, lambda: self._cancel)
+            with stats.timer('load.searchIndex'):
+                index = SearchIndex(data, lambda: self._cancel)
+            with stats.timer('load.cardStore'):
+                store = CardStore(index, data, lambda: self._cancel)
+        except LoadCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.loaded.emit(data, index, store)
+
+
+class JsonReloadWorker(QtCore.QObject):
+    # parses the file again after it changed on disk and diffs it against
+    # a snapshot of the tree
+    finished = QtCore.pyqtSignal(object, object)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, path, root):
+        super().__init__()
+        self.path = path
+        self.root = root
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        stamp = fileStamp(self.path)
+        try:
+            with stats.timer('reload.parse', path=self.path):
+                data = loadJsonFile(self.path)
+            with stats.timer('reload.diff'):
+                changes = diffTree(self.root, data)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(stamp, changes)
+
+
+class CompareWorker(QtCore.QObject):
+    # another version of the catalog against a snapshot of the tree
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, path, root):
+        super().__init__()
+        self.path = path
+        self.root = root
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        try:
+            with stats.timer('compare.parse', path=self.path):
+                old = loadJsonFile(self.path)
+            with stats.timer('compare.diff'):
+                diffs = list(compareCatalogs(old, self.root.toData()))
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(diffs)
+
+
+class ExportWorker(QtCore.QObject):
+    # a snapshot of the tree written out for Unity
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, root, folder, options):
+        super().__init__()
+        self.root = root
+        self.folder = folder
+        self.options = options
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        try:
+            with stats.timer('export', folder=self.folder):
+                report = catalog_export.exportCatalog(self.root.toData(), self.folder, **self.options)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(report)
+
+
+class SchemaWorker(QtCore.QObject):
+    # the whole freshly loaded catalog against the schema
+    finished = QtCore.pyqtSignal(object)
+
+    def __init__(self, validator, index, data):
+        super().__init__()
+        self.validator = validator
+        self.index = index
+        self.data = data
+        self._cancel = False
+
+    def cancel(self):
+        self._cancel = True
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        with stats.timer('schema.validate'):
+            problems = self.validator.validate(self.index, self.data, isCancelled=lambda: self._cancel)
+        self.finished.emit(problems)
+
+
+class AssetIndexWorker(QtCore.QObject):
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, roots):
+        super().__init__()
+        self.roots = roots
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        try:
+            with stats.timer('assets.index'):
+                index = AssetIndex(self.roots, defaultIndexFile(self.roots))
+                index.load()
+                index.update()
+        except OSError as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(index)
+
+
+class JsonSaveWorker(QtCore.QObject):
+    progress = QtCore.pyqtSignal(int)
+    saved = QtCore.pyqtSignal(str, object)
+    failed = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+    def __init__(self, path, root, fragments=None):
+        super().__init__()
+        self.path = path
+        self.root = root
+        self.fragments = fragments
+        self._cancel = False
+        self._last = -1
+
+    def cancel(self):
+        self._cancel = True
+
+    def _report(self, percent):
+        if percent != self._last:
+            self._last = percent
+            self.progress.emit(percent)
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        used = {}
+        try:
+            with stats.timer('save.write', path=self.path):
+                saveJsonAtomic(self.path, self.root, self._report, lambda: self._cancel,
+                               self.fragments, used, rebase=True)
+        except LoadCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.saved.emit(self.path, used)
+
+
+class SearchWorker(QtCore.QObject):
+    finished = QtCore.pyqtSignal(object)
+    cancelled = QtCore.pyqtSignal()
+
+    def __init__(self, index, text, column, previous=None):
+        super().__init__()
+        self.index = index
+        self.text = text
+        self.column = column
+        self.previous = previous
+        self._cancel = False
+
+    def cancel(self):
+        self._cancel = True
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        try:
+            with stats.timer('search.query', query=self.text):
+                result = self.index.query(self.text, self.column, self.previous,
+                                          lambda: self._cancel)
+        except SearchCancelled:
+            self.cancelled.emit()
+        else:
+            self.finished.emit(result)
+
+
+class StatsPanel(QtWidgets.QDockWidget):
+    # timers and counters from catalog_stats, refreshed while visible
+    COLUMNS = ['Name', 'Count', 'Total ms', 'Mean ms', 'Max ms', 'Last ms']
+
+    def __init__(self, parent=None):
+        super().__init__('Stats', parent)
+        self.setObjectName('statsPanel')
+        w = QtWidgets.QWidget()
+        v = QtWidgets.QVBoxLayout(w)
+        self.table = QtWidgets.QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        v.addWidget(self.table)
+        h = QtWidgets.QHBoxLayout()
+        self.startup_label = QtWidgets.QLabel()
+        h.addWidget(self.startup_label)
+        h.addStretch()
+        reset = QtWidgets.QPushButton('Reset')
+        reset.clicked.connect(self.reset)
+        h.addWidget(reset)
+        export = QtWidgets.QPushButton('Export…')
+        export.clicked.connect(self.export)
+        h.addWidget(export)
+        v.addLayout(h)
+        self.setWidget(w)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.onVisibilityChanged)
+
+    def onVisibilityChanged(self, visible):
+        if visible:
+            stats.enable()
+            self.refresh()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def refresh(self):
+        rows = stats.snapshot()
+        self.table.setRowCount(len(rows))
+        for r, (name, n, total, longest, last) in enumerate(rows):
+            cells = [name, str(n)]
+            if total is None:
+                cells += ['', '', '', '']
+            else:
+                cells += [f'{total * 1000:.1f}', f'{total * 1000 / n:.1f}',
+                          f'{longest * 1000:.1f}', f'{last * 1000:.1f}']
+            for c, text in enumerate(cells):
+                item = QtWidgets.QTableWidgetItem(text)
+                if c:
+                    item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                self.table.setItem(r, c, item)
+        if stats.startup is not None:
+            self.startup_label.setText(f'Startup {stats.startup:.2f} s')
+
+    def reset(self):
+        stats.reset()
+        self.refresh()
+
+    def export(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Export stats', 'catalog_stats.jsonl',
+                                                        'JSON Lines (*.jsonl)')
+        if path:
+            stats.export(path)
+
+
+class PreviewPanel(QtWidgets.QDockWidget):
+    # thumbnail of the selected asset-name cell (or the selected card's
+    # imageName), resolved against the editor's Unity Assets folder
+    def __init__(self, editor):
+        super().__init__('Preview', editor)
+        self.setObjectName('previewPanel')
+        self.editor = editor
+        self.asset = None
+        w = QtWidgets.QWidget()
+        v = QtWidgets.QVBoxLayout(w)
+        self.image = QtWidgets.QLabel()
+        self.image.setAlignment(QtCore.Qt.AlignCenter)
+        self.image.setMinimumSize(THUMBNAIL_SIZE // 2, THUMBNAIL_SIZE // 2)
+        v.addWidget(self.image, 1)
+        self.caption = QtWidgets.QLabel()
+        self.caption.setWordWrap(True)
+        self.caption.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
+        v.addWidget(self.caption)
+        h = QtWidgets.QHBoxLayout()
+        choose = QtWidgets.QPushButton('Add Assets folder…')
+        choose.clicked.connect(editor.addAssetsFolder)
+        h.addWidget(choose)
+        forget = QtWidgets.QPushButton('Forget folders')
+        forget.clicked.connect(lambda: editor.setAssetsFolders([]))
+        h.addWidget(forget)
+        rescan = QtWidgets.QPushButton('Rescan')
+        rescan.clicked.connect(editor.rescanAssets)
+        h.addWidget(rescan)
+        h.addStretch()
+        v.addLayout(h)
+        self.setWidget(w)
+        editor.thumbnails.ready.connect(self.onReady)
+        self.visibilityChanged.connect(lambda visible: visible and self.refresh())
+
+    @staticmethod
+    def assetCell(node):
+        # (field, name) to preview for a selected node
+        if node is None:
+            return None
+        if node.key in ASSET_FOLDERS and not node.isContainer():
+            return node.key, node.value
+        if node.children is not None:
+            for c in node.children:
+                if c.key == 'imageName' and not c.isContainer():
+                    return c.key, c.value
+        elif isinstance(node.source, dict) and 'imageName' in node.source:
+            return 'imageName', node.source['imageName']
+        return None
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        self.asset = None
+        self.image.clear()
+        resolver = self.editor.assetResolver
+        current = self.editor.tree.currentIndex()
+        node = None
+        if current.isValid():
+            node = self.editor.proxy.sourceModel().nodeFromIndex(self.editor.proxy.mapToSource(current))
+        cell = self.assetCell(node)
+        if resolver is None:
+            self.caption.setText('No Unity Assets folder set')
+        elif cell is None:
+            self.caption.setText('')
+        else:
+            field, name = cell
+            self.asset = resolver.resolve(field, name)
+            if self.asset is None:
+                self.caption.setText(f"{name} is not in {' or '.join(resolver.folders(field))}")
+            else:
+                self.caption.setText(self.asset.path)
+                self.onReady(self.asset)
+
+    def onReady(self, asset):
+        if asset != self.asset or not self.isVisible():
+            return
+        pixmap = self.editor.thumbnails.pixmap(asset)
+        if pixmap is not None:
+            self.image.setPixmap(pixmap)
+        elif self.editor.thumbnails.failed(asset):
+            self.image.setText("Can't decode this image")
+
+
+SUMMARY_DELAY_MS = 300
+
+
+class ComparePanel(QtWidgets.QDockWidget):
+    # cards added / removed / moved / changed since another version of the
+    # catalog, old and new values side by side; double-click shows the card
+    COLORS = {'added': '#43A047', 'removed': '#E53935', 'moved': '#1E88E5', 'changed': '#FB8C00'}
+
+    def __init__(self, editor):
+        super().__init__('Compare', editor)
+        self.setObjectName('comparePanel')
+        self.editor = editor
+        self.diffs = []
+        self.otherPath = None
+        w = QtWidgets.QWidget()
+        v = QtWidgets.QVBoxLayout(w)
+        h = QtWidgets.QHBoxLayout()
+        choose = QtWidgets.QPushButton('Compare with…')
+        choose.clicked.connect(editor.compareWith)
+        h.addWidget(choose)
+        self.save = QtWidgets.QPushButton('Save report…')
+        self.save.clicked.connect(self.saveReport)
+        self.save.setEnabled(False)
+        h.addWidget(self.save)
+        h.addStretch()
+        v.addLayout(h)
+        self.caption = QtWidgets.QLabel()
+        v.addWidget(self.caption)
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setHeaderLabels(['Card / field', 'Old', 'New'])
+        self.tree.setUniformRowHeights(True)
+        self.tree.itemDoubleClicked.connect(self.onItemDoubleClicked)
+        v.addWidget(self.tree, 1)
+        self.setWidget(w)
+
+    @staticmethod
+    def _value(value):
+        return '' if value is MISSING else str(value)
+
+    def showDiffs(self, path, diffs):
+        self.otherPath, self.diffs = path, diffs
+        self.tree.clear()
+        counts = {kind: 0 for kind in CARD_KINDS}
+        for d in diffs:
+            counts[d.kind] += 1
+        self.caption.setText(f'{os.path.basename(path)} → current: ' +
+                             ', '.join(f'{n} {kind}' for kind, n in counts.items()))
+        # a QTreeWidget this size is slow to fill; the report has them all
+        items = []
+        for d in diffs[:COMPARE_MAX_CARDS]:
+            item = QtWidgets.QTreeWidgetItem([f'{d.kind}: {d.key[0]} ({d.key[1]})',
+                                              cardLocation(d.old), cardLocation(d.new)])
+            item.setForeground(0, QtGui.QColor(self.COLORS[d.kind]))
+            item.setData(0, QtCore.Qt.UserRole, d.new)
+            for field, before, after in d.fields:
+                child = QtWidgets.QTreeWidgetItem([field, self._value(before), self._value(after)])
+                child.setData(0, QtCore.Qt.UserRole, d.new)
+                item.addChild(child)
+            items.append(item)
+        if len(diffs) > COMPARE_MAX_CARDS:
+            items.append(QtWidgets.QTreeWidgetItem(
+                [f'… {len(diffs) - COMPARE_MAX_CARDS} more cards, see the report']))
+        self.tree.addTopLevelItems(items)
+        self.tree.resizeColumnToContents(0)
+        self.save.setEnabled(True)
+        self.show()
+        self.raise_()
+
+    def onItemDoubleClicked(self, item, column):
+        at = item.data(0, QtCore.Qt.UserRole)
+        if at is not None:
+            self.editor.revealCard(at)
+
+    def saveReport(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Save report', 'catalog_diff.txt',
+                                                        'Text (*.txt)')
+        if path:
+            with open(path, 'w', encoding='utf-8') as out:
+                writeReport(self.diffs, out)
+
+
+class ExportDialog(QtWidgets.QDialog):
+    # where and how "Export for Unity" writes; remembered between runs
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Export for Unity')
+        settings = editorSettings()
+        form = QtWidgets.QFormLayout(self)
+        row = QtWidgets.QHBoxLayout()
+        self.folder = QtWidgets.QLineEdit(settings.value('exportFolder', '', type=str))
+        self.folder.setPlaceholderText('Assets/StreamingAssets')
+        browse = QtWidgets.QPushButton('…')
+        browse.clicked.connect(self.browse)
+        row.addWidget(self.folder)
+        row.addWidget(browse)
+        form.addRow('Folder', row)
+        self.name = QtWidgets.QLineEdit(settings.value('exportName', 'catalog', type=str))
+        form.addRow('Name', self.name)
+        self.split = QtWidgets.QCheckBox('One file per section, with an index manifest')
+        self.split.setChecked(settings.value('exportSplit', False, type=bool))
+        self.gzip = QtWidgets.QCheckBox('gzip')
+        self.gzip.setChecked(settings.value('exportGzip', True, type=bool))
+        self.brotli = QtWidgets.QCheckBox('brotli')
+        self.brotli.setChecked(settings.value('exportBrotli', True, type=bool))
+        if catalog_export.brotli is None:
+            self.brotli.setChecked(False)
+            self.brotli.setEnabled(False)
+            self.brotli.setToolTip('needs the brotli package')
+        form.addRow(self.split)
+        compressed = QtWidgets.QHBoxLayout()
+        compressed.addWidget(self.gzip)
+        compressed.addWidget(self.brotli)
+        form.addRow('Precompressed', compressed)
+        buttons = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        form.addRow(buttons)
+
+    def browse(self):
+        folder = QtWidgets.QFileDialog.getExistingDirectory(self, 'Export to', self.folder.text())
+        if folder:
+            self.folder.setText(folder)
+
+    def accept(self):
+        if not self.folder.text().strip() or not self.name.text().strip():
+            return
+        settings = editorSettings()
+        settings.setValue('exportFolder', self.folder.text().strip())
+        settings.setValue('exportName', self.name.text().strip())
+        settings.setValue('exportSplit', self.split.isChecked())
+        settings.setValue('exportGzip', self.gzip.isChecked())
+        if self.brotli.isEnabled():
+            settings.setValue('exportBrotli', self.brotli.isChecked())
+        super().accept()
+
+    def options(self):
+        formats = [f for f, box in (('gzip', self.gzip), ('br', self.brotli)) if box.isChecked()]
+        return {'name': self.name.text().strip(), 'split': self.split.isChecked(), 'formats': formats}
+
+
+class SummaryPanel(QtWidgets.QDockWidget):
+    # card count, price/area figures and type/size breakdown for the whole
+    # catalog, each section and the cards the filter shows; the sections
+    # are kept up to date by catalog_aggregate, the panel only redraws
+    # (shortly after a change, while visible)
+    COLUMNS = ['Group', 'Cards'] + [f'{name.capitalize()} {what}' for name in AGGREGATE_NUMBERS
+                                    for what in ('min', 'median', 'mean', 'max')]
+
+    def __init__(self, editor):
+        super().__init__('Summary', editor)
+        self.setObjectName('summaryPanel')
+        self.editor = editor
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setHeaderLabels(self.COLUMNS)
+        self.tree.setUniformRowHeights(True)
+        self.setWidget(self.tree)
+        self.aggregates = None
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(SUMMARY_DELAY_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.onVisibilityChanged)
+        editor.proxy.filterChanged.connect(self.schedule)
+        editor.proxy.sourceModelChanged.connect(self.schedule)
+
+    def onVisibilityChanged(self, visible):
+        if visible:
+            self.refresh()
+
+    def schedule(self, *args):
+        if self.isVisible():
+            self.timer.start()
+
+    def _aggregates(self, store):
+        if self.aggregates is None or self.aggregates.store is not store:
+            if self.aggregates is not None:
+                self.aggregates.detach()
+                self.aggregates.store.watchers.remove(self.schedule)
+            with stats.timer('summary.build', cards=len(store)):
+                self.aggregates = SectionAggregates(store)
+            store.watchers.append(self.schedule)
+        return self.aggregates
+
+    @staticmethod
+    def sectionNodes(model):
+        for node in model.root.children:
+            if node.key == 'sections' and isinstance(node.source, list):
+                return [s for s in model.fetchNode(node) if s.isContainer()]
+        return []
+
+    @staticmethod
+    def sectionTitle(node):
+        if node.children is not None:
+            title = next((c.text for c in node.children if c.key == 'title'), None)
+        else:
+            title = node.source.get('title') if isinstance(node.source, dict) else None
+        return title if title is not None else node.key
+
+    def refresh(self):
+        self.timer.stop()
+        if not self.isVisible():
+            return
+        with stats.timer('summary.refresh'):
+            model = self.editor.proxy.sourceModel()
+            store = model.cardStore()
+            aggregates = self._aggregates(store)
+            groups = [('All cards', aggregates.total)]
+            groups += [(self.sectionTitle(node), aggregates.section(node.nid) or Summary())
+                       for node in self.sectionNodes(model)]
+            proxy = self.editor.proxy
+            if proxy.filterString:
+                rows = filterRows(store, proxy.matches())
+                groups.append((f'Filter: {proxy.filterString}', Summary.ofRows(store, rows)))
+            self.fill(groups, store)
+
+    def fill(self, groups, store):
+        # rebuilt each time; what was expanded stays expanded
+        tree = self.tree
+        expanded = {tree.topLevelItem(i).text(0) for i in range(tree.topLevelItemCount())
+                    if tree.topLevelItem(i).isExpanded()}
+        tree.setUpdatesEnabled(False)
+        tree.clear()
+        right = QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter
+        for title, summary in groups:
+            cells = [title, str(summary.count)]
+            for name in AGGREGATE_NUMBERS:
+                for value in (summary.minimum(name), summary.median(name),
+                              summary.mean(name), summary.maximum(name)):
+                    cells.append('' if value is None else f'{value:,.0f}')
+            item = QtWidgets.QTreeWidgetItem(cells)
+            for c in range(1, len(cells)):
+                item.setTextAlignment(c, right)
+            for name in AGGREGATE_TEXTS:
+                values = store.textValues(name)
+                for code, n in summary.breakdown[name].most_common():
+                    label = values[code] if code >= 0 else '(none)'
+                    child = QtWidgets.QTreeWidgetItem([f'{name}: {label}', str(n)])
+                    child.setTextAlignment(1, right)
+                    item.addChild(child)
+            tree.addTopLevelItem(item)
+            item.setExpanded(title in expanded)
+        tree.setUpdatesEnabled(True)
+
+
+class JsonEditor(QtWidgets.QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.current_theme = 'light'
+        self.init_ui()
+        self.apply_theme()
+
+    def init_ui(self):
+        self.setWindowTitle('JSON Catalog Editor')
+        self.resize(900, 650)
+
+        # Toolbar
+        tb = self.addToolBar('Main')
+        tb.setMovable(False)
+        icon_open = self.style().standardIcon(QtWidgets.QStyle.SP_DialogOpenButton)
+        icon_save = self.style().standardIcon(QtWidgets.QStyle.SP_DialogSaveButton)
+
+        # Open & Save
+        a_open = QtWidgets.QAction(icon_open, 'Open', self)
+        a_open.triggered.connect(self.openFile)
+        tb.addAction(a_open)
+        a_save = QtWidgets.QAction(icon_save, 'Save', self)
+        a_save.triggered.connect(self.saveFile)
+        tb.addAction(a_save)
+
+        # Undo & Redo
+        self.undo_act = QtWidgets.QAction('Undo', self)
+        self.undo_act.setShortcut(QtGui.QKeySequence.Undo)
+        self.undo_act.triggered.connect(self.undo)
+        tb.addAction(self.undo_act)
+        self.redo_act = QtWidgets.QAction('Redo', self)
+        self.redo_act.setShortcut(QtGui.QKeySequence.Redo)
+        self.redo_act.triggered.connect(self.redo)
+        tb.addAction(self.redo_act)
+
+        tb.addSeparator()
+        # Collapse & Expand
+        a_collapse = QtWidgets.QAction('Collapse All', self)
+        a_collapse.triggered.connect(lambda: self.tree.collapseAll())
+        tb.addAction(a_collapse)
+        a_expand = QtWidgets.QAction('Expand All', self)
+        a_expand.triggered.connect(self.expandAll)
+        tb.addAction(a_expand)
+
+        tb.addSeparator()
+        # Search input
+        self.search_input = QtWidgets.QLineEdit()
+        self.search_input.setPlaceholderText('Search...')
+        tb.addWidget(self.search_input)
+
+        # Options dropdown
+        btn_opts = QtWidgets.QToolButton(self)
+        btn_opts.setText('Options')
+        btn_opts.setPopupMode(QtWidgets.QToolButton.InstantPopup)
+        menu = QtWidgets.QMenu(btn_opts)
+        w = QtWidgets.QWidget()
+        ly = QtWidgets.QVBoxLayout(w)
+        g1 = QtWidgets.QGroupBox('Search In')
+        h1 = QtWidgets.QHBoxLayout(g1)
+        rbV = QtWidgets.QRadioButton('Values')
+        rbK = QtWidgets.QRadioButton('Keys')
+        rbV.setChecked(True)
+        h1.addWidget(rbV)
+        h1.addWidget(rbK)
+        ly.addWidget(g1)
+        g2 = QtWidgets.QGroupBox('Show')
+        h2 = QtWidgets.QHBoxLayout(g2)
+        rbLine = QtWidgets.QRadioButton('Line Only')
+        rbCard = QtWidgets.QRadioButton('Whole Card')
+        rbCard.setChecked(True)
+        h2.addWidget(rbLine)
+        h2.addWidget(rbCard)
+        ly.addWidget(g2)
+        actW = QtWidgets.QWidgetAction(menu)
+        actW.setDefaultWidget(w)
+        menu.addAction(actW)
+        btn_opts.setMenu(menu)
+        tb.addWidget(btn_opts)
+
+        tb.addSeparator()
+        # Theme toggles
+        theme_act = QtWidgets.QAction('Toggle Theme', self)
+        theme_act.triggered.connect(self.toggle_theme)
+        tb.addAction(theme_act)
+
+        # opt-in timings; showing the panel turns collection on
+        self.stats_panel = StatsPanel(self)
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.stats_panel)
+        self.stats_panel.setVisible(stats.enabled)
+        stats_act = self.stats_panel.toggleViewAction()
+        stats_act.setText('Stats')
+        tb.addAction(stats_act)
+
+        # Central
+        self.proxy = TreeFilterProxyModel(self)
+
+        # per-section card figures, only computed once the panel is shown
+        self.summary_panel = SummaryPanel(self)
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.summary_panel)
+        self.summary_panel.hide()
+        summary_act = self.summary_panel.toggleViewAction()
+        summary_act.setText('Summary')
+        tb.addAction(summary_act)
+
+        # asset-name cells resolved against a Unity Assets folder
+        self.assetResolver = None
+        self.thumbnails = ThumbnailCache(parent=self)
+        self.preview_panel = PreviewPanel(self)
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.preview_panel)
+        self.preview_panel.hide()
+        preview_act = self.preview_panel.toggleViewAction()
+        preview_act.setText('Preview')
+        tb.addAction(preview_act)
+        check_act = QtWidgets.QAction('Check Assets', self)
+        check_act.triggered.connect(self.checkAssets)
+        tb.addAction(check_act)
+
+        # CatalogLoader's expectations, checked in full after a load and
+        # then object by object as cards and sections are edited
+        self.validator = Validator()
+        self._schemaWorker = None
+        self._schemaMarks = {}      # object row id → (mark keys, problem count)
+        self._schemaPending = None  # edits made while the worker runs
+        self._schemaReady = False
+        self.schemaProblems = 0
+        validate_act = QtWidgets.QAction('Validate', self)
+        validate_act.triggered.connect(self.validateSchema)
+        tb.addAction(validate_act)
+
+        # what changed since another version of the catalog
+        self._compareWorker = None
+        self.compare_panel = ComparePanel(self)
+        self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, self.compare_panel)
+        self.compare_panel.hide()
+        compare_act = self.compare_panel.toggleViewAction()
+        compare_act.setText('Compare')
+        tb.addAction(compare_act)
+
+        # minified, split and precompressed files for the Unity projects
+        self._exportWorker = None
+        export_act = QtWidgets.QAction('Export for Unity…', self)
+        export_act.triggered.connect(self.exportForUnity)
+        tb.addAction(export_act)
+
+        # the open catalog over HTTP, for a WebGL build to load while editing
+        self.server = None
+        self._serveVersion = 0
+        self.serve_timer = QtCore.QTimer(self)
+        self.serve_timer.setSingleShot(True)
+        self.serve_timer.setInterval(SERVE_PUBLISH_MS)
+        self.serve_timer.timeout.connect(self.publishCatalog)
+        self.serve_act = QtWidgets.QAction('Serve', self)
+        self.serve_act.setCheckable(True)
+        self.serve_act.toggled.connect(self.toggleServer)
+        tb.addAction(self.serve_act)
+        self.stack = QtWidgets.QStackedWidget()
+        self.setCentralWidget(self.stack)
+        self.drop = DropArea()
+        self.stack.addWidget(self.drop)
+        page = QtWidgets.QWidget()
+        v = QtWidgets.QVBoxLayout(page)
+        self.tree = QtWidgets.QTreeView()
+        # rows are one line each (thumbnails are drawn at text height), so
+        # the view lays out only what's on screen instead of asking every
+        # row's size hint
+        self.tree.setUniformRowHeights(True)
+        v.addWidget(self.tree)
+        self.stack.addWidget(page)
+
+        # persistent line‐edit under the tree for the “Value” column
+        self.bottom_edit = QtWidgets.QLineEdit(self)
+        self.bottom_edit.setPlaceholderText("Edit selected value …")
+        self.bottom_edit.setMinimumHeight(24)
+        v.addWidget(self.bottom_edit)
+
+
+        # tree ↔ proxy wiring is done once; loading only swaps the source model
+        self.proxy.sourceModelChanged.connect(self.onSourceModelChanged)
+        self.proxy.setSourceModel(JsonModel())
+        self.tree.setModel(self.proxy)
+        hdr = self.tree.header()
+        hdr.setSectionResizeMode(0, QtWidgets.QHeaderView.Interactive)
+        hdr.setSectionResizeMode(1, QtWidgets.QHeaderView.Stretch)
+        self.tree.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.tree.customContextMenuRequested.connect(self.openMenu)
+        # install plus‐button decorator on column 0
+        self.delegate = PlusButtonDelegate(self)
+        self.tree.setItemDelegateForColumn(0, self.delegate)
+        self.valueDelegate = ValueDelegate(self)
+        self.valueDelegate.thumbnails = self.thumbnails
+        self.tree.setItemDelegateForColumn(1, self.valueDelegate)
+        self.thumbnails.ready.connect(lambda _: self.tree.viewport().update())
+        self.assetIndex = None
+        self._assetWorker = None
+        self.setAssetsFolders(editorSettings().value('assetsFolders', [], type=list)
+                              or assetRootsFromEnvironment(), False)
+        self.tree.selectionModel().currentChanged.connect(self.onSelectionChanged)
+        self.bottom_edit.textChanged.connect(self.onBottomEdited)
+
+        # load/save progress + cancel, only visible while one is running
+        self.task_progress = QtWidgets.QProgressBar()
+        self.task_progress.setRange(0, 100)
+        self.task_progress.setMaximumWidth(200)
+        self.task_cancel = QtWidgets.QPushButton('Cancel')
+        self.task_cancel.clicked.connect(self.cancelTasks)
+        self.statusBar().addPermanentWidget(self.task_progress)
+        self.statusBar().addPermanentWidget(self.task_cancel)
+        self.task_progress.hide()
+        self.task_cancel.hide()
+        self._loadWorker = None
+        self._saveWorker = None
+        self._saveAgain = False
+
+        # searching waits for a pause in typing and runs off the GUI thread
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.startSearch)
+        self._searchWorker = None
+        self._workers = {}
+
+        # the open file (and its folder, which sees atomic replaces) is
+        # watched; changes made elsewhere are patched into the tree
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.onFileChanged)
+        self.watcher.directoryChanged.connect(self.onFileChanged)
+        self.reload_timer = QtCore.QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DELAY_MS)
+        self.reload_timer.timeout.connect(self.reloadFromDisk)
+        self._reloadWorker = None
+        self._diskStamp = None
+
+        # unsaved edits go to a journal next to the file, so they survive
+        # a crash
+        self.journal_timer = QtCore.QTimer(self)
+        self.journal_timer.setInterval(JOURNAL_FLUSH_MS)
+        self.journal_timer.timeout.connect(self.flushJournal)
+        self.journal_timer.start()
+
+        # Signals
+        self.drop.fileDropped.connect(self.loadJson)
+        self.search_input.textChanged.connect(lambda _: self.search_timer.start())
+        rbK.toggled.connect(lambda f: self.setSearchInKeys(f))
+        rbV.toggled.connect(lambda f: self.setSearchInKeys(not f))
+        rbLine.toggled.connect(lambda f: self.proxy.setShowWholeCard(not f))
+        rbCard.toggled.connect(lambda f: self.proxy.setShowWholeCard(f))
+
+        self.current_path = None
+
+    def assetRoots(self):
+        return list(self.assetResolver.roots) if self.assetResolver is not None else []
+
+    def setAssetsFolders(self, paths, remember=True):
+        paths = [p for p in paths if p and os.path.isdir(p)]
+        self.assetResolver = AssetResolver(paths) if paths else None
+        self.valueDelegate.resolver = self.assetResolver
+        self.assetIndex = None
+        if remember:
+            editorSettings().setValue('assetsFolders', paths)
+        self.thumbnails.clear()
+        self.tree.viewport().update()
+        self.preview_panel.refresh()
+
+    def addAssetsFolder(self):
+        roots = self.assetRoots()
+        path = QtWidgets.QFileDialog.getExistingDirectory(self, 'Unity Assets folder',
+                                                          roots[0] if roots else '')
+        if path:
+            self.setAssetsFolders(roots + [os.path.abspath(path)])
+
+    def rescanAssets(self):
+        # files were added / replaced in the Unity project
+        if self.assetResolver is not None:
+            self.assetResolver.refresh()
+        self.tree.viewport().update()
+        self.preview_panel.refresh()
+
+    def checkAssets(self):
+        # index the Assets folders off-thread (only changed folders are
+        # re-listed), then flag every card whose imageName/mapImageName is
+        # missing or ambiguous
+        if not self.assetRoots():
+            self.addAssetsFolder()
+        roots = self.assetRoots()
+        if not roots or self._assetWorker is not None:
+            return
+        worker = AssetIndexWorker(roots)
+        worker.finished.connect(self.onAssetIndexReady)
+        worker.failed.connect(self.onAssetIndexFailed)
+        self._assetWorker = worker
+        self.statusBar().showMessage('Indexing Unity assets …')
+        self._startWorker(worker, worker.finished, worker.failed)
+
+    def onAssetIndexFailed(self, message):
+        self._assetWorker = None
+        self.statusBar().showMessage(f'Asset check failed: {message}', 5000)
+
+    def onAssetIndexReady(self, index):
+        self._assetWorker = None
+        if index.roots != self.assetRoots():
+            return
+        self.assetIndex = index
+        model = self.proxy.sourceModel()
+        marks, counts = {}, {'missing': 0, 'duplicate': 0}
+        with stats.timer('assets.check'):
+            store = model.cardStore()
+            for row, field, kind, message in storeAssetProblems(store, index):
+                card = store.nids[row]
+                marks[(card, field)] = message
+                marks[card] = f"{marks[card]}\n{message}" if card in marks else message
+                counts[kind] += 1
+        model.setMarks('assets', marks)
+        self.tree.viewport().update()
+        self.statusBar().showMessage(
+            f"{counts['missing']} missing, {counts['duplicate']} ambiguous asset references "
+            f"({len(index.names)} assets, {index.listed} folders re-listed)")
+
+    def compareWith(self, path=None):
+        if not path:
+            path, _ = QtWidgets.QFileDialog.getOpenFileName(
+                self, 'Compare with', os.path.dirname(self.current_path or ''), 'JSON Files (*.json)')
+        if not path or self._compareWorker is not None:
+            return
+        root = self.proxy.sourceModel().root.clone()
+        worker = CompareWorker(path, root)
+        worker.finished.connect(self.onCompareFinished)
+        worker.failed.connect(self.onCompareFailed)
+        self._compareWorker = worker
+        self.statusBar().showMessage(f'Comparing with {os.path.basename(path)} …')
+        self._startWorker(worker, worker.finished, worker.failed)
+
+    def onCompareFailed(self, message):
+        self._compareWorker = None
+        self.statusBar().showMessage(f'Compare failed: {message}', 5000)
+
+    def onCompareFinished(self, diffs):
+        path = self._compareWorker.path
+        self._compareWorker = None
+        self.statusBar().clearMessage()
+        self.compare_panel.showDiffs(path, diffs)
+
+    def exportForUnity(self):
+        if self._exportWorker is not None:
+            return
+        dialog = ExportDialog(self)
+        if dialog.exec_() != QtWidgets.QDialog.Accepted:
+            return
+        options = dialog.options()
+        path = self.current_path
+        model = self.proxy.sourceModel()
+        # the saved file's size is the baseline, unless there are unsaved edits
+        if path and not (model.editedCells or model.insertedNodes or model.removedRows):
+            options['sourceBytes'] = os.path.getsize(path) if os.path.exists(path) else None
+        worker = ExportWorker(model.root.clone(), dialog.folder.text().strip(), options)
+        worker.finished.connect(self.onExportFinished)
+        worker.failed.connect(self.onExportFailed)
+        self._exportWorker = worker
+        self.statusBar().showMessage(f'Exporting to {worker.folder} …')
+        self._startWorker(worker, worker.finished, worker.failed)
+
+    def onExportFailed(self, message):
+        self._exportWorker = None
+        self.statusBar().clearMessage()
+        QtWidgets.QMessageBox.warning(self, 'Error', f'Export failed:\n{message}')
+
+    def onExportFinished(self, report):
+        folder = self._exportWorker.folder
+        self._exportWorker = None
+        self.statusBar().showMessage(f'Exported to {folder} in {report.seconds:.1f} s', 5000)
+        QtWidgets.QMessageBox.information(self, 'Export for Unity', '\n'.join(report.lines()))
+
+    def toggleServer(self, on):
+        if not on:
+            if self.server is not None:
+                self.server.stop()
+                self.server = None
+                self.statusBar().showMessage('Catalog server stopped', 3000)
+            return
+        port = editorSettings().value('servePort', SERVE_PORT, type=int)
+        try:
+            self.server = CatalogServer(port=port).start()
+        except OSError as e:
+            self.serve_act.blockSignals(True)
+            self.serve_act.setChecked(False)
+            self.serve_act.blockSignals(False)
+            QtWidgets.QMessageBox.warning(self, 'Error', f'Could not serve on port {port}:\n{e}')
+            return
+        self.publishCatalog()
+        self.serve_act.setToolTip(f'Serving at {self.server.url}')
+        self.statusBar().showMessage(f'Serving the catalog at {self.server.url}', 5000)
+
+    def schedulePublish(self, *_):
+        if self.server is not None:
+            self.serve_timer.start()
+
+    def publishCatalog(self):
+        # only edited branches are copied; the server encodes off this thread
+        self.serve_timer.stop()
+        if self.server is None:
+            return
+        self._serveVersion += 1
+        self.server.publish(snapshotTree(self.proxy.sourceModel().root), self._serveVersion)
+
+    def revealCard(self, at):
+        # select the card at (section index, card index) in the tree
+        model = self.proxy.sourceModel()
+        node = model.root
+        for step in ('sections', at[0], 'cards', at[1]):
+            children = model.fetchNode(node) if node.isContainer() else []
+            if isinstance(step, int):
+                node = children[step] if step < len(children) else None
+            else:
+                node = next((c for c in children if c.key == step), None)
+            if node is None:
+                return
+        index = self.proxy.mapFromSource(model.indexFromNode(node))
+        if index.isValid():
+            self.tree.expand(index)
+            self.tree.setCurrentIndex(index)
+            self.tree.scrollTo(index)
+
+    def onSourceModelChanged(self):
+        model = self.proxy.sourceModel()
+        model.dataChanged.connect(self.onModelDataChanged)
+        model.rowsInserted.connect(self.onModelRowsInserted)
+        model.rowsRemoved.connect(self.onModelRowsRemoved)
+        model.historyChanged.connect(self.updateHistoryActions)
+        model.journalFailed.connect(self.onJournalFailed)
+        for signal in (model.dataChanged, model.rowsInserted, model.rowsRemoved, model.modelReset):
+            signal.connect(self.schedulePublish)
+        self.updateHistoryActions()
+        self.publishCatalog()
+
+    def updateHistoryActions(self):
+        history = self.proxy.sourceModel().history
+        self.undo_act.setEnabled(history.canUndo())
+        self.undo_act.setText(f'Undo {history.undoText()}'.strip())
+        self.redo_act.setEnabled(history.canRedo())
+        self.redo_act.setText(f'Redo {history.redoText()}'.strip())
+
+    def undo(self):
+        self._revert(self.proxy.sourceModel().undo, 'Undid')
+
+    def redo(self):
+        self._revert(self.proxy.sourceModel().redo, 'Redid')
+
+    def _revert(self, method, done):
+        if self._loadWorker is not None:
+            return
+        with stats.timer('model.undo'):
+            step = method()
+        if step is None:
+            return
+        self.updateHistoryActions()
+        # show where it happened: the row edited, put back or removed
+        model = self.proxy.sourceModel()
+        op = step.ops[0]
+        node = model.root
+        for r in op['p'] + ([op['r']] if 'r' in op else []):
+            children = model.fetchNode(node) if node.isContainer() else []
+            if r >= len(children):
+                break
+            node = children[r]
+        if node is not model.root:
+            index = self.proxy.mapFromSource(model.indexFromNode(node))
+            if index.isValid():
+                self.tree.setCurrentIndex(index)
+                self.tree.scrollTo(index)
+                self.onSelectionChanged(index, index)
+        self.statusBar().showMessage(f'{done} {step.text.lower()}', 3000)
+
+    def onModelDataChanged(self, topLeft, bottomRight, roles=()):
+        # edited values are re-checked: asset names against the last asset
+        # index, their card or section against the schema; renumbered
+        # list keys (column 0) change neither
+        if bottomRight.column() == 0:
+            return
+        model = self.proxy.sourceModel()
+        parent = topLeft.parent()
+        for row in range(topLeft.row(), bottomRight.row() + 1):
+            node = model.nodeFromIndex(model.index(row, 0, parent))
+            if self.assetIndex is not None and node.key in RESOURCE_PATHS \
+                    and node.parent is not None and node.parent.nid is not None:
+                self.recheckAsset(model, node)
+            self.revalidate(node)
+
+    def onModelRowsInserted(self, parent, first, last):
+        # new cards / sections are checked with everything under them, a
+        # new field re-checks the object it was added to
+        model = self.proxy.sourceModel()
+        children = model.nodeFromIndex(parent).children
+        for node in children[first:last + 1]:
+            self.revalidate(node, whole=True)
+
+    def onModelRowsRemoved(self, parent, first, last):
+        self.revalidate(self.proxy.sourceModel().nodeFromIndex(parent))
+
+    def validateSchema(self):
+        # the whole catalog on a worker; edits made meanwhile are re-checked
+        # once it's done
+        model = self.proxy.sourceModel()
+        if self._schemaWorker is not None:
+            self._schemaWorker.cancel()
+        self._schemaMarks = {}
+        self.schemaProblems = 0
+        model.setMarks('schema', None)
+        self._schemaPending = []
+        self._schemaReady = False
+        # indexing first gives the snapshot its row ids
+        index = model.searchIndex()
+        root = model.root.clone()
+        worker = SchemaWorker(self.validator, index, root)
+        worker.model = model
+        worker.finished.connect(self.onSchemaFinished)
+        self._schemaWorker = worker
+        self._startWorker(worker, worker.finished)
+
+    def onSchemaFinished(self, problems):
+        worker = self.sender()
+        if worker is not self._schemaWorker:
+            return
+        self._schemaWorker = None
+        pending, self._schemaPending = self._schemaPending, None
+        model = self.proxy.sourceModel()
+        if problems is None or worker.model is not model:
+            return
+        self._schemaReady = True
+        for nid, found in problems.items():
+            self.setSchemaProblems(model, nid, found)
+        for node, whole in pending:
+            self.revalidate(node, whole)
+        self.tree.viewport().update()
+        self.statusBar().showMessage(f'{self.schemaProblems} schema problems', 5000)
+
+    def revalidate(self, node, whole=False):
+        # re-check only the card / section / root holding `node`, or with
+        # `whole` a new object and everything under it
+        if self._schemaPending is not None:
+            self._schemaPending.append((node, whole))
+            return
+        if not self._schemaReady:
+            return
+        model = self.proxy.sourceModel()
+        obj, level = self.validator.objectOf(node)
+        if whole and obj is node:
+            problems = self.validator.validate(model.searchIndex(), node, node.nid, level)
+            for nid, found in problems.items():
+                self.setSchemaProblems(model, nid, found)
+        else:
+            self.setSchemaProblems(model, -1 if obj is model.root else obj.nid,
+                                   self.validator.check(obj, level))
+        self.tree.viewport().update()
+
+    def setSchemaProblems(self, model, nid, problems):
+        # marks for one object's problems, replacing its previous ones: the
+        # object's row lists them all, each bad field's row its own
+        marks = model.marks('schema')
+        keys, count = self._schemaMarks.pop(nid, ((), 0))
+        for key in keys:
+            marks.pop(key, None)
+        self.schemaProblems -= count
+        if not problems:
+            return
+        rowId = None if nid < 0 else nid
+        keys = [rowId]
+        for field, message in problems:
+            if field is not None:
+                keys.append((rowId, field))
+                marks[(rowId, field)] = message
+                message = f'{field}: {message}'
+            marks[rowId] = f'{marks[rowId]}\n{message}' if rowId in marks else message
+        self._schemaMarks[nid] = (keys, len(problems))
+        self.schemaProblems += len(problems)
+
+    def recheckAsset(self, model, node):
+        card = node.parent.nid
+        marks = model.marks('assets')
+        name = node.value
+        problem = None
+        if isinstance(name, str) and name.strip():
+            problem = self.assetIndex.problem(node.key, name)
+        if problem is not None:
+            marks[(card, node.key)] = problem[1]
+        else:
+            marks.pop((card, node.key), None)
+        messages = [marks[(card, f)] for f in RESOURCE_PATHS if (card, f) in marks]
+        if messages:
+            marks[card] = '\n'.join(messages)
+        else:
+            marks.pop(card, None)
+
+    def apply_theme(self):
+        self.setStyleSheet(light_qss if self.current_theme == 'light' else dark_qss)
+
+    def toggle_theme(self):
+        self.current_theme = 'dark' if self.current_theme == 'light' else 'light'
+        self.apply_theme()
+
+    def openFile(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open JSON', '', 'JSON Files (*.json)')
+        if path:
+            self.loadJson(path)
+
+    def loadJson(self, path):
+        # parsing runs on a worker thread; the current model stays usable
+        # until the new one is ready and swapped in
+        self.cancelLoad()
+        worker = JsonLoadWorker(path)
+        worker.progress.connect(self.onLoadProgress)
+        worker.loaded.connect(self.onLoadFinished)
+        worker.failed.connect(self.onLoadFailed)
+        worker.cancelled.connect(self.onLoadCancelled)
+        self._loadWorker = worker
+        self._loadPath = path
+        self._loadStart = time.perf_counter()
+        self.onLoadProgress(0)
+        self._updateTaskWidgets()
+        self._startWorker(worker, worker.loaded, worker.failed, worker.cancelled)
+
+    def _startWorker(self, worker, *doneSignals):
+        # the worker stays referenced until its thread has really finished,
+        # even if the editor stopped caring about its result
+        thread = QtCore.QThread(self)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        for sig in doneSignals:
+            sig.connect(thread.quit)
+        thread.finished.connect(self._reapWorker)
+        self._workers[thread] = worker
+        thread.start()
+
+    def _reapWorker(self):
+        thread = self.sender()
+        self._workers.pop(thread, None)
+        thread.deleteLater()
+
+    def cancelLoad(self):
+        if self._loadWorker is not None:
+            self._loadWorker.cancel()
+            self._endLoad()
+            self.statusBar().showMessage('Load cancelled', 3000)
+
+    def cancelTasks(self):
+        self.cancelLoad()
+        self.cancelSave()
+
+    def _updateTaskWidgets(self):
+        busy = self._loadWorker is not None or self._saveWorker is not None
+        self.task_progress.setVisible(busy)
+        self.task_cancel.setVisible(busy)
+
+    def _endLoad(self):
+        self._loadWorker = None
+        self._updateTaskWidgets()
+        self.drop.reset()
+
+    def _isCurrentLoad(self):
+        # results from a cancelled / superseded worker are dropped
+        return self._loadWorker is not None and self.sender() is self._loadWorker
+
+    def onLoadProgress(self, percent):
+        if self._loadWorker is not None and self.sender() not in (None, self._loadWorker):
+            return
+        name = os.path.basename(self._loadPath)
+        self.task_progress.setValue(percent)
+        self.statusBar().showMessage(f'Loading {name} …')
+        self.drop.showProgress(f'Loading {name} … {percent}%')
+
+    def onLoadFailed(self, message):
+        if not self._isCurrentLoad():
+            return
+        self._endLoad()
+        self.statusBar().clearMessage()
+        QtWidgets.QMessageBox.warning(self, 'Error', f'Failed to load JSON:\n{message}')
+
+    def onLoadCancelled(self):
+        if self._isCurrentLoad():
+            self._endLoad()
+
+    def setSearchInKeys(self, flag):
+        self.proxy.searchInKeys = flag
+        self.startSearch()
+
+    def startSearch(self):
+        self.search_timer.stop()
+        self.cancelSearch()
+        text = self.search_input.text().lower()
+        if not text:
+            self.proxy.setSearchResult(None)
+            return
+        try:
+            query = parseQuery(text)
+        except QueryError as e:
+            # searched as plain text instead
+            self.statusBar().showMessage(f'Query: {e}', 5000)
+            query = None
+        if query is not None:
+            # vectorised over the card store, fast enough for the GUI thread
+            model = self.proxy.sourceModel()
+            with stats.timer('search.cardQuery', query=text):
+                result = query.result(text, model.searchIndex(), model.cardStore())
+            self.proxy.setSearchResult(result)
+            self.statusBar().showMessage(f'{result.hit.count(1)} cards match', 3000)
+            return
+        col = 0 if self.proxy.searchInKeys else 1
+        worker = SearchWorker(self.proxy.sourceModel().searchIndex(), text, col,
+                              self.proxy.currentResult())
+        worker.finished.connect(self.onSearchFinished)
+        self._searchWorker = worker
+        self._startWorker(worker, worker.finished, worker.cancelled)
+
+    def cancelSearch(self):
+        if self._searchWorker is not None:
+            self._searchWorker.cancel()
+            self._searchWorker = None
+
+    def onSearchFinished(self, result):
+        worker = self.sender()
+        if worker is not self._searchWorker:
+            return
+        self._searchWorker = None
+        if worker.index is not self.proxy.sourceModel().searchIndex():
+            return
+        # edits made meanwhile are folded in by the proxy's refinement
+        self.proxy.setSearchResult(result)
+
+    def onLoadFinished(self, data, searchIndex, cardStore):
+        if not self._isCurrentLoad():
+            return
+        path = self._loadPath
+        self._endLoad()
+        stamp = self.sender().stamp
+        with stats.timer('model.build'):
+            model = JsonModel(data, searchIndex=searchIndex, cardStore=cardStore)
+            self.saveExpansion()
+            self.closeJournal()
+            self.cancelSearch()
+            self.search_input.blockSignals(True)
+            self.search_input.clear()
+            self.search_input.blockSignals(False)
+            self.proxy.setSearchResult(None)
+            self.proxy.setSourceModel(model)
+            self.tree.setColumnWidth(0, self.width() // 3)
+            self.restoreExpansion(path)
+        stats.record('load', time.perf_counter() - self._loadStart, path=path)
+        self.stack.setCurrentIndex(1)
+        self.current_path = path
+        self.watchFile(path, stamp)
+        self.statusBar().showMessage(f'Loaded {os.path.basename(path)}', 3000)
+        self.openJournal(model, path, stamp)
+        self.validateSchema()
+
+    def expandedPaths(self):
+        # row paths of the expanded rows, parents first; only branches
+        # that are open are walked, so this costs what is on show
+        model = self.proxy.sourceModel()
+        out = []
+        stack = [model.root]
+        while stack and len(out) < EXPANSION_ROWS:
+            node = stack.pop()
+            for child in node.children or ():
+                if child.children is None:
+                    continue
+                index = self.proxy.mapFromSource(model.indexFromNode(child))
+                if index.isValid() and self.tree.isExpanded(index):
+                    out.append(rowPath(child))
+                    stack.append(child)
+        return out[:EXPANSION_ROWS]
+
+    def _expansionState(self):
+        try:
+            state = json.loads(editorSettings().value('expandedRows', '{}', type=str))
+        except ValueError:
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    def saveExpansion(self):
+        if not self.current_path:
+            return
+        state = self._expansionState()
+        key = os.path.abspath(self.current_path)
+        state.pop(key, None)
+        state[key] = self.expandedPaths()
+        # the least recently opened files are forgotten first
+        for old in list(state)[:-EXPANSION_FILES]:
+            del state[old]
+        editorSettings().setValue('expandedRows', json.dumps(state))
+
+    def restoreExpansion(self, path):
+        # rows open when the file was last closed; by default only the
+        # sections level, as expanding everything would materialise the
+        # whole catalog
+        paths = self._expansionState().get(os.path.abspath(path))
+        if paths is None:
+            self.tree.expandToDepth(1)
+            return
+        model = self.proxy.sourceModel()
+        for rows in paths:
+            try:
+                node = model.nodeAt(rows)
+            except (IndexError, TypeError):
+                # the file has changed since; that row is gone
+                continue
+            if node.isContainer():
+                self.tree.expand(self.proxy.mapFromSource(model.indexFromNode(node)))
+
+    def expandAll(self):
+        # the selected branch if there is one, else the whole tree
+        model = self.proxy.sourceModel()
+        if model is None:
+            return
+        index = self.tree.currentIndex()
+        node = model.root
+        if index.isValid() and self.tree.selectionModel().isSelected(index):
+            picked = model.nodeFromIndex(self.proxy.mapToSource(index))
+            if picked.isContainer():
+                node = picked
+        if rowsBelow(node, EXPAND_ALL_ROWS + 1) > EXPAND_ALL_ROWS and QtWidgets.QMessageBox.question(
+            self, 'Expand All',
+            f'This opens more than {EXPAND_ALL_ROWS} rows and may take a while. Expand anyway?',
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
+        ) != QtWidgets.QMessageBox.Yes:
+            return
+        with stats.timer('expandAll'):
+            if node is model.root:
+                self.tree.expandAll()
+            else:
+                self.tree.expandRecursively(self.proxy.mapFromSource(model.indexFromNode(node)))
+
+    def saveFile(self):
+        if not self.current_path:
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Save JSON', '', 'JSON Files (*.json)')
+            if not path:
+                return
+            self.current_path = path
+        if self._saveWorker is not None:
+            # one writer at a time; save the newer state once it's done
+            self._saveAgain = True
+            return
+        # the snapshot only copies expanded nodes, unexpanded data is shared
+        # (and never mutated), so edits can go on while the worker writes
+        model = self.proxy.sourceModel()
+        self._saveStart = time.perf_counter()
+        with stats.timer('save.snapshot'):
+            root = model.root.clone()
+        worker = JsonSaveWorker(self.current_path, root, model.fragments)
+        worker.model = model
+        worker.revision = model.revision
+        worker.journalSeq = model.journal.seq if model.journal is not None else 0
+        worker.progress.connect(self.onSaveProgress)
+        worker.saved.connect(self.onSaveFinished)
+        worker.failed.connect(self.onSaveFailed)
+        worker.cancelled.connect(self.onSaveCancelled)
+        self._saveWorker = worker
+        self.onSaveProgress(0)
+        self._updateTaskWidgets()
+        self._startWorker(worker, worker.saved, worker.failed, worker.cancelled)
+
+    def cancelSave(self):
+        if self._saveWorker is not None:
+            self._saveWorker.cancel()
+            self._saveAgain = False
+
+    def _endSave(self):
+        self._saveWorker = None
+        self._updateTaskWidgets()
+        if self._saveAgain:
+            self._saveAgain = False
+            self.saveFile()
+
+    def onSaveProgress(self, percent):
+        self.task_progress.setValue(percent)
+        self.statusBar().showMessage(f'Saving {os.path.basename(self.current_path)} …')
+
+    def onSaveFinished(self, path, used):
+        # keep only the fragments this save needed; edited subtrees were
+        # re-encoded, everything else was spliced in from the cache
+        worker = self.sender()
+        model = self.proxy.sourceModel()
+        if worker.model is model:
+            model.fragments = used
+            model.markSaved(worker.revision, worker.root)
+            if model.marks('disk'):
+                model.setMarks('disk', None)
+                self.tree.viewport().update()
+        if path == self.current_path:
+            self.watchFile(path, fileStamp(path))
+            if worker.model is model and model.journal is not None:
+                # what was edited after the snapshot is still unsaved
+                model.writeJournal(model.journal.start, self._diskStamp,
+                              model.journal.since(worker.journalSeq))
+        stats.record('save', time.perf_counter() - self._saveStart, path=path)
+        self.statusBar().clearMessage()
+        again = self._saveAgain
+        self._endSave()
+        if not again:
+            self.showSaved(path)
+
+    def showSaved(self, path):
+        QtWidgets.QMessageBox.information(self, 'Saved', f'Saved to {path}')
+
+    def onSaveFailed(self, message):
+        self._saveAgain = False
+        self._endSave()
+        self.statusBar().clearMessage()
+        QtWidgets.QMessageBox.warning(self, 'Error', f'Failed to save JSON:\n{message}')
+
+    def onSaveCancelled(self):
+        self._endSave()
+        self.statusBar().showMessage('Save cancelled', 3000)
+
+    def watchFile(self, path, stamp):
+        # `stamp` is the version the tree now matches
+        self._diskStamp = stamp
+        watched = self.watcher.files() + self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        self.watcher.addPaths([path, os.path.dirname(os.path.abspath(path))])
+
+    def onFileChanged(self, path):
+        # editors and exporters often replace the file, which drops it from
+        # the watch list; it's re-added once it's back
+        if self.current_path and self.current_path not in self.watcher.files() \
+                and os.path.exists(self.current_path):
+            self.watcher.addPath(self.current_path)
+        self.reload_timer.start()
+
+    def reloadFromDisk(self):
+        path = self.current_path
+        if not path:
+            return
+        if self._loadWorker is not None or self._saveWorker is not None or self._reloadWorker is not None:
+            self.reload_timer.start()
+            return
+        stamp = fileStamp(path)
+        if stamp is None or stamp == self._diskStamp:
+            # gone (for now), or our own save
+            return
+        model = self.proxy.sourceModel()
+        with stats.timer('reload.snapshot'):
+            root = model.root.clone()
+        worker = JsonReloadWorker(path, root)
+        worker.model = model
+        worker.revision = model.revision
+        worker.finished.connect(self.onReloadFinished)
+        worker.failed.connect(self.onReloadFailed)
+        self._reloadWorker = worker
+        self._startWorker(worker, worker.finished, worker.failed)
+
+    def onReloadFailed(self, message):
+        # most likely caught the file half-written; the next change retries
+        self._reloadWorker = None
+        self.statusBar().showMessage(f'Not reloaded from disk: {message}', 5000)
+
+    def onReloadFinished(self, stamp, changes):
+        worker = self.sender()
+        self._reloadWorker = None
+        model = self.proxy.sourceModel()
+        if worker.model is not model or worker.path != self.current_path:
+            return
+        if model.revision != worker.revision:
+            # edited meanwhile: diff again against the current tree
+            self.reload_timer.start()
+            return
+        self._diskStamp = stamp
+        name = os.path.basename(worker.path)
+        if changes is None:
+            # the top level changed type, nothing to keep
+            self.loadJson(worker.path)
+            return
+        if not changes:
+            return
+        with stats.timer('reload.apply', changes=len(changes)):
+            conflicts = model.applyChanges(changes)
+        if model.journal is not None:
+            # journaled rows may have moved; what's left unsaved is kept as
+            # a whole on top of the new version
+            journal = model.journal
+            if model.editedCells or model.insertedNodes or model.removedRows:
+                model.writeJournal(journal.start, stamp, [(journal.seq, {'o': 'state', 'data': model.toData()})])
+            else:
+                model.writeJournal(journal.start, stamp)
+        model.setMarks('disk', {node.nid: message for node, message in conflicts
+                                if node.nid is not None})
+        self.tree.viewport().update()
+        if conflicts:
+            self.statusBar().showMessage(
+                f'{name} changed on disk: {len(changes)} changes applied, '
+                f'{len(conflicts)} conflicting with unsaved edits (flagged)')
+        else:
+            self.statusBar().showMessage(f'{name} changed on disk: {len(changes)} changes applied', 5000)
+
+    def onJournalFailed(self, message):
+        self.statusBar().showMessage(f'Edit journal disabled: {message}', 5000)
+
+    def journalBase(self, path):
+        # the edit journal of the catalog at `path` is this + JOURNAL_SUFFIX
+        return path
+
+    def openJournal(self, model, path, stamp):
+        base = self.journalBase(path)
+        journal = EditJournal(base)
+        found = EditJournal.read(base)
+        ops = []
+        if found is not None and found[1]:
+            name = os.path.basename(path)
+            if found[0] != stamp:
+                # the file changed since; the edits were made to another version
+                old = journal.path + '.old'
+                try:
+                    os.replace(journal.path, old)
+                except OSError:
+                    pass
+                QtWidgets.QMessageBox.warning(
+                    self, 'Unsaved edits',
+                    f'{name} has unsaved edits from an earlier session, but the file changed '
+                    f'since; they were not applied and were kept in {os.path.basename(old)}.')
+            elif QtWidgets.QMessageBox.question(
+                self, 'Unsaved edits',
+                f'{name} has {len(found[1])} unsaved edits from an earlier session. Restore them?',
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
+            ) == QtWidgets.QMessageBox.Yes:
+                ops = found[1]
+        # the restored edits stay journaled while they're replayed
+        model.journal = journal
+        model.writeJournal(journal.start, stamp, enumerate(ops, 1))
+        if not ops or model.journal is None:
+            return
+        journal.seq = len(ops)
+        model.journal = None
+        try:
+            with stats.timer('journal.replay', ops=len(ops)), model.history.group('Restore'):
+                model.replay(ops)
+        except (IndexError, KeyError, TypeError) as e:
+            self.statusBar().showMessage(f'Unsaved edits only partly restored: {e}', 5000)
+        else:
+            self.statusBar().showMessage(f'Restored {len(ops)} unsaved edits', 5000)
+        finally:
+            model.journal = journal
+
+    def flushJournal(self):
+        model = self.proxy.sourceModel()
+        if model is not None and model.journal is not None:
+            model.writeJournal(model.journal.flush)
+
+    def closeJournal(self):
+        # kept on disk while it holds edits that weren't saved
+        model = self.proxy.sourceModel()
+        if model is None or model.journal is None:
+            return
+        journal, model.journal = model.journal, None
+        try:
+            if len(journal):
+                journal.close()
+            else:
+                journal.discard()
+        except OSError:
+            pass
+
+    def openMenu(self, pos):
+        idx = self.tree.indexAt(pos)
+        if not idx.isValid():
+            return
+        menu = QtWidgets.QMenu()
+        node = self.proxy.sourceModel().nodeFromIndex(self.proxy.mapToSource(idx))
+        duplicate = None
+        if node.parent is not None and isinstance(node.parent.source, list):
+            duplicate = menu.addAction('Duplicate…')
+        action = menu.addAction('Delete')
+        chosen = menu.exec_(self.tree.viewport().mapToGlobal(pos))
+        if chosen is not None and chosen == duplicate:
+            count, ok = QtWidgets.QInputDialog.getInt(self, 'Duplicate', 'Number of copies:', 1, 1, 100000)
+            if ok:
+                self.duplicateRows(idx, count)
+        elif chosen == action:
+            if QtWidgets.QMessageBox.question(
+                self, 'Confirm Delete', 'Delete this item?',
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
+            ) != QtWidgets.QMessageBox.Yes:
+                return
+
+            # map the proxy index back to the source model
+            src_idx    = self.proxy.mapToSource(idx)
+            src_parent = src_idx.parent()
+            src_row    = src_idx.row()
+
+            # remove that row from the source model
+            self.proxy.sourceModel().removeRow(src_row, src_parent)
+
+    def closeEvent(self, event):
+        # let cancelled/running loaders reach their next cancel check
+        self.cancelLoad()
+        self.saveExpansion()
+        self.closeJournal()
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
+        self.thumbnails.shutdown()
+        for thread in self.findChildren(QtCore.QThread):
+            thread.quit()
+            thread.wait()
+        super().closeEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # a height-only resize leaves the columns as they are
+        if hasattr(self, 'tree') and event.size().width() != event.oldSize().width():
+            self.tree.setColumnWidth(0, self.width() // 3)
+
+    def cloneRow(self, node):
+        # branches that were never expanded are shared, not copied
+        return node.clone()
+
+    def duplicateRows(self, proxyIndex, count):
+        # copies go right after the original, built before the model sees
+        # any of them and inserted as one batch
+        m = self.proxy.sourceModel()
+        node = m.nodeFromIndex(self.proxy.mapToSource(proxyIndex))
+        copies = [self.cloneRow(node) for _ in range(count)]
+        m.insertNodes(node.parent, node.row + 1, copies, node)
+
+    def addSection(self):
+        m = self.proxy.sourceModel()
+        if not m.root.children:
+            return
+        sectionsNode = m.root.children[0]
+        if sectionsNode.key != "sections" or not sectionsNode.hasRows():
+            return
+        firstSec = m.fetchNode(sectionsNode)[0]
+        newNode = self.cloneRow(firstSec)
+        m.appendNode(sectionsNode, newNode, firstSec)
+        # ensure it’s shown
+        secIdx = m.indexFromNode(sectionsNode)
+        self.tree.expand(self.proxy.mapFromSource(secIdx))
+
+    def addCard(self, proxyIndex):
+        # proxyIndex is the QModelIndex for the “cards” cell
+        src = self.proxy.mapToSource(proxyIndex)
+        m = self.proxy.sourceModel()
+        cardsNode = m.nodeFromIndex(src)
+        if not cardsNode.hasRows():
+            return
+        firstCard = m.fetchNode(cardsNode)[0]
+        newNode = self.cloneRow(firstCard)
+        m.appendNode(cardsNode, newNode, firstCard)
+        # expand that section’s “cards”
+        self.tree.expand(proxyIndex)
+
+    def onSelectionChanged(self, current: QtCore.QModelIndex, previous: QtCore.QModelIndex):
+        self.preview_panel.refresh()
+        # map proxy → source, then grab the VALUE column
+        src_idx = self.proxy.mapToSource(current)
+        val_idx = src_idx.sibling(src_idx.row(), 1)
+        text    = self.proxy.sourceModel().data(val_idx)
+        self.bottom_edit.blockSignals(True)
+        self.bottom_edit.setText(text or "")
+        self.bottom_edit.blockSignals(False)
+
+    def onBottomEdited(self, text: str):
+        idx = self.tree.currentIndex()
+        if not idx.isValid():
+            return
+        src_idx = self.proxy.mapToSource(idx)
+        val_idx = src_idx.sibling(src_idx.row(), 1)
+        if val_idx.isValid():
+            self.proxy.sourceModel().setData(val_idx, text)
+
+
+
+if __name__ == '__main__':
+    configureFromEnvironment()
+    app = QtWidgets.QApplication(sys.argv)
+    editor = JsonEditor()
+    editor.show()
+    QtCore.QTimer.singleShot(0, stats.markStartup)
+    sys.exit(app.exec_())
@@ -0,0 +1,31 @@
+import os
+import sys
+import json
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_generate import generateCatalog  # noqa: E402
+
+
+@pytest.fixture
+def catalog():
+    # small enough to be quick, with every card field and a few sections
+    return generateCatalog(60, sections=3, seed=11)
+
+
+@pytest.fixture
+def catalogFile(tmp_path, catalog):
+    # (path, data) of the catalog written the way the editor saves it
+    path = tmp_path / 'catalog.json'
+    path.write_text(json.dumps(catalog, indent=2, ensure_ascii=False), encoding='utf-8')
+    return str(path), catalog
+
+
+@pytest.fixture
+def model(catalog):
+    pytest.importorskip('PyQt5')
+    from json_editor import JsonModel
+    return JsonModel(catalog)
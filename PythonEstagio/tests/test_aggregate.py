@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip('PyQt5')
+
+from json_editor import JsonModel
+from catalog_aggregate import SectionAggregates
+from catalog_generate import generateCatalog
+
+
+def summaryOf(s):
+    return s.count, s.values, s.sums, s.breakdown
+
+
+def assertSameAsFresh(model, aggregates):
+    fresh = SectionAggregates(model.cardStore())
+    assert summaryOf(aggregates.total) == summaryOf(fresh.total)
+    for nid, summary in fresh.sections.items():
+        assert summaryOf(aggregates.sections[nid]) == summaryOf(summary)
+    fresh.detach()
+
+
+def test_delete_undo_redo_keeps_summary():
+    model = JsonModel(generateCatalog(90, sections=3, seed=5))
+    aggregates = SectionAggregates(model.cardStore())
+    cards = aggregates.total.count
+    sections = model.nodeAt([0])
+    cardsNode = next(c for c in model.fetchNode(model.nodeAt([0, 1])) if c.key == 'cards')
+    model.fetchNode(cardsNode)
+
+    model.removeRows(0, 2, model.indexFromNode(cardsNode))
+    assert aggregates.total.count == cards - 2
+    model.removeRows(0, 1, model.indexFromNode(sections))
+    assertSameAsFresh(model, aggregates)
+
+    model.undo()
+    model.undo()
+    assert aggregates.total.count == cards
+    assertSameAsFresh(model, aggregates)
+
+    model.redo()
+    assertSameAsFresh(model, aggregates)
+    model.undo()
+    assertSameAsFresh(model, aggregates)
+
+
+def test_revived_card_edits_reach_summary():
+    model = JsonModel(generateCatalog(30, sections=2, seed=7))
+    aggregates = SectionAggregates(model.cardStore())
+    cardsNode = next(c for c in model.fetchNode(model.nodeAt([0, 0])) if c.key == 'cards')
+    model.fetchNode(cardsNode)
+    model.removeRows(0, 1, model.indexFromNode(cardsNode))
+    model.undo()
+    card = model.fetchNode(cardsNode)[0]
+    price = next(c for c in model.fetchNode(card) if c.key == 'price')
+    model.setData(model.indexFromNode(price, 1), 123456.0)
+    assertSameAsFresh(model, aggregates)
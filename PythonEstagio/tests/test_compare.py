@@ -0,0 +1,76 @@
+import io
+import copy
+
+from catalog_diff import MISSING, cardKey, cardLocation, compareCatalogs, writeReport
+from catalog_core import detailsLeft
+
+
+def test_same_catalog_has_no_differences(catalog):
+    assert list(compareCatalogs(catalog, copy.deepcopy(catalog))) == []
+
+
+def test_changed_card_lists_its_fields(catalog):
+    new = copy.deepcopy(catalog)
+    card = new['sections'][1]['cards'][4]
+    card['price'] = 1.0
+    card['detailsLeft'] = '999\n' + card['detailsLeft'].split('\n', 1)[1]
+    del card['latitude']
+    [d] = compareCatalogs(catalog, new)
+    assert d.kind == 'changed' and d.key == cardKey(card)
+    assert d.old == d.new == (1, 4)
+    old = catalog['sections'][1]['cards'][4]
+    assert d.fields == [
+        ('price', old['price'], 1.0),
+        (f"detailsLeft/{detailsLeft[0].rstrip(':')}", old['detailsLeft'].split('\n')[0], '999'),
+        ('latitude', old['latitude'], MISSING),
+    ]
+
+
+def test_reordered_cards_are_moved_not_changed(catalog):
+    new = copy.deepcopy(catalog)
+    cards = new['sections'][0]['cards']
+    cards.insert(0, cards.pop(7))
+    [d] = compareCatalogs(catalog, new)
+    assert (d.kind, d.old, d.new, d.fields) == ('moved', (0, 7), (0, 0), [])
+
+
+def test_card_moved_to_another_section(catalog):
+    new = copy.deepcopy(catalog)
+    card = new['sections'][0]['cards'].pop(3)
+    card['price'] = 2.0
+    new['sections'][2]['cards'].append(card)
+    [d] = compareCatalogs(catalog, new)
+    assert d.kind == 'moved' and d.old == (0, 3) and d.new == (2, 20)
+    assert [f[0] for f in d.fields] == ['price']
+
+
+def test_added_and_removed_cards(catalog):
+    new = copy.deepcopy(catalog)
+    gone = new['sections'][2]['cards'].pop(5)
+    added = dict(gone, name='Casa nova')
+    new['sections'][0]['cards'].append(added)
+    diffs = list(compareCatalogs(catalog, new))
+    assert [(d.kind, d.key, d.old, d.new) for d in diffs] == [
+        ('added', cardKey(added), None, (0, 20)),
+        ('removed', cardKey(gone), (2, 5), None),
+    ]
+
+
+def test_repeated_keys_pair_up_in_order(catalog):
+    old = copy.deepcopy(catalog)
+    twin = old['sections'][0]['cards'][1]
+    old['sections'][0]['cards'][2] = dict(twin, price=-1)
+    new = copy.deepcopy(old)
+    new['sections'][0]['cards'][2]['price'] = -2
+    [d] = compareCatalogs(old, new)
+    assert (d.kind, d.old, d.fields) == ('changed', (0, 2), [('price', -1, -2)])
+
+
+def test_report_names_card_locations(catalog):
+    new = copy.deepcopy(catalog)
+    cards = new['sections'][0]['cards']
+    cards.insert(0, cards.pop(7))
+    out = io.StringIO()
+    writeReport(list(compareCatalogs(catalog, new)), out)
+    assert f'{cardLocation((0, 7))} -> {cardLocation((0, 0))}' in out.getvalue()
+    assert cardLocation((0, 7)) == 'sections[0].cards[7]' and cardLocation(None) == ''
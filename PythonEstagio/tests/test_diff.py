@@ -0,0 +1,93 @@
+import copy
+import random
+
+import pytest
+
+from catalog_core import JsonNode
+from catalog_diff import diffTree
+
+
+def changed(catalog, seed):
+    # a newer version of the file: cards edited, removed, added and
+    # swapped, a section dropped, a detail line gone
+    rng = random.Random(seed)
+    new = copy.deepcopy(catalog)
+    cards = [s['cards'] for s in new['sections']]
+    for _ in range(5):
+        card = rng.choice(rng.choice(cards))
+        card[rng.choice(['name', 'price', 'type', 'area'])] = rng.choice(['Novo', 12.5, None, 7])
+    del cards[0][rng.randrange(len(cards[0]))]
+    cards[1].insert(rng.randrange(len(cards[1])), dict(cards[2][0], name='Inserida'))
+    i = rng.randrange(len(cards[2]) - 1)
+    cards[2][i], cards[2][i + 1] = cards[2][i + 1], cards[2][i]
+    cards[2][3]['detailsLeft'] = cards[2][3]['detailsLeft'].rsplit('\n', 1)[0]
+    new['sections'][1]['extra'] = {'added': [1, 2]}
+    return new
+
+
+def test_same_data_has_no_changes(catalog):
+    assert diffTree(catalog, copy.deepcopy(catalog)) == []
+    root = JsonNode('', '', catalog)
+    root.fetch()
+    assert diffTree(root, copy.deepcopy(catalog)) == []
+
+
+def test_root_of_another_type_is_no_diff(catalog):
+    assert diffTree(catalog, [catalog]) is None
+    assert diffTree(catalog, 5) is None
+
+
+def test_one_edited_value_is_one_set(catalog):
+    new = copy.deepcopy(catalog)
+    new['sections'][1]['cards'][4]['price'] = 1.0
+    [change] = diffTree(catalog, new)
+    assert change.kind == 'set' and change.value == 1.0
+    assert change.path == (0, 1, 1, 4)
+
+
+def test_inserted_card_is_one_insert(catalog):
+    new = copy.deepcopy(catalog)
+    card = dict(new['sections'][0]['cards'][0], name='Nova')
+    new['sections'][0]['cards'].insert(10, card)
+    [change] = diffTree(catalog, new)
+    assert (change.kind, change.path, change.row) == ('insert', (0, 0, 1), 10)
+    assert [source for _, _, source in change.value] == [card]
+
+
+def test_removed_cards_are_one_remove(catalog):
+    new = copy.deepcopy(catalog)
+    del new['sections'][2]['cards'][5:8]
+    [change] = diffTree(catalog, new)
+    assert (change.kind, change.path, change.row, change.count) == ('remove', (0, 2, 1), 5, 3)
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_applied_changes_give_the_new_data(model, catalog, seed):
+    # with some branches expanded, as they would be on screen
+    for section in range(3):
+        cards = next(c for c in model.fetchNode(model.nodeAt([0, section])) if c.key == 'cards')
+        model.fetchNode(model.fetchNode(cards)[section * 3])
+    index, store = model.searchIndex(), model.cardStore()
+    new = changed(catalog, seed)
+    model.applyChanges(diffTree(model.root, new))
+    assert model.toData() == new
+    assert sum(store.alive()) == sum(len(s['cards']) for s in new['sections'])
+    found = index.query('inserida', 1)
+    assert sum(found.hit) == 1
+
+
+def test_unsaved_edits_survive_and_conflicts_are_reported(model, catalog):
+    from json_editor import VALUE_ROLE
+    cards = next(c for c in model.fetchNode(model.nodeAt([0, 0])) if c.key == 'cards')
+    first, second = model.fetchNode(cards)[:2]
+    names = [next(c for c in model.fetchNode(card) if c.key == 'name') for card in (first, second)]
+    for cell in names:
+        model.setData(model.indexFromNode(cell, 1), 'Local', VALUE_ROLE)
+    new = copy.deepcopy(catalog)
+    new['sections'][0]['cards'][1]['name'] = 'Remote'
+    new['sections'][0]['cards'][1]['price'] = 5.0
+    conflicts = model.applyChanges(diffTree(model.root, new))
+    assert [node for node, _ in conflicts] == [names[1]]
+    data = model.toData()['sections'][0]['cards']
+    assert [c['name'] for c in data[:2]] == ['Local', 'Local']
+    assert data[1]['price'] == 5.0
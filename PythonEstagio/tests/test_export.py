@@ -0,0 +1,74 @@
+import os
+import gzip
+import json
+import hashlib
+
+import pytest
+
+from catalog_export import HASH_CHARS, exportCatalog
+from catalog_json import BACKENDS
+
+
+def read(folder, name):
+    with open(os.path.join(folder, name), 'rb') as f:
+        return f.read()
+
+
+def manifestOf(folder):
+    return json.loads(read(folder, 'catalog.index.json'))
+
+
+def assertEntry(folder, entry):
+    data = read(folder, entry['file'])
+    digest = hashlib.sha256(data).hexdigest()
+    assert entry['sha256'] == digest and entry['bytes'] == len(data)
+    assert entry['file'].endswith(f'.{digest[:HASH_CHARS]}.json')
+    assert gzip.decompress(read(folder, entry['file'] + '.gz')) == data
+    assert entry['gzip'] == len(read(folder, entry['file'] + '.gz'))
+    return data
+
+
+@pytest.mark.parametrize('name', sorted(BACKENDS))
+def test_split_export_matches_the_catalog(tmp_path, catalog, name):
+    folder = str(tmp_path)
+    report = exportCatalog(catalog, folder, split=True, formats=('gzip',), backend=BACKENDS[name])
+    manifest = manifestOf(folder)
+    assert manifest['version'] == 1
+    whole = assertEntry(folder, manifest['catalog'])
+    assert json.loads(whole) == catalog
+    assert read(folder, 'catalog.json') == whole
+    assert whole == json.dumps(catalog, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    sections = manifest['sections']
+    assert [(s['title'], s['cards']) for s in sections] == [
+        (s['title'], len(s['cards'])) for s in catalog['sections']]
+    for i, (entry, section) in enumerate(zip(sections, catalog['sections'])):
+        assert entry['file'].startswith(f'catalog.s{i}.')
+        assert json.loads(assertEntry(folder, entry)) == section
+    assert len(report.sections) == 3 and report.catalog.sha256 == manifest['catalog']['sha256']
+
+
+def test_unsplit_export_has_no_sections(tmp_path, catalog):
+    folder = str(tmp_path)
+    exportCatalog(dict(catalog, version=2), folder, formats=('gzip',))
+    manifest = manifestOf(folder)
+    assert manifest['sections'] == []
+    assert json.loads(assertEntry(folder, manifest['catalog'])) == dict(catalog, version=2)
+
+
+def test_reexport_removes_stale_files(tmp_path, catalog):
+    folder = str(tmp_path)
+    exportCatalog(catalog, folder, split=True, formats=('gzip',))
+    old = manifestOf(folder)
+    catalog['sections'][1]['cards'][0]['price'] = 1.0
+    report = exportCatalog(catalog, folder, split=True, formats=())
+    new = manifestOf(folder)
+    # the unchanged sections keep their names; the changed ones are new
+    assert new['sections'][0]['file'] == old['sections'][0]['file']
+    assert new['sections'][1]['file'] != old['sections'][1]['file']
+    assert new['catalog']['gzip'] is None
+    files = set(os.listdir(folder))
+    assert old['sections'][1]['file'] not in files and old['catalog']['file'] not in files
+    assert not any(f.endswith('.gz') for f in files)
+    assert set(report.removed) >= {old['sections'][1]['file'], old['catalog']['file']}
+    assert files == {'catalog.json', 'catalog.index.json', new['catalog']['file']} | {
+        s['file'] for s in new['sections']}
@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip('PyQt5')
+
+from json_editor import JsonModel, VALUE_ROLE
+from catalog_journal import EditJournal
+from catalog_generate import generateCatalog
+
+
+@pytest.fixture
+def model(tmp_path):
+    path = str(tmp_path / 'catalog.json')
+    m = JsonModel(generateCatalog(20, sections=2, seed=4))
+    m.journal = EditJournal(path)
+    m.journal.start((1, 1))
+    yield m, path
+    if m.journal is not None:
+        m.journal.close()
+
+
+def nameCell(m):
+    cards = next(c for c in m.fetchNode(m.nodeAt([0, 0])) if c.key == 'cards')
+    card = m.fetchNode(cards)[0]
+    return next(c for c in m.fetchNode(card) if c.key == 'name')
+
+
+def test_typing_in_a_cell_is_one_journal_line(model):
+    m, path = model
+    cell = m.indexFromNode(nameCell(m), 1)
+    for i in range(1, 6):
+        m.setData(cell, 'Casa'[:i] if i < 5 else 'Casa nova', VALUE_ROLE)
+    saved = m.journal.seq
+    m.setData(cell, 'Casa nova!', VALUE_ROLE)
+    m.journal.flush()
+    stamp, ops = EditJournal.read(path)
+    assert ops == [{'o': 'set', 'p': ops[0]['p'], 'v': 'Casa nova!'}]
+    # a save made while the edit was held back still keeps its final value
+    assert [op['v'] for _, op in m.journal.since(saved)] == ['Casa nova!']
+    # and the undo step is one as well
+    m.undo()
+    assert not m.history.canUndo()
+
+
+def test_unwritable_journal_is_switched_off(model):
+    m, path = model
+    failures = []
+    m.journalFailed.connect(failures.append)
+    m.journal._file.close()
+    m.journal._file = open(m.journal.path, 'r', encoding='utf-8')
+    node = nameCell(m)
+    cards = node.parent.parent
+    m.removeRows(0, 1, m.indexFromNode(cards))
+    assert m.journal is None and len(failures) == 1
+    # the edit was made in full, and later ones don't try again
+    assert len(cards.children) == 9
+    m.setData(m.indexFromNode(nameCell(m), 1), 'x', VALUE_ROLE)
+    assert len(failures) == 1
+    m.undo()
+    assert len(cards.children) == 9 and m.history.canUndo()
@@ -0,0 +1,28 @@
+import pytest
+
+from catalog_core import LoadCancelled, loadJsonFile
+from catalog_json import STDLIB, jsonBackend
+
+
+@pytest.mark.parametrize('backend', [STDLIB, jsonBackend()], ids=lambda b: b.name)
+def test_progress_while_parsing(catalogFile, backend):
+    path, data = catalogFile
+    seen = []
+    assert loadJsonFile(path, seen.append, backend=backend) == data
+    parsing = [p for p in seen if 20 < p < 100]
+    assert len(set(parsing)) > 10 and seen[-1] == 100
+
+
+@pytest.mark.parametrize('backend', [STDLIB, jsonBackend()], ids=lambda b: b.name)
+def test_cancel_while_parsing(catalogFile, backend):
+    path, _ = catalogFile
+    seen = []
+    with pytest.raises(LoadCancelled):
+        loadJsonFile(path, seen.append, lambda: bool(seen) and seen[-1] > 50, backend=backend)
+    assert seen[-1] < 100
+
+
+@pytest.mark.parametrize('backend', [STDLIB, jsonBackend()], ids=lambda b: b.name)
+def test_quiet_load(catalogFile, backend):
+    path, data = catalogFile
+    assert loadJsonFile(path, backend=backend) == data
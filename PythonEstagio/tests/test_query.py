@@ -0,0 +1,92 @@
+import pytest
+
+from catalog_core import SearchIndex
+from catalog_query import QueryError, parseQuery
+from catalog_store import CardStore
+
+
+@pytest.fixture
+def store(catalog):
+    return CardStore(SearchIndex(catalog), catalog)
+
+
+@pytest.fixture
+def cards(catalog):
+    return [c for s in catalog['sections'] for c in s['cards']]
+
+
+def matching(store, text):
+    return [store.text('name', r) for r, ok in enumerate(parseQuery(text).mask(store)) if ok]
+
+
+def detail(card, field, i):
+    return card[field].split('\n')[i]
+
+
+def test_plain_text_is_not_a_query():
+    assert parseQuery('casa 12') is None
+    assert parseQuery('"quartos"') is None
+
+
+def test_text_equality_ignores_case(store, cards):
+    assert matching(store, 'type=moradia') == [c['name'] for c in cards if c['type'] == 'MORADIA']
+    assert matching(store, 'TYPE!=Moradia') == [c['name'] for c in cards if c['type'] != 'MORADIA']
+
+
+def test_numeric_comparisons(store, cards):
+    for op, test in [('<', float.__lt__), ('<=', float.__le__), ('>', float.__gt__), ('>=', float.__ge__)]:
+        assert matching(store, f'price{op}300000') == [c['name'] for c in cards if test(c['price'], 300000.0)]
+    price = cards[5]['price']
+    assert matching(store, f'price = {price:g}') == [c['name'] for c in cards if c['price'] == price]
+
+
+def test_contains(store, cards):
+    assert matching(store, 'location~ÉVORA') == [c['name'] for c in cards if 'évora' in c['location'].lower()]
+
+
+def test_detail_labels_are_fields(store, cards):
+    assert matching(store, '"Quartos:">=3') == [c['name'] for c in cards
+                                                if float(detail(c, 'detailsLeft', 2)) >= 3]
+    label = "'Eficiência Energética'"
+    assert matching(store, f'{label}=a') == [c['name'] for c in cards
+                                             if detail(c, 'detailsRight', 5).lower() == 'a']
+
+
+def test_terms_all_hold(store, cards):
+    assert matching(store, 'type=moradia price<1000000 size!=T0') == [
+        c['name'] for c in cards if c['type'] == 'MORADIA' and c['price'] < 1000000 and c['size'] != 'T0']
+
+
+def test_missing_numbers_only_match_not_equal(catalog):
+    catalog['sections'][0]['cards'][0]['area'] = 'n/a'
+    store = CardStore(SearchIndex(catalog), catalog)
+    name = catalog['sections'][0]['cards'][0]['name']
+    assert name not in matching(store, 'area>=0')
+    assert name in matching(store, 'area!=0')
+
+
+@pytest.mark.parametrize('text, message', [
+    ('colour=red', 'unknown field'),
+    ('name<3', "isn't numeric"),
+    ('price<cheap', 'needs a number'),
+    ('price<', 'incomplete condition'),
+    ('price < 3 type', 'incomplete condition'),
+    ('= price 3', 'expected FIELD OP VALUE'),
+    ('price~3', 'no text to search'),
+])
+def test_malformed_queries(text, message):
+    with pytest.raises(QueryError, match=message):
+        parseQuery(text)
+
+
+def test_result_marks_cards_and_their_parents(catalog):
+    index = SearchIndex(catalog)
+    store = CardStore(index, catalog)
+    result = parseQuery('type=loja').result('type=loja', index, store)
+    hits = [n for n in range(len(index)) if result.hit[n]]
+    assert hits == [store.nids[r] for r in range(len(store)) if store.text('type', r) == 'LOJA']
+    for n in hits:
+        p = index.parent[n]
+        while p >= 0:
+            assert result.desc[p]
+            p = index.parent[p]
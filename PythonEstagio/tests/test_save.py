@@ -0,0 +1,179 @@
+import os
+import json
+
+import pytest
+
+from catalog_core import LoadCancelled, saveJsonAtomic, writeJson
+from catalog_json import BACKENDS, STDLIB
+
+
+class CountingBackend:
+    # the stdlib backend, noting every object it's asked to encode
+    name = 'counting'
+    incremental = True
+
+    def __init__(self):
+        self.encoded = []
+
+    def loads(self, buffer):
+        return STDLIB.loads(buffer)
+
+    def dumps(self, value):
+        if isinstance(value, dict):
+            self.encoded.append(value)
+        return STDLIB.dumps(value)
+
+
+def save(model, path, backend):
+    # what the editor's save does: snapshot, write, then mark saved
+    snapshot, used, revision = model.root.clone(), {}, model.revision
+    saveJsonAtomic(path, snapshot, fragments=model.fragments, used=used, backend=backend, rebase=True)
+    model.fragments = used
+    model.markSaved(revision, snapshot)
+
+
+def editName(model, section, card, name):
+    from json_editor import VALUE_ROLE
+    cards = next(c for c in model.fetchNode(model.nodeAt([0, section])) if c.key == 'cards')
+    node = model.fetchNode(model.fetchNode(cards)[card])
+    cell = next(c for c in node if c.key == 'name')
+    model.setData(model.indexFromNode(cell, 1), name, VALUE_ROLE)
+
+
+def assertWritten(model, path):
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == json.dumps(model.toData(), indent=2, ensure_ascii=False)
+
+
+def test_later_saves_only_encode_what_changed_since(model, tmp_path):
+    path = str(tmp_path / 'catalog.json')
+    backend = CountingBackend()
+    save(model, path, backend)
+    assert len(backend.encoded) == 60
+
+    editName(model, 0, 0, 'Primeira')
+    backend.encoded.clear()
+    save(model, path, backend)
+    assert [card['name'] for card in backend.encoded] == ['Primeira']
+    assertWritten(model, path)
+    assert not model.root.dirty
+
+    # the card saved last time is spliced from the cache, not encoded again
+    editName(model, 1, 2, 'Segunda')
+    backend.encoded.clear()
+    save(model, path, backend)
+    assert [card['name'] for card in backend.encoded] == ['Segunda']
+    assertWritten(model, path)
+
+    backend.encoded.clear()
+    save(model, path, backend)
+    assert backend.encoded == []
+    assertWritten(model, path)
+
+
+def test_edits_made_while_saving_stay_dirty(model, tmp_path):
+    path = str(tmp_path / 'catalog.json')
+    backend = CountingBackend()
+    editName(model, 0, 0, 'Antes')
+    snapshot, used, revision = model.root.clone(), {}, model.revision
+    saveJsonAtomic(path, snapshot, fragments=model.fragments, used=used, backend=backend, rebase=True)
+    editName(model, 0, 1, 'Durante')
+    model.fragments = used
+    model.markSaved(revision, snapshot)
+    assert model.root.dirty and model.editedCells
+
+    backend.encoded.clear()
+    save(model, path, backend)
+    assert sorted(card['name'] for card in backend.encoded) == ['Antes', 'Durante']
+    assertWritten(model, path)
+
+
+def test_snapshot_rebase_leaves_source_matching_tree(model, tmp_path):
+    editName(model, 2, 3, 'Rebased')
+    save(model, str(tmp_path / 'catalog.json'), STDLIB)
+    cards = next(c for c in model.nodeAt([0, 2]).children if c.key == 'cards')
+    assert cards.source[3]['name'] == 'Rebased'
+    assert model.root.source == model.toData()
+
+
+def odd(catalog):
+    # values the piecewise writer and the fast encoder are most likely to
+    # get differently from json.dumps
+    catalog['sections'][0]['cards'][0].update({
+        'big': 1e16, 'small': 1e-05, 'nan': float('nan'), 'huge': 2 ** 70,
+        'empty': {}, 'none': [], 'quote "key"\n': 'ç \x00', 'deep': [{'a': [1, {'b': []}]}]})
+    catalog['sections'][1]['cards'] = []
+    catalog['meta'] = {'nested': {'more': [{'levels': {'than': ['the', {'walk': True}]}}]}, 'n': None}
+    return catalog
+
+
+@pytest.mark.parametrize('name', sorted(BACKENDS))
+def test_saved_text_is_json_dumps(tmp_path, catalog, name):
+    path = str(tmp_path / 'catalog.json')
+    data = odd(catalog)
+    saveJsonAtomic(path, data, backend=BACKENDS[name])
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == json.dumps(data, indent=2, ensure_ascii=False)
+
+
+@pytest.mark.parametrize('data', [[], {}, 5, 'text', None, [[]], [{'a': {}}], {'sections': [{}]}])
+def test_any_document_is_written_as_json_dumps(tmp_path, data):
+    out = []
+    writeJson(data, out.append)
+    assert ''.join(out) == json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def test_edited_model_is_written_as_its_data(model, tmp_path):
+    path = str(tmp_path / 'catalog.json')
+    editName(model, 0, 3, 'Editada')
+    cards = next(c for c in model.fetchNode(model.nodeAt([0, 2])) if c.key == 'cards')
+    model.insertNodes(cards, 1, [model.fetchNode(cards)[0].clone()], cards.children[0])
+    model.removeRows(0, 1, model.indexFromNode(model.nodeAt([0])))
+    saveJsonAtomic(path, model.root.clone())
+    assertWritten(model, path)
+
+
+def test_progress_and_cancel(tmp_path, catalog):
+    path = str(tmp_path / 'catalog.json')
+    seen = []
+    saveJsonAtomic(path, catalog, onProgress=seen.append)
+    assert seen == sorted(seen) and seen[-1] <= 100 and len(seen) > 3
+    with open(path, 'rb') as f:
+        before = f.read()
+    os.chmod(path, 0o640)
+
+    calls = []
+    with pytest.raises(LoadCancelled):
+        saveJsonAtomic(path, dict(catalog, other=1), isCancelled=lambda: calls.append(1) or len(calls) > 2)
+    with open(path, 'rb') as f:
+        assert f.read() == before
+    assert os.listdir(tmp_path) == ['catalog.json']
+
+    saveJsonAtomic(path, {'other': 1})
+    assert os.stat(path).st_mode & 0o777 == 0o640
+
+
+def test_fragments_are_reused_by_identity(tmp_path, catalog):
+    path = str(tmp_path / 'catalog.json')
+    backend = CountingBackend()
+    fragments = {}
+    saveJsonAtomic(path, catalog, fragments={}, used=fragments, backend=backend)
+    assert len(backend.encoded) == 60
+
+    # data is replaced, never changed in place (as the model's sources): an
+    # equal but new card is encoded again, the rest are spliced
+    cards = catalog['sections'][2]['cards'] = list(catalog['sections'][2]['cards'])
+    cards[7] = dict(cards[7])
+    backend.encoded.clear()
+    used = {}
+    saveJsonAtomic(path, catalog, fragments=fragments, used=used, backend=backend)
+    assert backend.encoded == [cards[7]] and backend.encoded[0] is cards[7]
+    assert id(cards[7]) in used
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == json.dumps(catalog, indent=2, ensure_ascii=False)
+
+    # fragments of another document don't leak into this one
+    backend.encoded.clear()
+    out = []
+    writeJson({'cards': cards}, out.append, depth=2, fragments=used, used={}, backend=backend)
+    assert ''.join(out) == json.dumps({'cards': cards}, indent=2, ensure_ascii=False)
@@ -0,0 +1,40 @@
+from catalog_core import JsonNode, SearchIndex
+from catalog_generate import generateCatalog
+from catalog_schema import Validator, validateCatalog
+
+
+def brokenCatalog():
+    data = generateCatalog(40, sections=2, seed=3)
+    cards = data['sections'][0]['cards']
+    del cards[0]['imageName']
+    cards[1]['price'] = 'caro'
+    cards[2]['detailsLeft'] = cards[2]['detailsLeft'].split('\n', 1)[0]
+    cards[3] = 7
+    data['sections'][1]['title'] = None
+    return data
+
+
+def test_valid_catalog_has_no_problems():
+    assert validateCatalog(generateCatalog(40, sections=2, seed=3)) == []
+
+
+def test_paths_and_messages():
+    problems = validateCatalog(brokenCatalog())
+    assert problems == [
+        'sections[0].cards[0]: missing imageName',
+        'sections[0].cards[1].price: expected number, got string',
+        'sections[0].cards[2].detailsLeft: 1 lines, expected 6',
+        'sections[0].cards[3]: expected object, got number',
+        'sections[1].title: expected string, got null',
+    ]
+    assert validateCatalog([]) == ['root: expected object, got list']
+
+
+def test_same_rules_as_the_editor():
+    # the batch tools and the editor's row-keyed validation report the
+    # same problems
+    data = brokenCatalog()
+    root = JsonNode('', '', data)
+    byRow = Validator().validate(SearchIndex(root), data)
+    assert sorted(m for problems in byRow.values() for _, m in problems) == \
+        sorted(p.split(': ', 1)[1] for p in validateCatalog(data))
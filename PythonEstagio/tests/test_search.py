@@ -0,0 +1,96 @@
+import pytest
+
+from catalog_core import JsonNode, SearchIndex
+
+
+@pytest.fixture
+def tree(catalog):
+    root = JsonNode('', '', catalog)
+    root.fetch()
+    index = SearchIndex(root)
+    return root, index
+
+
+def fetch(index, node):
+    node.fetch()
+    index.assignChildren(node)
+    return node.children
+
+
+def card(index, root, section, row):
+    sections = fetch(index, root.children[0])
+    cards = next(c for c in fetch(index, sections[section]) if c.key == 'cards')
+    return fetch(index, cards)[row]
+
+
+def rows(result):
+    return [e for e, h in enumerate(result.hit) if h], [e for e, d in enumerate(result.desc) if d]
+
+
+def ancestors(index, e):
+    out, p = [], index.parent[e]
+    while p >= 0:
+        out.append(p)
+        p = index.parent[p]
+    return out
+
+
+def typed(index, text, column=1, previous=None):
+    # each prefix of `text` in turn, refining the one before, as the
+    # search box does while typing
+    for i in range(1, len(text) + 1):
+        previous = index.query(text[:i], column, previous)
+    return previous
+
+
+@pytest.mark.parametrize('text, column', [('casa 1', 1), ('évora, portugal', 1), ('quartos', 0), ('imagename', 0)])
+def test_refining_matches_a_full_scan(tree, text, column):
+    _, index = tree
+    refined = typed(index, text, column)
+    assert rows(refined) == rows(index.query(text, column))
+    assert any(refined.hit)
+
+
+def test_hits_mark_every_ancestor(tree):
+    _, index = tree
+    hits, desc = rows(index.query('casa 17', 1))
+    assert len(hits) == 1
+    assert desc == sorted(ancestors(index, hits[0]))
+
+
+def test_refining_skips_deleted_and_sees_edited_rows(tree):
+    root, index = tree
+    previous = index.query('casa', 1)
+    gone = card(index, root, 0, 5)
+    index.remove(gone)
+    name = next(c for c in fetch(index, card(index, root, 1, 2)) if c.key == 'name')
+    index.setValue(name, 'Casa 999')
+    refined = typed(index, 'casa 99', previous=previous)
+    assert rows(refined) == rows(index.query('casa 99', 1))
+    assert name.nid in rows(refined)[0]
+    assert not any(refined.hit[gone.nid:index.end[gone.nid]])
+
+
+def test_revived_rows_are_found_again(tree):
+    root, index = tree
+    gone = card(index, root, 0, 5)
+    index.remove(gone)
+    previous = index.query('casa', 1)
+    index.revive(gone)
+    result = index.query('casa 5', 1, previous)
+    name = next(c for c in fetch(index, gone) if c.key == 'name')
+    assert result.hit[name.nid]
+    assert rows(result) == rows(index.query('casa 5', 1))
+
+
+def test_new_segments_are_scanned_in_full(tree):
+    root, index = tree
+    previous = index.query('casa', 1)
+    original = card(index, root, 2, 0)
+    cards = original.parent
+    copy = original.clone(cards, len(cards.children))
+    cards.children.append(copy)
+    index.appendSubtrees(cards, [copy])
+    result = index.query('casa 4', 1, previous)
+    assert rows(result) == rows(index.query('casa 4', 1))
+    assert result.desc[copy.nid]
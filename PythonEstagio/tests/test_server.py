@@ -0,0 +1,67 @@
+import gzip
+import json
+import time
+import http.client
+
+import pytest
+
+from catalog_server import CatalogServer
+
+
+@pytest.fixture
+def server(catalog):
+    s = CatalogServer(port=0).start()
+    s.publish(catalog, 1)
+    deadline = time.monotonic() + 5
+    while s.snapshot is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield s
+    s.stop()
+
+
+def get(server, path, **headers):
+    c = http.client.HTTPConnection(server.host, server.port, timeout=5)
+    try:
+        c.request('GET', path, headers={k.replace('_', '-'): v for k, v in headers.items()})
+        r = c.getresponse()
+        return r, r.read()
+    finally:
+        c.close()
+
+
+def test_catalog_and_parts_are_served(server, catalog):
+    r, body = get(server, '/catalog.json')
+    assert r.status == 200 and json.loads(body) == catalog
+    r, body = get(server, '/sections/1.json')
+    assert json.loads(body) == catalog['sections'][1]
+    r, body = get(server, '/sections/1/cards/2.json')
+    assert json.loads(body) == catalog['sections'][1]['cards'][2]
+    assert get(server, '/sections/99.json')[0].status == 404
+
+
+def test_matching_etag_is_not_modified(server):
+    r, _ = get(server, '/catalog.json')
+    tag = r.getheader('ETag')
+    assert get(server, '/catalog.json', If_None_Match=tag)[0].status == 304
+    assert get(server, '/catalog.json', If_None_Match=f'"other", W/{tag}')[0].status == 304
+    assert get(server, '/catalog.json', If_None_Match='*')[0].status == 304
+    assert server.notModified == 3
+
+
+def test_etag_is_compared_whole(server):
+    r, _ = get(server, '/catalog.json')
+    tag = r.getheader('ETag')
+    for wanted in (tag[:-1] + 'x"', tag[:-1] + '-gz"', tag.strip('"'), '"' + tag.strip('"')[1:] + '"'):
+        assert get(server, '/catalog.json', If_None_Match=wanted)[0].status == 200
+
+
+def test_gzip_is_its_own_representation(server, catalog):
+    plain = get(server, '/catalog.json')[0].getheader('ETag')
+    r, body = get(server, '/catalog.json', Accept_Encoding='gzip')
+    assert r.getheader('Content-Encoding') == 'gzip'
+    assert json.loads(gzip.decompress(body)) == catalog
+    zipped = r.getheader('ETag')
+    assert zipped != plain
+    assert get(server, '/catalog.json', Accept_Encoding='gzip', If_None_Match=plain)[0].status == 200
+    assert get(server, '/catalog.json', If_None_Match=zipped)[0].status == 200
+    assert get(server, '/catalog.json', Accept_Encoding='gzip', If_None_Match=zipped)[0].status == 304
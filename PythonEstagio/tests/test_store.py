@@ -0,0 +1,91 @@
+import pytest
+
+pytest.importorskip('PyQt5')
+
+from json_editor import VALUE_ROLE
+from catalog_core import SearchIndex
+from catalog_store import CardStore
+
+
+def cardsOf(model, section):
+    cards = next(c for c in model.fetchNode(model.nodeAt([0, section])) if c.key == 'cards')
+    model.fetchNode(cards)
+    return cards
+
+
+def cell(model, card, key):
+    return next(c for c in model.fetchNode(card) if c.key == key)
+
+
+def storeWatcher(store):
+    seen = []
+    store.watchers.append(lambda kind, row: seen.append((kind, row)))
+    return seen
+
+
+def test_rows_follow_the_catalog(model, catalog):
+    store = model.cardStore()
+    cards = [c for s in catalog['sections'] for c in s['cards']]
+    assert len(store) == len(cards)
+    assert [store.text('name', r) for r in range(len(store))] == [c['name'] for c in cards]
+    assert [store.number('price', r) for r in range(len(store))] == [c['price'] for c in cards]
+    card = cardsOf(model, 1).children[4]
+    assert store.rowOf(card.nid) == 24
+    assert store.rowOf(None) is None
+    assert store.rowOf(card.parent.nid) is None
+
+
+def test_edited_card_is_reread(model):
+    store = model.cardStore()
+    seen = storeWatcher(store)
+    card = cardsOf(model, 0).children[3]
+    version = store.version
+    model.setData(model.indexFromNode(cell(model, card, 'price'), 1), '1234', VALUE_ROLE)
+    model.setData(model.indexFromNode(cell(model, card, 'type'), 1), 'Quinta', VALUE_ROLE)
+    assert store.number('price', 3) == 1234.0
+    assert store.text('type', 3) == 'Quinta'
+    assert store.version == version + 2
+    assert seen == [('updating', 3), ('updated', 3)] * 2
+
+
+def test_removing_a_detail_line_shifts_the_rest(model, catalog):
+    store = model.cardStore()
+    card = cardsOf(model, 0).children[0]
+    lines = catalog['sections'][0]['cards'][0]['detailsLeft'].split('\n')
+    first = next(c.row for c in model.fetchNode(card) if c.key == 'Area Bruta Privativa:')
+    model.removeRows(first, 1, model.indexFromNode(card))
+    assert store.text('Area Bruta Privativa', 0) == lines[1]
+    assert store.text('Quartos', 0) == lines[3]
+    assert store.text('Carr. Carros Eletricos', 0) is None
+
+
+def test_deleted_cards_are_masked_not_dropped(model):
+    store = model.cardStore()
+    seen = storeWatcher(store)
+    cards = cardsOf(model, 2)
+    nid = cards.children[1].nid
+    model.removeRows(1, 2, model.indexFromNode(cards))
+    alive = list(store.alive())
+    assert len(alive) == 60 and alive.count(False) == 2
+    assert not alive[41] and not alive[42]
+    assert store.rowOf(nid) == 41
+    assert ('invalidated', None) in seen
+    model.undo()
+    assert all(store.alive())
+
+
+def test_inserted_cards_are_appended(model):
+    store = model.cardStore()
+    seen = storeWatcher(store)
+    cards = cardsOf(model, 0)
+    original = cards.children[2]
+    model.insertNodes(cards, 0, [original.clone()], original)
+    copy = cards.children[0]
+    assert len(store) == 61 and ('appended', 60) in seen
+    assert store.rowOf(copy.nid) == 60
+    assert store.text('name', 60) == store.text('name', 2)
+
+
+def test_store_can_be_built_from_plain_data(catalog):
+    store = CardStore(SearchIndex(catalog), catalog)
+    assert len(store) == 60 and all(store.alive())
@@ -0,0 +1,115 @@
+import copy
+
+from catalog_undo import UndoHistory
+
+
+def cardsOf(model, section):
+    cards = next(c for c in model.fetchNode(model.nodeAt([0, section])) if c.key == 'cards')
+    model.fetchNode(cards)
+    return cards
+
+
+def hits(model, text):
+    result = model.searchIndex().query(text, 1)
+    return [e for e, h in enumerate(result.hit) if h]
+
+
+def names(model, section):
+    return [c['name'] for c in model.toData()['sections'][section]['cards']]
+
+
+def test_delete_undo_redo(model, catalog):
+    original = copy.deepcopy(catalog)
+    cards = cardsOf(model, 1)
+    removed = cards.children[3:6]
+    model.searchIndex()
+    before = hits(model, 'casa 2')
+    model.removeRows(3, 3, model.indexFromNode(cards))
+    assert len(names(model, 1)) == 17
+    assert model.history.undoText() == 'Delete'
+
+    model.undo()
+    assert model.toData() == original
+    # the very nodes come back, with their search rows
+    assert cards.children[3:6] == removed
+    assert hits(model, 'casa 2') == before
+    assert model.history.redoText() == 'Delete'
+
+    model.redo()
+    assert names(model, 1) == [c['name'] for i, c in enumerate(original['sections'][1]['cards'])
+                               if not 3 <= i < 6]
+    model.undo()
+    assert model.toData() == original
+
+
+def test_clone_undo_redo(model, catalog):
+    original = copy.deepcopy(catalog)
+    cards = cardsOf(model, 0)
+    source = cards.children[2]
+    model.insertNodes(cards, 3, [source.clone(), source.clone()], source)
+    expected = names(model, 0)
+    assert expected[2:5] == [original['sections'][0]['cards'][2]['name']] * 3
+
+    model.undo()
+    assert model.toData() == original
+    model.redo()
+    assert names(model, 0) == expected
+    model.undo()
+    assert model.toData() == original
+
+
+def test_many_steps_back_to_start(model, catalog):
+    from json_editor import VALUE_ROLE
+    original = copy.deepcopy(catalog)
+    cards = cardsOf(model, 2)
+    model.removeRows(0, 1, model.indexFromNode(model.nodeAt([0])))
+    model.insertNodes(cards, 0, [cards.children[5].clone()], cards.children[5])
+    name = next(c for c in model.fetchNode(cards.children[0]) if c.key == 'name')
+    model.setData(model.indexFromNode(name, 1), 'Editada', VALUE_ROLE)
+    model.removeRows(1, 4, model.indexFromNode(cards))
+    final = model.toData()
+    steps = 0
+    while model.undo() is not None:
+        steps += 1
+    assert steps == 4 and model.toData() == original
+    while model.redo() is not None:
+        pass
+    assert model.toData() == final
+
+
+def test_a_new_edit_drops_redo(model):
+    cards = cardsOf(model, 0)
+    model.removeRows(0, 1, model.indexFromNode(cards))
+    model.undo()
+    assert model.history.canRedo()
+    model.removeRows(1, 1, model.indexFromNode(cards))
+    assert not model.history.canRedo()
+
+
+def test_history_steps_and_groups():
+    history = UndoHistory(limit=3)
+    history.record('Edit', {'o': 'set', 'p': [0], 'v': 1})
+    history.record('Edit', {'o': 'set', 'p': [0], 'v': 2})
+    history.record('Edit', {'o': 'set', 'p': [1], 'v': 3})
+    # typing in one cell is one step, keeping its value before the first
+    assert [[op['v'] for op in s.ops] for s in history.undoSteps] == [[1], [3]]
+    with history.group('Paste'):
+        history.record('Insert', {'o': 'rm', 'p': [], 'r': 0, 'n': 1})
+        history.record('Insert', {'o': 'rm', 'p': [], 'r': 1, 'n': 1})
+    assert history.undoText() == 'Paste' and len(history.undoSteps[-1].ops) == 2
+
+    applied = []
+    history.undo(applied.append)
+    assert [op['r'] for op in applied] == [1, 0]
+    assert history.redoText() == 'Paste' and history.undoText() == 'Edit'
+
+    for i in range(4):
+        history.record('Edit', {'o': 'set', 'p': [i + 2], 'v': i})
+    assert len(history.undoSteps) == 3 and not history.canRedo()
+
+
+def test_history_row_budget():
+    history = UndoHistory(maxRows=10)
+    history.record('Delete', {'o': 'put'}, rows=6)
+    history.record('Delete', {'o': 'put'}, rows=6)
+    assert len(history.undoSteps) == 1 and history.rows == 6